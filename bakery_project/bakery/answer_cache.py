@@ -0,0 +1,131 @@
+"""
+Semantic answer cache for chatbot queries.
+
+Answers are stored in the shared 'chatbot' cache so every gunicorn worker
+benefits. A query is matched by its normalised text first, then by cosine
+similarity of its embedding against recently cached queries. Entries expire
+after a TTL, the semantic index is bounded with LRU eviction, and every key
+is namespaced by the index version so a new index invalidates old answers.
+
+Hits record their use in the semantic index at most once per
+CHATBOT_ANSWER_CACHE_TOUCH_INTERVAL seconds per answer, so a hit costs one
+cache read rather than a rewrite of the whole index. The index is updated by
+read-modify-write under a per-process lock only: workers writing at the same
+moment can lose each other's updates. A lost touch only makes an answer look
+older to eviction; a lost index entry means its question is matched exactly
+but not semantically until it is cached again.
+"""
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+
+def normalize_query(query):
+    return ' '.join(re.sub(r'[^a-z0-9₹ ]+', ' ', query.lower()).split())
+
+
+class SemanticAnswerCache:
+    """Exact + near-duplicate answer cache backed by a Django cache alias"""
+
+    def __init__(self, alias='chatbot', ttl=None, max_entries=None, threshold=None, touch_interval=None):
+        self.alias = alias
+        self.ttl = ttl or settings.CHATBOT_ANSWER_CACHE_TTL
+        self.max_entries = max_entries or settings.CHATBOT_ANSWER_CACHE_MAX_ENTRIES
+        self.threshold = threshold or settings.CHATBOT_ANSWER_CACHE_SIMILARITY
+        self.touch_interval = touch_interval or settings.CHATBOT_ANSWER_CACHE_TOUCH_INTERVAL
+        # Serialises this process's read-modify-write of the semantic index
+        self._lock = threading.Lock()
+        # Answer key -> when this process last recorded a hit in the index
+        self._touched = {}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _answer_key(self, version, normalized):
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+        return f"chatbot-answer:{version}:{digest}"
+
+    def _index_key(self, version):
+        return f"chatbot-answer-index:{version}"
+
+    def get(self, query, version, embed):
+        """
+        Look up an answer. `embed` is called (at most once) only when there is
+        no exact match. Returns (answer, match, embedding) where match is
+        'exact', 'semantic' or None; reuse the embedding for set()/retrieval.
+        """
+        normalized = normalize_query(query)
+        key = self._answer_key(version, normalized)
+        entry = self.cache.get(key)
+        if entry is not None:
+            # Exact hits count as use too, or eviction would drop the most-asked questions first
+            self._touch(version, key)
+            return entry['answer'], 'exact', None
+
+        embedding = np.asarray(embed(query), dtype=np.float32)
+        index = self.cache.get(self._index_key(version)) or []
+        if not index:
+            return None, None, embedding
+
+        vectors = np.stack([np.frombuffer(item['vector'], dtype=np.float16) for item in index]).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(embedding) or 1.0)
+        scores = vectors @ embedding / np.where(norms == 0, 1.0, norms)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None, None, embedding
+
+        entry = self.cache.get(index[best]['key'])
+        if entry is None:
+            # Answer expired; its index slot is dropped on the next set()
+            return None, None, embedding
+        self._touch(version, index[best]['key'], index[best]['used'])
+        return entry['answer'], 'semantic', embedding
+
+    def _touch(self, version, key, used=0):
+        """Record a hit for LRU eviction, unless one was recorded within the touch interval"""
+        now = time.time()
+        if now - max(used, self._touched.get(key, 0)) < self.touch_interval:
+            return
+        if len(self._touched) >= self.max_entries:
+            self._touched.clear()
+        self._touched[key] = now
+        with self._lock:
+            index = self.cache.get(self._index_key(version)) or []
+            for item in index:
+                if item['key'] == key:
+                    item['used'] = now
+                    self.cache.set(self._index_key(version), index, self.ttl)
+                    break
+
+    def set(self, query, answer, version, embedding=None):
+        normalized = normalize_query(query)
+        key = self._answer_key(version, normalized)
+        self.cache.set(key, {'answer': answer, 'query': query, 'cached_at': time.time()}, self.ttl)
+        if embedding is None:
+            return
+
+        with self._lock:
+            now = time.time()
+            index = [
+                item for item in (self.cache.get(self._index_key(version)) or [])
+                if item['key'] != key and now - item['used'] < self.ttl
+            ]
+            index.append({
+                'key': key,
+                'vector': np.asarray(embedding, dtype=np.float16).tobytes(),
+                'used': now,
+            })
+            if len(index) > self.max_entries:
+                # Evict the least recently used entries
+                index.sort(key=lambda item: item['used'], reverse=True)
+                for item in index[self.max_entries:]:
+                    self.cache.delete(item['key'])
+                index = index[:self.max_entries]
+            self.cache.set(self._index_key(version), index, self.ttl)
+        self._touched[key] = now
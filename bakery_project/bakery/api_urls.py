@@ -30,12 +30,15 @@ urlpatterns = [
     
     # Chatbot endpoints
     path('chatbot/query/', chatbot_views.chatbot_query, name='chatbot_query'),
+    path('chatbot/query/stream/', chatbot_views.chatbot_query_stream, name='chatbot_query_stream'),
     path('chatbot/refresh/', chatbot_views.chatbot_refresh, name='chatbot_refresh'),
     path('chatbot/status/', chatbot_views.chatbot_status, name='chatbot_status'),
     
     # Chatbot order flow
     path('chatbot/order/search/', chatbot_views.chatbot_order_search, name='chatbot_order_search'),
+    path('chatbot/order/autocomplete/', chatbot_views.chatbot_order_autocomplete, name='chatbot_order_autocomplete'),
     path('chatbot/order/initiate/', chatbot_views.chatbot_order_initiate, name='chatbot_order_initiate'),
+    path('chatbot/order/cart/', chatbot_views.chatbot_order_cart, name='chatbot_order_cart'),
     path('chatbot/order/address/', chatbot_views.chatbot_order_address, name='chatbot_order_address'),
     path('chatbot/order/create/', chatbot_views.chatbot_order_create, name='chatbot_order_create'),
     path('chatbot/order/payment/verify/', chatbot_views.chatbot_order_payment_verify, name='chatbot_order_payment_verify'),
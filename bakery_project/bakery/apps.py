@@ -23,5 +23,8 @@ class BakeryConfig(AppConfig):
     name = 'bakery'
 
     def ready(self):
+        # Keep the chatbot index in sync with model changes
+        from . import signals  # noqa: F401
+        
         # Connect the signal handler for post_migrate
         post_migrate.connect(initialize_chatbot, sender=self)
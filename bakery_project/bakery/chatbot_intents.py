@@ -0,0 +1,194 @@
+"""
+Deterministic intent router for the chatbot.
+
+Answers questions that one indexed query (or the static bakery info) can
+answer exactly - order status, prices, menu listings, store hours, contact
+and delivery details - without a vector search or an LLM call. Anything it
+does not recognise returns None and falls through to RAG. Order status is
+only answered for the order's owner; everyone else falls through to the
+per-user scoped RAG search, which cannot see other customers' orders.
+"""
+import re
+from collections import namedtuple
+
+from .menu_search import get_menu_index
+from .models import MenuItem, Order
+
+IntentAnswer = namedtuple('IntentAnswer', ['intent', 'answer'])
+
+# At least 8 characters including a digit, so "ordered" / "ordinary" are not IDs
+ORDER_ID_RE = re.compile(r'\bORD[-_]?(?=[A-Z0-9]*\d)[A-Z0-9]{8,}\b', re.IGNORECASE)
+PRICE_RE = re.compile(r'\b(price|prices|cost|costs|how much|rate|charge)\b')
+LISTING_RE = re.compile(r'\b(menu|list|show|what|which|have|available|options|types|kinds)\b')
+
+# Words that carry no extra meaning in item/category questions. If anything
+# else is left over ("eggless", "for 10 people") the question is more
+# specific than a lookup can answer and goes to RAG instead.
+FILLER_WORDS = {
+    'a', 'an', 'the', 'of', 'for', 'in', 'on', 'is', 'are', 'do', 'does', 'you', 'your', 'u',
+    'we', 'i', 'me', 'my', 'can', 'could', 'please', 'pls', 'tell', 'about', 'give', 'get',
+    'see', 'show', 'list', 'what', 'whats', 's', 'which', 'there', 'any', 'some', 'all',
+    'have', 'has', 'available', 'availability', 'menu', 'options', 'types', 'kinds', 'items',
+    'item', 'today', 'now', 'price', 'prices', 'cost', 'costs', 'how', 'much', 'rate',
+    'charge', 'hi', 'hello', 'hey', 'it', 'one', 'details', 'info', 'information',
+}
+
+# Words any static info question may also use
+INFO_FILLER_WORDS = {'when', 'where', 'to', 'at', 'will', 'be', 'time', 'store', 'shop', 'bakery', 'yours'}
+
+# Static info questions -> section title in ADDITIONAL_BAKERY_INFO, plus the
+# words such a question may use. Anything else left over ("custom cake to
+# Banjara Hills", "my receipt") goes to RAG, as for item questions.
+INFO_INTENTS = [
+    ('store_hours', re.compile(r'\b(hours|timings?|open|opening|close|closing)\b'), 'Store Hours', [
+        'hours hour timing timings open opening opens close closing closes closed working business days',
+        'monday tuesday wednesday thursday friday saturday sunday weekend weekends weekdays',
+    ]),
+    ('delivery', re.compile(r'\b(delivery|deliver|delivers|shipping)\b'), 'Delivery Information', [
+        'delivery deliver delivers shipping free charge charges fee fees minimum order areas area home long take takes',
+        'offer provide',
+    ]),
+    ('payment_methods', re.compile(
+        r'\bpayment (methods?|options?|modes?)\b|\bhow (can|do) i pay\b|\bpay (by|with|using|via)\b|\baccept (upi|cards?|cash)\b'
+    ), 'Payment Methods Accepted', [
+        'payment payments method methods option modes mode pay by with using via accept upi card cards cash',
+        'credit debit online wallet wallets',
+    ]),
+    ('offers', re.compile(r'\b(offers?|discounts?|deals?|coupons?)\b'), 'Special Offers', [
+        'offers offer discounts discount deals deal coupons coupon current special ongoing running',
+    ]),
+    ('services', re.compile(r'\b(custom cakes?|catering|gluten free|vegan|wedding cakes?)\b'), 'Special Services', [
+        'custom cake cakes catering gluten free vegan wedding offer provide make services service',
+    ]),
+    ('contact', re.compile(
+        r'\b(contact|phone number|call you|email|located|location|where are you)\b|\b(your|store|bakery|shop) address\b'
+    ), 'Contact Information', [
+        'contact phone number call email located location address reach',
+    ]),
+]
+
+CATEGORY_ALIASES = {
+    'bread': ['bread', 'breads'],
+    'cake': ['cake', 'cakes'],
+    'croissant': ['croissant', 'croissants'],
+    'fruittart': ['fruit tart', 'fruit tarts', 'tart', 'tarts'],
+    'pastry': ['pastry', 'pastries'],
+    'cookie': ['cookie', 'cookies'],
+    'muffin': ['muffin', 'muffins'],
+    'donut': ['donut', 'donuts', 'doughnut', 'doughnuts'],
+}
+
+
+def normalize(text):
+    return re.sub(r'[^a-z0-9₹ ]+', ' ', text.lower()).split()
+
+
+def info_section(info_text, title):
+    """Return the lines under `title:` in the static info, up to the next blank line"""
+    lines = []
+    in_section = False
+    for line in info_text.splitlines():
+        if in_section:
+            if not line.strip():
+                break
+            lines.append(line.strip())
+        elif line.strip().lower() == f"{title.lower()}:":
+            in_section = True
+    return "\n".join(lines)
+
+
+def answer_order_status(order_ref, user_id):
+    """Status of the asking user's own order, or None (not theirs, not found, or anonymous)"""
+    if not user_id:
+        return None
+    order = (
+        Order.objects.filter(order_id=order_ref.upper(), user_id=user_id)
+        .prefetch_related('items__menu_item')
+        .first()
+    )
+    if order is None:
+        return None
+    items = ", ".join(f"{item.quantity}x {item.menu_item.name}" for item in order.items.all())
+    return (
+        f"Order {order.order_id} is currently {order.get_status_display()}.\n"
+        f"Items: {items or 'N/A'}\n"
+        f"Grand total: ₹{order.grand_total}\n"
+        f"Placed on: {order.created_at.strftime('%Y-%m-%d %H:%M')}"
+    )
+
+
+def leftover_words(query_words, phrases):
+    """Query words not covered by `phrases` or FILLER_WORDS"""
+    covered = set(FILLER_WORDS)
+    for phrase in phrases:
+        covered.update(phrase.split())
+    return [word for word in query_words if word not in covered]
+
+
+def match_menu_items(query_words, items):
+    """Menu items whose full (normalised) name appears in the query, longest first"""
+    query = f" {' '.join(query_words)} "
+    matches = [item for item in items if f" {' '.join(normalize(item.name))} " in query]
+    return sorted(matches, key=lambda item: len(item.name), reverse=True)
+
+
+def match_category(query_words):
+    query = f" {' '.join(query_words)} "
+    for category, aliases in CATEGORY_ALIASES.items():
+        if any(f" {alias} " in query for alias in aliases):
+            return category
+    return None
+
+
+def describe_item(item):
+    availability = "available" if item.available else "currently unavailable"
+    text = f"{item.name} ({item.get_category_display()}) costs ₹{item.price} and is {availability}."
+    if item.description:
+        text += f"\n{item.description}"
+    return text
+
+
+def route_query(query, bakery_info, user_id=None):
+    """
+    Try to answer `query` for the user `user_id` (None if anonymous)
+    deterministically. Returns an IntentAnswer, or None if the question needs
+    retrieval + the LLM.
+    """
+    # 1. Order status - the ID pins down exactly one row
+    order_match = ORDER_ID_RE.search(query)
+    if order_match:
+        answer = answer_order_status(order_match.group(0), user_id)
+        if answer is not None:
+            return IntentAnswer('order_status', answer)
+
+    words = normalize(query)
+    text = ' '.join(words)
+
+    # 2. Specific menu items (price / availability / description)
+    items = get_menu_index().menu
+    matched = match_menu_items(words, items)
+    if matched and not leftover_words(words, [' '.join(normalize(item.name)) for item in matched]):
+        intent = 'item_price' if PRICE_RE.search(text) else 'item_details'
+        return IntentAnswer(intent, "\n\n".join(describe_item(item) for item in matched[:3]))
+
+    # 3. Category listings, or the whole menu
+    category = match_category(words)
+    if (LISTING_RE.search(text) and (category or 'menu' in words)
+            and not leftover_words(words, CATEGORY_ALIASES.get(category, []))):
+        listed = [item for item in items if item.available and (category is None or item.category == category)]
+        if listed:
+            label = dict(MenuItem.CATEGORY_CHOICES)[category] if category else 'Menu'
+            lines = [f"- {item.name}: ₹{item.price}" for item in listed]
+            return IntentAnswer(
+                'category_listing' if category else 'menu_listing',
+                f"{label} items available:\n" + "\n".join(lines),
+            )
+
+    # 4. Static bakery information
+    for intent, pattern, title, vocabulary in INFO_INTENTS:
+        if pattern.search(text) and not leftover_words(words, vocabulary + list(INFO_FILLER_WORDS)):
+            section = info_section(bakery_info, title)
+            if section:
+                return IntentAnswer(intent, f"{title}:\n{section}")
+
+    return None
@@ -5,21 +5,35 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from django.views.decorators.csrf import csrf_exempt
+from django.http import StreamingHttpResponse
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 import os
 import json
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
 import razorpay
 from decimal import Decimal
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import chatbot and models
-from .rag_chatbot import DatabaseRAGChatbot
-from .models import MenuItem, Order, OrderItem, Payment
-from django.db import models
+from .rag_chatbot import DatabaseRAGChatbot, ADDITIONAL_BAKERY_INFO
+from .chatbot_intents import route_query
+from .answer_cache import SemanticAnswerCache
+from .retrieval_service import RetrievalClient, SidecarRAGChatbot
+from .llm_gateway import LLMUnavailable
+from .prompt_builder import retrieval_only_answer
+from .single_flight import SingleFlight, flight_key
+from .order_sessions import get_order_session_store
+from .menu_search import get_menu_index, search_menu
+from .order_ids import new_order_id
+from .order_cart import CartError, ItemUnavailable, apply_lines, cart_from_session, parse_lines, price_cart
+from .models import Order, OrderItem, Payment
+from django.db import transaction
 
 # Load environment
 load_dotenv()
@@ -38,20 +52,64 @@ else:
 
 # Initialize chatbot globally (so it persists across requests)
 chatbot_instance = None
+_chatbot_lock = threading.Lock()
 
-# Session storage for order flow (in production, use Redis or database)
-order_sessions = {}
+# Cross-worker answer cache for repeated / near-duplicate questions
+answer_cache = SemanticAnswerCache()
+
+# Coalesces identical in-flight questions within and across workers
+answer_flights = SingleFlight()
+
+# Answer path counts ("intent:<name>" / "cache:<match>" / "coalesced" / "rag" / "fallback:<reason>") for measuring the fast-path hit rate
+query_paths = Counter()
+
+# Multi-step order flow state, shared by every worker (see bakery.order_sessions)
+order_sessions = get_order_session_store()
+
+
+def retrieval_scope(request):
+    """
+    (user_id, cache scope) for a chatbot request: logged-in users search and
+    cache within their own records, everyone else only the shared data
+    """
+    user_id = request.user.id if request.user.is_authenticated else None
+    return user_id, f"user{user_id}" if user_id else "shared"
 
 
 def get_chatbot():
-    """Get or create chatbot instance"""
+    """Get or create chatbot instance (initialised once per process)"""
     global chatbot_instance
     if chatbot_instance is None:
-        chatbot_instance = DatabaseRAGChatbot(GROQ_API_KEY)
-        chatbot_instance.initialize()
+        with _chatbot_lock:
+            if chatbot_instance is None:
+                if settings.RAG_SIDECAR_SOCKET:
+                    # Model and index live in the shared retrieval service
+                    client = RetrievalClient(settings.RAG_SIDECAR_SOCKET, settings.RAG_SIDECAR_TIMEOUT)
+                    chatbot = SidecarRAGChatbot(client, GROQ_API_KEY)
+                else:
+                    chatbot = DatabaseRAGChatbot(GROQ_API_KEY)
+                chatbot.initialize()
+                chatbot.start_index_updater()
+                chatbot_instance = chatbot
     return chatbot_instance
 
 
+def answer_with_fallback(chatbot, query, embedding, user_id, version):
+    """
+    (answer, path) from retrieval + the LLM, cached on success; if the LLM is
+    unavailable, a retrieval-only answer that is not cached
+    """
+    docs = chatbot.search(query, embedding=embedding, user_id=user_id)
+    try:
+        answer = chatbot.answer(query, docs)
+    except LLMUnavailable as e:
+        # Degraded answer; not cached so the next request retries the LLM
+        print(f"⚠️ LLM unavailable ({e.reason}), answering from retrieval only")
+        return retrieval_only_answer(docs), f"fallback:{e.reason}"
+    answer_cache.set(query, answer, version, embedding)
+    return answer, "rag"
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def chatbot_query(request):
@@ -70,13 +128,33 @@ def chatbot_query(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get chatbot and ask question
-        chatbot = get_chatbot()
-        answer = chatbot.ask(query)
+        # Fast path: questions the ORM or static info answer exactly
+        user_id, scope = retrieval_scope(request)
+        routed = route_query(query, ADDITIONAL_BAKERY_INFO, user_id)
+        if routed is not None:
+            path = f"intent:{routed.intent}"
+            answer = routed.answer
+        else:
+            # Get chatbot, then try the answer cache before asking
+            chatbot = get_chatbot()
+            version = f"{chatbot.cache_version}:{scope}"
+            answer, match, embedding = answer_cache.get(query, version, chatbot.embed_query)
+            if answer is not None:
+                path = f"cache:{match}"
+            else:
+                # Identical questions in flight share one retrieval + LLM call
+                with answer_flights.join(flight_key(query, version)) as flight:
+                    if flight.result is not None:
+                        answer, path = flight.result['answer'], "coalesced"
+                    else:
+                        answer, path = answer_with_fallback(chatbot, query, embedding, user_id, version)
+                        flight.publish({'answer': answer, 'path': path})
+        query_paths[path] += 1
         
         return Response({
             "query": query,
             "answer": answer,
+            "path": path,
             "status": "success"
         })
         
@@ -90,6 +168,107 @@ def chatbot_query(request):
         )
 
 
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def chatbot_query_stream(request):
+    """
+    Streaming variant of chatbot_query using Server-Sent Events
+    
+    POST /api/chatbot/query/stream/
+    Body: {"query": "your question here"}
+    
+    Emits a "meta" event (answer path and retrieved sources), then "token"
+    events as the model produces text, then a final "done" event with the
+    full answer and time-to-first-token. Errors arrive as an "error" event.
+    """
+    query = request.data.get('query', '')
+    if not query:
+        return Response(
+            {"error": "Query parameter is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    user_id, scope = retrieval_scope(request)
+    
+    def events():
+        started = time.perf_counter()
+        try:
+            flight = nullcontext()
+            routed = route_query(query, ADDITIONAL_BAKERY_INFO, user_id)
+            if routed is not None:
+                path, answer = f"intent:{routed.intent}", routed.answer
+            else:
+                chatbot = get_chatbot()
+                version = f"{chatbot.cache_version}:{scope}"
+                answer, match, embedding = answer_cache.get(query, version, chatbot.embed_query)
+                path = f"cache:{match}" if answer is not None else "rag"
+                if answer is None:
+                    # Identical questions in flight share one retrieval + LLM call
+                    flight = answer_flights.join(flight_key(query, version))
+                    if flight.result is not None:
+                        answer, path = flight.result['answer'], "coalesced"
+            
+            with flight:
+                if answer is not None:
+                    yield sse_event('meta', {"path": path, "sources": []})
+                    ttft = time.perf_counter() - started
+                    yield sse_event('token', {"text": answer})
+                else:
+                    docs = chatbot.search(query, embedding=embedding, user_id=user_id)
+                    yield sse_event('meta', {
+                        "path": path,
+                        "sources": [doc.metadata.get('doc_id') for doc in docs],
+                        "generation": chatbot.generation,
+                    })
+                    parts = []
+                    ttft = None
+                    try:
+                        for text in chatbot.stream(query, docs):
+                            if ttft is None:
+                                ttft = time.perf_counter() - started
+                            parts.append(text)
+                            yield sse_event('token', {"text": text})
+                    except LLMUnavailable as e:
+                        if parts:
+                            # Already mid-answer; nothing sensible to fall back to
+                            raise
+                        print(f"⚠️ LLM unavailable ({e.reason}), answering from retrieval only")
+                        path = f"fallback:{e.reason}"
+                        parts = [retrieval_only_answer(docs)]
+                        ttft = time.perf_counter() - started
+                        yield sse_event('token', {"text": parts[0]})
+                    answer = "".join(parts)
+                    if path == "rag":
+                        answer_cache.set(query, answer, version, embedding)
+                    flight.publish({'answer': answer, 'path': path})
+            
+            query_paths[path] += 1
+            total = time.perf_counter() - started
+            print(f"⏱ chatbot stream [{path}] ttft={ttft * 1000 if ttft else 0:.0f}ms total={total * 1000:.0f}ms")
+            yield sse_event('done', {
+                "query": query,
+                "answer": answer,
+                "path": path,
+                "ttft_ms": round(ttft * 1000) if ttft is not None else None,
+                "total_ms": round(total * 1000),
+            })
+        except Exception as e:
+            import traceback
+            print(f"❌ Error in chatbot_query_stream: {traceback.format_exc()}")
+            yield sse_event('error', {"error": str(e), "status": "error"})
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def chatbot_refresh(request):
@@ -97,14 +276,27 @@ def chatbot_refresh(request):
     API endpoint to refresh chatbot data from database
     
     POST /api/chatbot/refresh/
+    Body: {"full": true} (optional) to rebuild the whole index
+    
+    By default only the records changed since the last update are re-embedded.
+    A full rebuild runs in the background; the current index keeps serving
+    until the new one is swapped in. Poll /api/chatbot/status/ for progress.
     """
     try:
-        global chatbot_instance
-        chatbot_instance = None  # Reset instance
-        chatbot = get_chatbot()  # Reinitialize
+        chatbot = get_chatbot()
+        if request.data.get('full'):
+            started = chatbot.rebuild_async()
+            return Response({
+                "message": "Index rebuild started" if started else "Index rebuild already in progress",
+                "generation": chatbot.generation,
+                "status": "building"
+            }, status=status.HTTP_202_ACCEPTED)
         
+        updated = chatbot.refresh_data()
         return Response({
             "message": "Chatbot data refreshed successfully",
+            "updated_documents": updated,
+            "generation": chatbot.generation,
             "status": "success"
         })
         
@@ -123,9 +315,21 @@ def chatbot_status(request):
     GET /api/chatbot/status/
     """
     global chatbot_instance
+    if chatbot_instance is None:
+        return Response({
+            "initialized": False,
+            "status": "not initialized",
+            "query_paths": dict(query_paths),
+            "coalescing": answer_flights.stats(),
+        })
+    
+    index = chatbot_instance.status()
     return Response({
-        "initialized": chatbot_instance is not None,
-        "status": "ready" if chatbot_instance is not None else "not initialized"
+        "initialized": True,
+        "status": "building" if index['build']['state'] == 'building' else "ready",
+        "query_paths": dict(query_paths),
+        "coalescing": answer_flights.stats(),
+        **index
     })
 
 
@@ -139,43 +343,10 @@ def chatbot_order_search(request):
     """
     try:
         query = request.data.get('query', '').lower().strip()
-        
-        # Normalize query by removing extra spaces and special characters
-        normalized_query = ''.join(query.split()).lower()
-        
-        # Search in menu items with multiple strategies
-        items = MenuItem.objects.filter(available=True)
-        
-        # Strategy 1: Exact match (case-insensitive)
-        exact_matches = items.filter(name__iexact=query)
-        
-        # Strategy 2: Contains match (with spaces)
-        contains_matches = items.filter(
-            models.Q(name__icontains=query) | 
-            models.Q(description__icontains=query) |
-            models.Q(category__icontains=query)
-        )
-        
-        # Strategy 3: Fuzzy match (remove spaces from both sides)
-        fuzzy_matches = []
-        if not exact_matches.exists() and not contains_matches.exists():
-            for item in items:
-                normalized_item_name = ''.join(item.name.split()).lower()
-                # Check if normalized query is in normalized item name
-                if normalized_query in normalized_item_name or normalized_item_name in normalized_query:
-                    fuzzy_matches.append(item)
-                # Also check individual words
-                elif any(word in normalized_item_name for word in query.split() if len(word) > 2):
-                    fuzzy_matches.append(item)
-        
-        # Combine results (exact first, then contains, then fuzzy)
-        if exact_matches.exists():
-            final_items = list(exact_matches[:5])
-        elif contains_matches.exists():
-            final_items = list(contains_matches[:5])
-        else:
-            final_items = fuzzy_matches[:5]
-        
+
+        # One in-memory lookup: exact, prefix, substring and typo-tolerant matches, ranked
+        final_items = search_menu(query, limit=5)
+
         if not final_items:
             return Response({
                 "found": False,
@@ -183,14 +354,7 @@ def chatbot_order_search(request):
                 "items": []
             })
         
-        items_data = [{
-            'id': item.id,
-            'name': item.name,
-            'description': item.description,
-            'price': float(item.price),
-            'category': item.category,
-            'image_url': item.image_url
-        } for item in final_items]
+        items_data = [dict(item, price=float(item['price'])) for item in final_items]
         
         return Response({
             "found": True,
@@ -205,66 +369,143 @@ def chatbot_order_search(request):
         )
 
 
+def cart_response(session_id, summary, next_step, message):
+    """Response body describing a session's priced cart"""
+    return Response({
+        "success": True,
+        "session_id": session_id,
+        "item": {
+            'name': summary['item_name'],
+            'quantity': summary['quantity'],
+            'item_total': summary['item_total'],
+            'delivery_fee': summary['delivery_fee'],
+            'grand_total': summary['grand_total']
+        },
+        "cart": summary['items'],
+        "next_step": next_step,
+        "message": message
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def chatbot_order_autocomplete(request):
+    """
+    Typeahead suggestions (menu items and categories) for a name prefix,
+    most ordered first. Served from the in-memory menu index; responses carry
+    an ETag, so unchanged results revalidate with a 304.
+    GET /api/chatbot/order/autocomplete/?q=choc&limit=5
+    """
+    prefix = request.query_params.get('q', '')
+    try:
+        limit = min(int(request.query_params.get('limit', settings.CHATBOT_AUTOCOMPLETE_LIMIT)),
+                    settings.CHATBOT_AUTOCOMPLETE_LIMIT)
+    except ValueError:
+        limit = settings.CHATBOT_AUTOCOMPLETE_LIMIT
+
+    index = get_menu_index()
+    # The suggestions depend only on the URL and the index contents
+    etag = f'"{index.stamp}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({"query": prefix, "suggestions": index.suggest(prefix, max(limit, 0))})
+    response['ETag'] = etag
+    response['Cache-Control'] = f"public, max-age={settings.CHATBOT_AUTOCOMPLETE_MAX_AGE}"
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def chatbot_order_initiate(request):
     """
-    Initiate order process - collect item and quantity
+    Initiate order process - start a cart with one or more items
     POST /api/chatbot/order/initiate/
-    Body: {"item_id": 1, "quantity": 2, "user_id": 1 (optional)}
+    Body: {"items": [{"item_id": 1, "quantity": 2}, ...], "user_id": 1 (optional)}
+      or: {"item_id": 1, "quantity": 2, "user_id": 1 (optional)}
     """
     try:
-        item_id = request.data.get('item_id')
-        quantity = request.data.get('quantity', 1)
         user_id = request.data.get('user_id') or request.user.id if request.user.is_authenticated else None
         
-        # Validate item
+        # Validate and price the items (one query for the whole cart)
         try:
-            menu_item = MenuItem.objects.get(id=item_id, available=True)
-        except MenuItem.DoesNotExist:
+            cart = apply_lines({}, parse_lines(request.data))
+            _, summary = price_cart(cart)
+        except ItemUnavailable as e:
             return Response({
                 "success": False,
-                "message": "This item is not available."
+                "message": str(e)
             }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Create session ID
-        import uuid
-        session_id = str(uuid.uuid4())
-        
-        # Calculate total
-        item_total = float(menu_item.price) * int(quantity)
-        delivery_fee = 50.00
-        grand_total = item_total + delivery_fee
+        except CartError as e:
+            return Response({
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Store in session
-        order_sessions[session_id] = {
-            'item_id': item_id,
-            'item_name': menu_item.name,
-            'quantity': quantity,
-            'price': float(menu_item.price),
-            'item_total': item_total,
-            'delivery_fee': delivery_fee,
-            'grand_total': grand_total,
+        session_id = order_sessions.create({
+            **summary,
             'user_id': user_id,
             'step': 'collect_address',
             'created_at': datetime.now().isoformat()
-        }
-        
-        return Response({
-            "success": True,
-            "session_id": session_id,
-            "item": {
-                'name': menu_item.name,
-                'quantity': quantity,
-                'price': float(menu_item.price),
-                'item_total': item_total,
-                'delivery_fee': delivery_fee,
-                'grand_total': grand_total
-            },
-            "next_step": "collect_address",
-            "message": f"Great! I'll help you order {quantity}x {menu_item.name} for ₹{grand_total:.2f}. Please provide your delivery address."
         })
         
+        return cart_response(
+            session_id, summary, "collect_address",
+            f"Great! I'll help you order {summary['description']} for ₹{summary['grand_total']:.2f}. "
+            f"Please provide your delivery address."
+        )
+        
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def chatbot_order_cart(request):
+    """
+    Add, update or remove cart lines before checkout
+    POST /api/chatbot/order/cart/
+    Body: {"session_id": "...", "items": [{"item_id": 1, "quantity": 3}, {"item_id": 2, "quantity": 0}]}
+    
+    A positive quantity adds the item or sets its quantity; 0 removes it.
+    """
+    try:
+        session_id = request.data.get('session_id')
+        session_data = order_sessions.get(session_id) if session_id else None
+        if session_data is None:
+            return Response({
+                "success": False,
+                "message": "Invalid or expired session. Please start a new order."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if session_data.get('order_id'):
+            return Response({
+                "success": False,
+                "message": "This order has already been placed. Please start a new order."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            cart = apply_lines(cart_from_session(session_data), parse_lines(request.data))
+            _, summary = price_cart(cart)
+        except CartError as e:
+            return Response({
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        session_data.update(summary)
+        order_sessions.save(session_id, session_data)
+        
+        return cart_response(
+            session_id, summary, session_data['step'],
+            f"Your cart: {summary['description']} - ₹{summary['grand_total']:.2f} including delivery."
+        )
+        
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -287,7 +528,8 @@ def chatbot_order_address(request):
         address = request.data.get('address', '').strip()
         phone = request.data.get('phone', '').strip()
         
-        if not session_id or session_id not in order_sessions:
+        session_data = order_sessions.get(session_id) if session_id else None
+        if session_data is None:
             return Response({
                 "success": False,
                 "message": "Invalid or expired session. Please start a new order."
@@ -300,16 +542,16 @@ def chatbot_order_address(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Update session
-        order_sessions[session_id]['delivery_address'] = address
-        order_sessions[session_id]['delivery_phone'] = phone
-        order_sessions[session_id]['step'] = 'confirm_order'
-        
-        session_data = order_sessions[session_id]
+        session_data['delivery_address'] = address
+        session_data['delivery_phone'] = phone
+        session_data['step'] = 'confirm_order'
+        order_sessions.save(session_id, session_data)
         
         return Response({
             "success": True,
             "session_id": session_id,
             "order_summary": {
+                'items': session_data['items'],
                 'item_name': session_data['item_name'],
                 'quantity': session_data['quantity'],
                 'item_total': session_data['item_total'],
@@ -329,6 +571,18 @@ def chatbot_order_address(request):
         )
 
 
+def checkout_details(session_data):
+    """Order summary returned by checkout"""
+    return {
+        'order_id': session_data['order_id'],
+        'items': session_data['items'],
+        'item_name': session_data['item_name'],
+        'quantity': session_data['quantity'],
+        'grand_total': session_data['grand_total'],
+        'delivery_address': session_data.get('delivery_address'),
+    }
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def chatbot_order_create(request):
@@ -347,13 +601,36 @@ def chatbot_order_create(request):
         
         session_id = request.data.get('session_id')
         
-        if not session_id or session_id not in order_sessions:
+        session_data = order_sessions.get(session_id) if session_id else None
+        if session_data is None:
             return Response({
                 "success": False,
                 "message": "Invalid or expired session."
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        session_data = order_sessions[session_id]
+        if session_data.get('razorpay_order_id'):
+            # Checkout already ran for this cart; resume its payment instead of creating another order
+            return Response({
+                "success": True,
+                "order_id": session_data['order_id'],
+                "razorpay_order_id": session_data['razorpay_order_id'],
+                "razorpay_key_id": settings.RAZORPAY_KEY_ID,
+                "amount": int(round(session_data['grand_total'] * 100)),
+                "currency": "INR",
+                "order_details": checkout_details(session_data),
+                "message": "Your order is waiting for payment."
+            })
+        
+        # Re-price the whole cart at checkout (one query) so the charge matches current prices
+        cart = cart_from_session(session_data)
+        try:
+            menu_items, summary = price_cart(cart)
+        except CartError as e:
+            return Response({
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        session_data.update(summary)
         
         # Get or create user - prioritize authenticated user
         if request.user.is_authenticated:
@@ -372,12 +649,10 @@ def chatbot_order_create(request):
             )
             print(f"⚠️ Created guest user: {guest_username}")
         
-        # Generate order ID
-        import random
-        order_id = f"ORD{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
+        order_id = new_order_id()
         
         # Create Razorpay order
-        razorpay_amount = int(session_data['grand_total'] * 100)  # Convert to paise
+        razorpay_amount = int(round(summary['grand_total'] * 100))  # Convert to paise
         razorpay_order = razorpay_client.order.create({
             'amount': razorpay_amount,
             'currency': 'INR',
@@ -385,31 +660,35 @@ def chatbot_order_create(request):
             'payment_capture': 1
         })
         
-        # Create Order
-        order = Order.objects.create(
-            user=user,
-            order_id=order_id,
-            status='pending',
-            total_amount=Decimal(str(session_data['item_total'])),
-            delivery_fee=Decimal(str(session_data['delivery_fee'])),
-            delivery_address=session_data.get('delivery_address', ''),
-            delivery_phone=session_data.get('delivery_phone', ''),
-            razorpay_order_id=razorpay_order['id']
-        )
-        
-        # Create OrderItem
-        menu_item = MenuItem.objects.get(id=session_data['item_id'])
-        OrderItem.objects.create(
-            order=order,
-            menu_item=menu_item,
-            quantity=session_data['quantity'],
-            price=Decimal(str(session_data['price']))
-        )
+        # Create one Order for the whole cart, with its items in one insert.
+        # bulk_create skips OrderItem signals; the Order's own index event,
+        # committed in the same transaction, re-indexes it with its items.
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                order_id=order_id,
+                status='pending',
+                total_amount=Decimal(str(summary['item_total'])),
+                delivery_fee=Decimal(str(summary['delivery_fee'])),
+                delivery_address=session_data.get('delivery_address', ''),
+                delivery_phone=session_data.get('delivery_phone', ''),
+                razorpay_order_id=razorpay_order['id']
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    menu_item=menu_items[item_id],
+                    quantity=quantity,
+                    price=menu_items[item_id].price
+                )
+                for item_id, quantity in cart.items()
+            ])
         
         # Update session
-        order_sessions[session_id]['order_id'] = order_id
-        order_sessions[session_id]['razorpay_order_id'] = razorpay_order['id']
-        order_sessions[session_id]['db_order_id'] = order.id
+        session_data['order_id'] = order_id
+        session_data['razorpay_order_id'] = razorpay_order['id']
+        session_data['db_order_id'] = order.id
+        order_sessions.save(session_id, session_data)
         
         return Response({
             "success": True,
@@ -418,13 +697,7 @@ def chatbot_order_create(request):
             "razorpay_key_id": settings.RAZORPAY_KEY_ID,
             "amount": razorpay_amount,
             "currency": "INR",
-            "order_details": {
-                'order_id': order_id,
-                'item_name': session_data['item_name'],
-                'quantity': session_data['quantity'],
-                'grand_total': session_data['grand_total'],
-                'delivery_address': session_data.get('delivery_address'),
-            },
+            "order_details": checkout_details(session_data),
             "message": "Order created! Please complete the payment."
         })
         
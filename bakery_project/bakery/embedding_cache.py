@@ -0,0 +1,128 @@
+"""
+Persistent, content-addressed embedding cache for the RAG chatbot.
+
+Vectors are stored in SQLite keyed by sha256(model name + chunk text), so a
+rebuild only runs the embedding model on chunks it has never seen before.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an Embeddings model with a persistent per-chunk vector cache"""
+
+    def __init__(self, embeddings, model_name, path):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.reset_stats()
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.compute_seconds = 0.0
+
+    def _lookup(self, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _seconds_per_embedding(self):
+        """Average model time per chunk, remembered across runs for reporting"""
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'seconds_per_embedding'").fetchone()
+        return row[0] if row else 0.0
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            cached = self._lookup(keys)
+
+        # Embed each unseen text once, even if it repeats within the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        if missing:
+            start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            elapsed = time.perf_counter() - start
+            self.compute_seconds += elapsed
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [
+                        (key, np.asarray(vector, dtype=np.float32).tobytes())
+                        for key, vector in zip(missing, vectors)
+                    ],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('seconds_per_embedding', ?)",
+                    (elapsed / len(missing),),
+                )
+                self._conn.commit()
+            cached.update(zip(missing, vectors))
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [list(cached[key]) for key in keys]
+
+    def embed_query(self, text):
+        # Queries are one-off; only document chunks are worth caching
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts):
+        """Embed a batch of queries in one model call (not cached either)"""
+        return self.embeddings.embed_documents(list(texts))
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            per_embedding = self._seconds_per_embedding()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'compute_seconds': self.compute_seconds,
+            'estimated_seconds_saved': self.hits * per_embedding,
+        }
+
+    def report(self):
+        """One-line summary for the rebuild log"""
+        s = self.stats()
+        return (
+            f"embedding cache: {s['hits']} hits / {s['misses']} misses "
+            f"({s['hit_rate']:.0%} hit rate), embedded in {s['compute_seconds']:.1f}s, "
+            f"~{s['estimated_seconds_saved']:.1f}s saved"
+        )
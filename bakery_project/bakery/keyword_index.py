@@ -0,0 +1,127 @@
+"""
+Sparse keyword retrieval for the RAG chatbot.
+
+A BM25 index over the same chunks as the vector store catches what dense
+retrieval misses: exact tokens such as order IDs (ORD-1A2B3C4D), transaction
+IDs and item names. Results are merged with the vector hits by reciprocal-rank
+fusion and can optionally be re-ranked with a cross-encoder.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+# IDs like "ORD-1A2B3C4D" / "TXN_ab12" are kept whole as well as split
+TOKEN_RE = re.compile(r'[a-z0-9₹]+(?:[-_][a-z0-9]+)*')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'do', 'does', 'for', 'from', 'has', 'have',
+    'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'the', 'to', 'what', 'when',
+    'where', 'which', 'with', 'you', 'your',
+}
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if '-' in token or '_' in token:
+            tokens.extend(part for part in re.split(r'[-_]', token) if part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over chunk IDs, updatable in place"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {chunk_id: term frequency}
+        self.postings = defaultdict(dict)
+        # chunk_id -> token count, and the distinct terms (for removal)
+        self.lengths = {}
+        self.chunk_terms = {}
+        self.total_length = 0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        """Index every chunk in a LangChain FAISS store"""
+        index = cls()
+        for chunk_id in vectorstore.index_to_docstore_id.values():
+            index.add(chunk_id, vectorstore.docstore.search(chunk_id).page_content)
+        return index
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, chunk_id, text):
+        self.remove(chunk_id)
+        counts = Counter(tokenize(text))
+        for term, count in counts.items():
+            self.postings[term][chunk_id] = count
+        self.chunk_terms[chunk_id] = tuple(counts)
+        self.lengths[chunk_id] = sum(counts.values())
+        self.total_length += self.lengths[chunk_id]
+
+    def remove(self, chunk_id):
+        if chunk_id not in self.lengths:
+            return
+        self.total_length -= self.lengths.pop(chunk_id)
+        for term in self.chunk_terms.pop(chunk_id):
+            postings = self.postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self.postings[term]
+
+    def search(self, query, k=5, allowed=None):
+        """Top-k (chunk_id, score) pairs for `query`, optionally only among `allowed` chunk IDs"""
+        n = len(self.lengths)
+        if not n:
+            return []
+        average_length = self.total_length / n
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                if allowed is not None and chunk_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / average_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, k=None):
+    """Merge ranked ID lists; each list contributes 1 / (k + rank) per ID"""
+    k = k or settings.RAG_RRF_K
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] += 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+_reranker = None
+
+
+def get_reranker():
+    """The optional cross-encoder (RAG_RERANK_MODEL), loaded once; None if disabled"""
+    global _reranker
+    if _reranker is None and settings.RAG_RERANK_MODEL:
+        from sentence_transformers import CrossEncoder
+
+        _reranker = CrossEncoder(settings.RAG_RERANK_MODEL)
+    return _reranker
+
+
+def rerank(query, docs):
+    """Order `docs` by cross-encoder relevance to `query` (unchanged if disabled)"""
+    reranker = get_reranker()
+    if reranker is None or len(docs) < 2:
+        return docs
+    scores = reranker.predict([(query, doc.page_content) for doc in docs])
+    return [doc for _, doc in sorted(zip(scores, docs), key=lambda pair: pair[0], reverse=True)]
@@ -0,0 +1,208 @@
+"""
+Guarded access to the chatbot's LLM (Groq).
+
+Every generation goes through one LLMGateway per process, which
+- caps concurrent LLM calls (RAG_LLM_MAX_CONCURRENCY) so a slow upstream
+  cannot occupy every gunicorn thread and stall checkout;
+- reuses keep-alive HTTPS connections from a pool sized to that cap;
+- bounds each call by RAG_LLM_TIMEOUT seconds;
+- trips a circuit breaker when too many recent calls fail, or when the
+  provider rate-limits us, and rejects calls until it cools down.
+
+Rejected or failed calls raise LLMUnavailable; the views then answer from
+the retrieved records alone (see prompt_builder.retrieval_only_answer()).
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+LLM_MODEL = "llama-3.1-8b-instant"
+
+
+class LLMUnavailable(RuntimeError):
+    """The LLM could not be used for this request (breaker open, saturated, timed out or failed)"""
+
+    def __init__(self, reason, message=None):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Opens when at least `error_rate` of the last `window` calls failed (once
+    `min_calls` have been seen), rejects calls for `cooldown` seconds, then
+    lets a single trial call through: success closes it, failure re-opens it.
+    """
+
+    def __init__(self, window=None, error_rate=None, min_calls=None, cooldown=None):
+        self.error_rate = error_rate if error_rate is not None else settings.RAG_LLM_BREAKER_ERROR_RATE
+        self.min_calls = min_calls or settings.RAG_LLM_BREAKER_MIN_CALLS
+        self.cooldown = cooldown if cooldown is not None else settings.RAG_LLM_BREAKER_COOLDOWN
+        self.outcomes = deque(maxlen=window or settings.RAG_LLM_BREAKER_WINDOW)
+        self.opened_at = None
+        self.open_for = 0.0
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.open_for:
+            return 'open'
+        return 'half-open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if self.opened_at is not None:
+                # Outcome of the half-open trial call
+                self.trial_running = False
+                if success:
+                    self.opened_at = None
+                    self.outcomes.clear()
+                else:
+                    self._open(self.cooldown)
+                return
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.error_rate:
+                self._open(self.cooldown)
+
+    def trip(self, seconds=None):
+        """Open immediately, e.g. for the Retry-After of a rate-limit response"""
+        with self._lock:
+            self._open(max(seconds or 0, self.cooldown))
+
+    def _open(self, seconds):
+        if self.opened_at is None:
+            print(f"🔌 LLM circuit breaker open for {seconds:.0f}s")
+        self.opened_at = time.monotonic()
+        self.open_for = seconds
+        self.trial_running = False
+
+
+def retry_after(error):
+    """Seconds a rate-limit error asks us to wait, if it says"""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Drop-in for the ChatGroq client (invoke/stream) with the guards above"""
+
+    def __init__(self, groq_api_key, model=LLM_MODEL, llm=None):
+        self.max_concurrency = settings.RAG_LLM_MAX_CONCURRENCY
+        if llm is None:
+            import httpx
+            from langchain_groq import ChatGroq
+
+            # One keep-alive pool per process, no larger than the call cap
+            self.http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60,
+                ),
+                timeout=httpx.Timeout(settings.RAG_LLM_TIMEOUT, connect=5.0),
+            )
+            llm = ChatGroq(
+                groq_api_key=groq_api_key,
+                model=model,
+                request_timeout=settings.RAG_LLM_TIMEOUT,
+                # A retry would double the worst-case wait; the breaker handles flakiness
+                max_retries=0,
+                http_client=self.http_client,
+            )
+        self.llm = llm
+        self.breaker = CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {'ok': 0, 'failed': 0, 'rejected_open': 0, 'rejected_busy': 0}
+
+    def _count(self, key, in_flight=0):
+        with self._lock:
+            if key:
+                self.counts[key] += 1
+            self.in_flight += in_flight
+
+    def _acquire(self):
+        if self.breaker.state == 'open':
+            self._count('rejected_open')
+            raise LLMUnavailable('circuit_open', 'LLM circuit breaker is open')
+        if not self._slots.acquire(timeout=settings.RAG_LLM_QUEUE_TIMEOUT):
+            self._count('rejected_busy')
+            raise LLMUnavailable('saturated', 'All LLM slots are busy')
+        if not self.breaker.allow():
+            # Another request is already running the half-open trial
+            self._slots.release()
+            self._count('rejected_open')
+            raise LLMUnavailable('circuit_open', 'LLM circuit breaker is open')
+        self._count(None, in_flight=1)
+
+    def _release(self, error=None):
+        self._slots.release()
+        self._count('failed' if error else 'ok', in_flight=-1)
+        if error is not None and type(error).__name__ == 'RateLimitError':
+            self.breaker.trip(retry_after(error))
+        else:
+            self.breaker.record(error is None)
+
+    def invoke(self, messages):
+        self._acquire()
+        try:
+            response = self.llm.invoke(messages)
+        except Exception as e:
+            self._release(e)
+            raise LLMUnavailable('error', f"LLM call failed: {e}") from e
+        self._release()
+        return response
+
+    def stream(self, messages):
+        """
+        Yield response chunks; the whole stream must finish within
+        RAG_LLM_TIMEOUT. Raises LLMUnavailable (before or during the stream).
+        """
+        self._acquire()
+        deadline = time.monotonic() + settings.RAG_LLM_TIMEOUT
+        error = None
+        try:
+            for chunk in self.llm.stream(messages):
+                yield chunk
+                if time.monotonic() > deadline:
+                    error = TimeoutError(f"LLM stream exceeded {settings.RAG_LLM_TIMEOUT}s")
+                    raise LLMUnavailable('timeout', str(error))
+        except LLMUnavailable:
+            raise
+        except GeneratorExit:
+            # Client went away; not the upstream's fault
+            raise
+        except Exception as e:
+            error = e
+            raise LLMUnavailable('error', f"LLM stream failed: {e}") from e
+        finally:
+            self._release(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.breaker.state,
+                'in_flight': self.in_flight,
+                'max_concurrency': self.max_concurrency,
+                **self.counts,
+            }
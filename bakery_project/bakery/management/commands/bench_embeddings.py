@@ -0,0 +1,88 @@
+"""
+Management command to compare chatbot embedding backends.
+Each backend runs in a fresh interpreter so its resident memory is measured
+on its own; reports model load time, per-query latency and peak RSS.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+import json
+import os
+import subprocess
+import sys
+
+BACKENDS = ('torch', 'onnx')
+
+SCENARIO = """
+import json, resource, sys, time
+import django
+django.setup()
+from bakery.rag_chatbot import load_embedding_model
+from bakery.retrieval_batcher import percentile
+
+start = time.perf_counter()
+model, model_id = load_embedding_model({backend!r})
+load_seconds = time.perf_counter() - start
+
+queries = [f"do you have {{item}} for {{n}} people" for n in range({queries}) for item in
+           ("chocolate cake", "eggless cupcakes", "sourdough bread", "fruit tarts")][:{queries}]
+model.embed_query("warm up")
+latencies = []
+for query in queries:
+    start = time.perf_counter()
+    model.embed_query(query)
+    latencies.append(time.perf_counter() - start)
+start = time.perf_counter()
+model.embed_documents(queries)
+batched = (time.perf_counter() - start) / len(queries)
+
+print(json.dumps({{
+    'model_id': model_id,
+    'load_seconds': round(load_seconds, 2),
+    'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+    'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    'batched_ms_per_query': round(batched * 1000, 2),
+    'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    'torch_loaded': 'torch' in sys.modules,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark query embedding latency and resident memory of the torch and onnx backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=BACKENDS, action='append',
+                            help='Backend to run (default: both)')
+        parser.add_argument('--queries', type=int, default=40)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'bakery_project.settings'
+        ))
+        report = {}
+        for backend in options['backend'] or BACKENDS:
+            result = subprocess.run(
+                [sys.executable, '-c', SCENARIO.format(backend=backend, queries=options['queries'])],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {backend}: {result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'}"
+                ))
+                continue
+            report[backend] = json.loads(result.stdout.strip().splitlines()[-1])
+
+        if not report:
+            raise CommandError('No embedding backend could be loaded')
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for backend, run in report.items():
+            self.stdout.write(
+                f"⏱ {backend:<6} load {run['load_seconds']:.1f}s  query p50 {run['p50_ms']:.1f}ms "
+                f"p99 {run['p99_ms']:.1f}ms  batched {run['batched_ms_per_query']:.1f}ms/query  "
+                f"peak RSS {run['peak_rss_mb']} MB  torch {'loaded' if run['torch_loaded'] else 'not loaded'}"
+            )
+            if backend == 'onnx' and run['model_id'] == settings.RAG_EMBEDDING_MODEL:
+                self.stdout.write(self.style.WARNING('   (onnx fell back to torch)'))
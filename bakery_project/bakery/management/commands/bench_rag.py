@@ -0,0 +1,83 @@
+"""
+Management command to benchmark the RAG chatbot offline.
+Seeds a synthetic corpus into a throwaway database, builds the index with a
+stub LLM in place of Groq, then reports build time, peak RSS, per-query
+embed/search/prompt/answer latency (p50/p95/p99) and recall@k over a
+labelled question set. The run happens in a fresh interpreter so its memory
+is measured on its own; --output writes a JSON report to diff between commits.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+import json
+import os
+import subprocess
+import sys
+
+SCENARIO = """
+import django
+django.setup()
+from bakery.rag_benchmark import main
+main()
+"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark chatbot index build, retrieval latency, memory and recall on a synthetic corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=200)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--questions', type=int, default=50, help='Labelled questions per record type')
+        parser.add_argument('--embedding', choices=('hash', 'model'), default='hash',
+                            help="'hash': deterministic offline embedder; 'model': the configured embedding model")
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        parameters = {
+            'menu_items': options['menu_items'],
+            'users': options['users'],
+            'orders': options['orders'],
+            'questions_per_type': options['questions'],
+            'embedding': options['embedding'],
+            'seed': options['seed'],
+        }
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'bakery_project.settings'
+        ))
+        result = subprocess.run(
+            [sys.executable, '-c', SCENARIO, json.dumps(parameters)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Benchmark failed:\n{result.stderr.strip()[-2000:]}")
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True)
+        report['commit'] = commit.stdout.strip() or None
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+
+        corpus = report['corpus']
+        self.stdout.write(
+            f"📦 {corpus['documents']} documents / {corpus['chunks']} chunks "
+            f"({corpus['orders']} orders, {corpus['payments']} payments, {corpus['menu_items']} menu items)"
+        )
+        self.stdout.write(
+            f"🧠 {report['embedding_model']}, {report['index_kind']} index built in {report['build_seconds']:.1f}s, "
+            f"peak RSS {report['peak_rss_mb']['final']} MB"
+        )
+        for stage, row in report['timings_ms'].items():
+            self.stdout.write(f"   ⏱ {stage:<7} p50 {row['p50']:.2f}ms  p95 {row['p95']:.2f}ms  p99 {row['p99']:.2f}ms")
+        recalls = '  '.join(f"{key} {value:.2f}" for key, value in report['recall'].items())
+        self.stdout.write(f"🎯 {report['questions']} questions  {recalls}")
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Report written to {options['output']}"))
@@ -0,0 +1,72 @@
+"""
+Management command to measure chatbot retrieval recall.
+Builds a fixed question set from the first records of each type (item names,
+order IDs, transaction IDs), then reports recall@1/3/5 and latency for dense
+search, hybrid BM25 + vector search and, if RAG_RERANK_MODEL is set, hybrid
+search with re-ranking.
+"""
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.test import override_settings
+import json
+import time
+
+from bakery.rag_benchmark import labelled_questions
+
+KS = (1, 3, 5)
+
+
+def question_set(per_type=20):
+    """(question, expected doc_id) pairs; deterministic for a given database"""
+    return [(question, expected) for question, expected, _ in labelled_questions(per_type)]
+
+
+class Command(BaseCommand):
+    help = 'Report recall@k of dense vs hybrid (BM25 + vector) chatbot retrieval over a fixed question set'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-type', type=int, default=20, help='Questions per record type')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        from bakery.rag_chatbot import DatabaseRAGChatbot, get_embeddings
+
+        questions = question_set(options['per_type'])
+        if not questions:
+            self.stdout.write(self.style.WARNING('⚠️ No menu items, orders or payments to ask about'))
+            return
+
+        chatbot = DatabaseRAGChatbot(None, use_llm=False)
+        chatbot.initialize()
+        texts = [question for question, _ in questions]
+        embeddings = get_embeddings().embed_queries(texts)
+
+        modes = [('dense', {'RAG_HYBRID_SEARCH': False}),
+                 ('hybrid', {'RAG_HYBRID_SEARCH': True, 'RAG_RERANK_MODEL': ''})]
+        if settings.RAG_RERANK_MODEL:
+            modes.append(('hybrid+rerank', {'RAG_HYBRID_SEARCH': True}))
+
+        report = {}
+        for mode, overrides in modes:
+            with override_settings(**overrides):
+                start = time.perf_counter()
+                results = chatbot.search_many(embeddings, k=max(KS), queries=texts)
+                elapsed = time.perf_counter() - start
+            found = [[doc.metadata.get('doc_id') for doc in docs] for docs in results]
+            report[mode] = {
+                **{
+                    f"recall@{k}": round(
+                        sum(expected in ids[:k] for ids, (_, expected) in zip(found, questions)) / len(questions), 3
+                    )
+                    for k in KS
+                },
+                'ms_per_query': round(elapsed / len(questions) * 1000, 2),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps({'questions': len(questions), 'modes': report}, indent=2))
+            return
+        self.stdout.write(f"📋 {len(questions)} questions")
+        for mode, row in report.items():
+            recalls = '  '.join(f"{key} {row[key]:.2f}" for key in row if key.startswith('recall'))
+            self.stdout.write(f"   {mode:<14} {recalls}  {row['ms_per_query']:.1f} ms/query")
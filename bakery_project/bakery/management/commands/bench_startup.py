@@ -0,0 +1,112 @@
+"""
+Management command to measure web-tier boot cost.
+Each scenario runs in a fresh interpreter and reports import time, peak RSS
+and which heavy ML modules ended up loaded. The web scenario must not pull in
+LangChain / FAISS / torch - those belong to the first chatbot request only.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    'langchain', 'langchain_core', 'langchain_community', 'langchain_huggingface',
+    'langchain_groq', 'langchain_text_splitters', 'faiss', 'torch',
+    'sentence_transformers', 'transformers',
+]
+
+# Boots Django and loads everything a gunicorn worker loads before serving
+WEB_SCENARIO = """
+import django
+django.setup()
+from django.conf import settings
+from django.urls import get_resolver
+from bakery_project.wsgi import application
+get_resolver().url_patterns
+"""
+
+# What the first chatbot request adds on top (imports only, no model weights)
+CHATBOT_SCENARIO = WEB_SCENARIO + """
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_groq import ChatGroq
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+"""
+
+REPORT = """
+import json, resource, sys, time
+_start = time.perf_counter()
+{body}
+_elapsed = time.perf_counter() - _start
+print(json.dumps({{
+    'seconds': _elapsed,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r})),
+}}))
+"""
+
+SCENARIOS = {
+    'web': WEB_SCENARIO,
+    'chatbot': CHATBOT_SCENARIO,
+}
+
+
+def run_scenario(body):
+    """Run `body` in a fresh interpreter and return its measurements"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'bakery_project.settings'
+    ))
+    # Keep apps.ready() from warming up the chatbot in the child
+    env.pop('RUN_MAIN', None)
+    env.pop('WEBSERVER_WORKER', None)
+    result = subprocess.run(
+        [sys.executable, '-c', REPORT.format(body=body, heavy=HEAVY_MODULES)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr else 'scenario failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = 'Measure startup time and peak RSS of the web tier with and without the chatbot stack'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                            help='Scenario to run (default: all)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario; the fastest is reported')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        report = {}
+        for name in options['scenario'] or ['web', 'chatbot']:
+            runs = []
+            for _ in range(max(1, options['repeat'])):
+                try:
+                    runs.append(run_scenario(SCENARIOS[name]))
+                except CommandError as e:
+                    # The chatbot stack is optional on web-only hosts
+                    if name != 'web':
+                        self.stdout.write(self.style.WARNING(f'⚠️ {name}: {e}'))
+                        break
+                    raise
+            if runs:
+                report[name] = min(runs, key=lambda run: run['seconds'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for name, run in report.items():
+                self.stdout.write(
+                    f"⏱ {name:<8} {run['seconds']:.2f}s  peak RSS {run['peak_rss_mb']:.0f} MB  "
+                    f"heavy modules: {', '.join(run['heavy_modules']) or 'none'}"
+                )
+
+        web = report.get('web')
+        if web and web['heavy_modules']:
+            raise CommandError(f"Web tier loaded {', '.join(web['heavy_modules'])} at startup")
+        if web:
+            self.stdout.write(self.style.SUCCESS('✅ Web tier boots without the chatbot stack'))
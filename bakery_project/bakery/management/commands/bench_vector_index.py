@@ -0,0 +1,110 @@
+"""
+Management command to compare the chatbot index types.
+Builds NumPy, flat FAISS and IVF (SQ8 and PQ) indexes over synthetic
+embeddings of several corpus sizes and reports recall@5 against exact search,
+per-query latency and index memory, marking the type auto-selection would pick.
+"""
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import json
+import time
+
+K = 5
+
+
+def synthetic_vectors(n, d, rng, clusters=64):
+    """Unit vectors around a few dozen topics, roughly like chunk embeddings"""
+    import numpy as np
+
+    centers = rng.standard_normal((clusters, d)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, d)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def index_memory_bytes(index):
+    import faiss
+    from bakery.vector_index import NumpyIndex
+
+    if isinstance(index, NumpyIndex):
+        return index.vectors.nbytes + index._norms.nbytes
+    return len(faiss.serialize_index(index))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark recall@5, latency and memory of the numpy / flat / ivf chatbot indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,20000,100000',
+                            help='Comma-separated corpus sizes (chunks)')
+        parser.add_argument('--dim', type=int, default=384, help='Embedding dimension (MiniLM: 384)')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--codecs', default='sq8,pq48', help='Comma-separated IVF codecs to compare')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        import faiss
+        import numpy as np
+        from bakery.retrieval_batcher import percentile
+        from bakery.vector_index import NumpyIndex, build_ivf, select_index_kind
+
+        rng = np.random.default_rng(42)
+        report = []
+        for size in [int(s) for s in options['sizes'].split(',')]:
+            vectors = synthetic_vectors(size + options['queries'], options['dim'], rng)
+            corpus, queries = vectors[:size], vectors[size:]
+
+            flat = faiss.IndexFlatL2(options['dim'])
+            flat.add(corpus)
+            _, truth = flat.search(queries, K)
+
+            variants = ['numpy', 'flat'] + [f"ivf-{codec}" for codec in options['codecs'].split(',')]
+            for variant in variants:
+                kind = variant.split('-')[0]
+                start = time.perf_counter()
+                if kind == 'numpy':
+                    index = NumpyIndex(options['dim'], corpus)
+                elif kind == 'flat':
+                    index = flat
+                else:
+                    index = build_ivf(flat, codec=variant.split('-')[1])
+                    index.nprobe = settings.RAG_INDEX_NPROBE
+                build_seconds = time.perf_counter() - start
+
+                latencies = []
+                found = []
+                for query in queries:
+                    start = time.perf_counter()
+                    _, ids = index.search(query[None, :], K)
+                    latencies.append(time.perf_counter() - start)
+                    found.append(ids[0])
+                start = time.perf_counter()
+                index.search(queries, K)
+                batched = (time.perf_counter() - start) / len(queries)
+
+                recall = np.mean([len(set(got) & set(want)) / K for got, want in zip(found, truth)])
+                report.append({
+                    'chunks': size,
+                    'kind': variant,
+                    'auto_selected': select_index_kind(size) == kind and (
+                        kind != 'ivf' or variant == f"ivf-{settings.RAG_INDEX_IVF_CODEC}"
+                    ),
+                    'recall_at_5': round(float(recall), 4),
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                    'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                    'batched_ms_per_query': round(batched * 1000, 3),
+                    'memory_mb': round(index_memory_bytes(index) / 2**20, 2),
+                    'build_seconds': round(build_seconds, 2),
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'chunks':>8} {'kind':<9} {'recall@5':>8} {'p50 ms':>8} {'p99 ms':>8} "
+                          f"{'batch ms':>8} {'MB':>8} {'build s':>8}")
+        for row in report:
+            self.stdout.write(
+                f"{row['chunks']:>8} {row['kind']:<9} {row['recall_at_5']:>8.3f} {row['p50_ms']:>8.3f} "
+                f"{row['p99_ms']:>8.3f} {row['batched_ms_per_query']:>8.3f} {row['memory_mb']:>8.1f} "
+                f"{row['build_seconds']:>8.2f}{'  ← auto' if row['auto_selected'] else ''}"
+            )
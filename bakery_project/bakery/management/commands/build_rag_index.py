@@ -0,0 +1,22 @@
+"""
+Management command to build (or verify) the persisted chatbot index.
+Run it at deploy time so gunicorn workers only have to memory-map the artifact.
+"""
+from django.core.management.base import BaseCommand
+import time
+
+
+class Command(BaseCommand):
+    help = 'Build the persisted RAG chatbot index for the current database contents'
+
+    def handle(self, *args, **options):
+        from bakery.rag_chatbot import load_or_build_vectorstore, get_index_path
+
+        start = time.perf_counter()
+        vectorstore, content_hash = load_or_build_vectorstore()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Index {content_hash[:16]} ready ({vectorstore.index.ntotal} vectors) in {elapsed:.1f}s'
+        ))
+        self.stdout.write(f'   Path: {get_index_path(content_hash)}')
@@ -1,9 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from bakery.models import MenuItem, Order, OrderItem, Payment, UserProfile
+from bakery.order_ids import new_order_id, new_transaction_id
 from django.utils import timezone
 from decimal import Decimal
-import uuid
 
 
 class Command(BaseCommand):
@@ -104,7 +104,7 @@ class Command(BaseCommand):
             # Order 1 - Current order (confirmed)
             order1 = Order.objects.create(
                 user=test_user,
-                order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+                order_id=new_order_id(),
                 total_amount=Decimal('35.48'),
                 delivery_fee=Decimal('50.00'),
                 status='confirmed',
@@ -133,7 +133,7 @@ class Command(BaseCommand):
                 order=order1,
                 payment_method='upi',
                 payment_status='completed',
-                transaction_id=f"TXN-{uuid.uuid4().hex[:12].upper()}",
+                transaction_id=new_transaction_id(),
                 amount=order1.grand_total,
                 upi_id='test@upi'
             )
@@ -141,7 +141,7 @@ class Command(BaseCommand):
             # Order 2 - Current order (preparing)
             order2 = Order.objects.create(
                 user=test_user,
-                order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+                order_id=new_order_id(),
                 total_amount=Decimal('18.48'),
                 delivery_fee=Decimal('50.00'),
                 status='preparing',
@@ -168,7 +168,7 @@ class Command(BaseCommand):
                 order=order2,
                 payment_method='upi',
                 payment_status='pending',
-                transaction_id=f"TXN-{uuid.uuid4().hex[:12].upper()}",
+                transaction_id=new_transaction_id(),
                 amount=order2.grand_total,
                 upi_id='test@upi'
             )
@@ -176,7 +176,7 @@ class Command(BaseCommand):
             # Order 3 - Delivered order (history)
             order3 = Order.objects.create(
                 user=test_user,
-                order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+                order_id=new_order_id(),
                 total_amount=Decimal('12.24'),
                 delivery_fee=Decimal('50.00'),
                 status='delivered',
@@ -204,7 +204,7 @@ class Command(BaseCommand):
                 order=order3,
                 payment_method='upi',
                 payment_status='completed',
-                transaction_id=f"TXN-{uuid.uuid4().hex[:12].upper()}",
+                transaction_id=new_transaction_id(),
                 amount=order3.grand_total,
                 upi_id='test@upi'
             )
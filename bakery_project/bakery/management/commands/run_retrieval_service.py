@@ -0,0 +1,36 @@
+"""
+Management command to run the local retrieval sidecar.
+Loads the embedding model and index once and serves embed/search calls to
+every gunicorn worker over a Unix socket (see RAG_SIDECAR_SOCKET).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+
+class Command(BaseCommand):
+    help = 'Serve chatbot embedding and vector search to the web workers over a Unix socket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.RAG_SIDECAR_SOCKET,
+                            help='Unix socket path (default: RAG_SIDECAR_SOCKET)')
+
+    def handle(self, *args, **options):
+        from bakery.rag_chatbot import DatabaseRAGChatbot
+        from bakery.retrieval_service import RetrievalServer
+
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError('Pass --socket or set RAG_SIDECAR_SOCKET')
+
+        chatbot = DatabaseRAGChatbot(None, use_llm=False)
+        chatbot.initialize()
+        chatbot.start_index_updater()
+
+        server = RetrievalServer(socket_path, chatbot)
+        self.stdout.write(self.style.SUCCESS(f'✅ Retrieval service listening on {socket_path}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('👋 Stopping retrieval service...')
+        finally:
+            server.server_close()
@@ -0,0 +1,284 @@
+"""
+In-memory menu search for the chatbot order flow.
+
+Each process keeps an index of the available menu items: word tokens,
+character trigrams and space-free names. A search ranks exact, prefix,
+substring and typo-tolerant (trigram) matches in one lookup, without touching
+the database. A prefix trie over item names and category labels serves
+typeahead suggestions, ranked by recent order volume.
+
+MenuItem saves/deletes bump a version stamp in the shared 'chatbot' cache; a
+process rebuilds its index (two queries) when the stamp it built from is
+stale, or after CHATBOT_MENU_INDEX_MAX_AGE seconds in case the menu changed
+without signals (e.g. queryset.update()) and to pick up new order volumes.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Sum
+from django.utils import timezone
+
+VERSION_KEY = 'chatbot-menu-version'
+# Minimum trigram similarity for a typo-tolerant match
+MIN_SIMILARITY = 0.3
+
+# Match tiers, best first
+EXACT, PREFIX, SUBSTRING, DETAILS, FUZZY = 5, 4, 3, 2, 1
+
+
+def normalize(text):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', (text or '').lower()).split())
+
+
+def compact(text):
+    """Normalised text without spaces, so "cup cake" matches "Cupcake" """
+    return normalize(text).replace(' ', '')
+
+
+def trigrams(text):
+    padded = f"  {compact(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class PrefixTrie:
+    """
+    Character trie whose every node keeps its best `size` suggestions, so a
+    lookup costs one step per prefix character. Keys are compact() strings.
+    """
+
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+    def insert(self, key, rank, suggestion_id):
+        """Offer `suggestion_id` to every node along `key`; lower rank is better"""
+        node = self
+        node.top.append((rank, suggestion_id))
+        for char in key:
+            node = node.children.setdefault(char, PrefixTrie())
+            node.top.append((rank, suggestion_id))
+
+    def finish(self, size):
+        """Keep each node's `size` best suggestions, one entry per suggestion"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            best = {}
+            for rank, suggestion_id in sorted(node.top):
+                best.setdefault(suggestion_id, rank)
+                if len(best) == size:
+                    break
+            node.top = list(best)
+            stack.extend(node.children.values())
+
+    def lookup(self, prefix):
+        node = self
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top
+
+
+class MenuSearchIndex:
+    """Token and trigram index, and suggestion trie, over a list of menu item dicts"""
+
+    def __init__(self, items, popularity=None, suggestions=None):
+        from .models import MenuItem
+
+        # The whole menu, unavailable items included, as unsaved model
+        # instances for the chatbot intent router
+        self.menu = sorted((MenuItem(**item) for item in items), key=lambda item: (item.category, item.name))
+        # Search and suggestions only cover available items
+        self.items = {
+            item['id']: {key: value for key, value in item.items() if key != 'available'}
+            for item in items if item.get('available', True)
+        }
+        # Recent order volume by item ID
+        self.popularity = popularity or {}
+        self.names = {}
+        self.name_grams = {}
+        self.name_words = {}
+        self.word_grams = {}
+        self.detail_words = {}
+        # token -> item IDs (name, category and description words), and a
+        # sorted vocabulary for prefix lookups
+        self.tokens = defaultdict(set)
+        self.grams = defaultdict(set)
+        for item_id, item in self.items.items():
+            self.names[item_id] = compact(item['name'])
+            self.name_grams[item_id] = trigrams(item['name'])
+            self.name_words[item_id] = set(normalize(item['name']).split())
+            self.word_grams[item_id] = [trigrams(word) for word in self.name_words[item_id]] or [set()]
+            self.detail_words[item_id] = set(normalize(f"{item['category']} {item['description']}").split())
+            for token in self.name_words[item_id] | self.detail_words[item_id]:
+                self.tokens[token].add(item_id)
+            for gram in self.name_grams[item_id]:
+                self.grams[gram].add(item_id)
+        self.vocabulary = sorted(self.tokens)
+        self._build_suggestions(suggestions or settings.CHATBOT_AUTOCOMPLETE_LIMIT)
+        # Identifies the indexed content; the same menu gives the same stamp in every worker
+        self.stamp = hashlib.sha1(json.dumps(
+            [items, sorted(self.popularity.items())], default=str
+        ).encode('utf-8')).hexdigest()[:20]
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build_suggestions(self, size):
+        from .models import MenuItem
+
+        labels = dict(MenuItem.CATEGORY_CHOICES)
+        self.suggestions = {}
+        self.trie = PrefixTrie()
+        category_volume = defaultdict(int)
+        for item_id, item in self.items.items():
+            category_volume[item['category']] += self.popularity.get(item_id, 0)
+
+        def add(suggestion_id, label, volume, suggestion):
+            self.suggestions[suggestion_id] = suggestion
+            words = normalize(label).split()
+            # Whole-label matches first, then matches on a later word ("cake" -> "Chocolate Cake");
+            # within each, most ordered first
+            for position in range(len(words)):
+                self.trie.insert(''.join(words[position:]), (position > 0, -volume, label), suggestion_id)
+
+        for item_id, item in self.items.items():
+            add(('item', item_id), item['name'], self.popularity.get(item_id, 0), {
+                'type': 'item',
+                'id': item_id,
+                'name': item['name'],
+                'category': item['category'],
+                'price': float(item['price']),
+            })
+        for category, volume in category_volume.items():
+            label = labels.get(category, category)
+            add(('category', category), label, volume, {
+                'type': 'category',
+                'category': category,
+                'name': label,
+            })
+        self.trie.finish(size)
+
+    def suggest(self, prefix, limit=None):
+        """Typeahead suggestions for `prefix`, best first"""
+        found = self.trie.lookup(compact(prefix))
+        return [self.suggestions[suggestion_id] for suggestion_id in found[:limit]]
+
+    def _with_prefix(self, prefix):
+        """IDs of items with any word starting with `prefix`"""
+        ids = set()
+        for position in range(bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            token = self.vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            ids |= self.tokens[token]
+        return ids
+
+    def search(self, query, limit=5):
+        """Up to `limit` item dicts, best match first"""
+        words = normalize(query).split()
+        needle = ''.join(words)
+        if not needle:
+            return []
+
+        # Candidates: items with a word starting with a query word, or sharing a trigram
+        query_grams = trigrams(query)
+        word_grams = {word: trigrams(word) for word in words}
+        candidates = set().union(*(self.grams.get(gram, ()) for gram in query_grams))
+        for word in words:
+            candidates |= self._with_prefix(word)
+
+        def prefixes(word, tokens):
+            return any(token.startswith(word) for token in tokens)
+
+        ranked = []
+        for item_id in candidates:
+            name = self.names[item_id]
+            # Typo tolerance: whole-name trigram overlap, or word-by-word for
+            # queries naming only part of a long name ("velvt" -> "Red Velvet Cake")
+            similarity = max(jaccard(self.name_grams[item_id], query_grams), sum(
+                max(jaccard(grams, word_grams[word]) for grams in self.word_grams[item_id]) for word in words
+            ) / len(words))
+            if name == needle:
+                tier = EXACT
+            elif name.startswith(needle) or all(prefixes(word, self.name_words[item_id]) for word in words):
+                tier = PREFIX
+            elif needle in name or (len(name) > 2 and name in needle):
+                tier = SUBSTRING
+            elif all(prefixes(word, self.name_words[item_id] | self.detail_words[item_id]) for word in words):
+                tier = DETAILS
+            elif similarity >= MIN_SIMILARITY:
+                tier = FUZZY
+            else:
+                continue
+            ranked.append((-tier, -similarity, self.items[item_id]['name'], item_id))
+        ranked.sort()
+        return [self.items[item_id] for *_, item_id in ranked[:limit]]
+
+
+_index = None
+_index_version = None
+_index_built = 0.0
+_index_lock = threading.Lock()
+
+
+def menu_version():
+    return caches['chatbot'].get(VERSION_KEY)
+
+
+def bump_menu_version():
+    """Mark every process's menu index stale (called when a MenuItem changes)"""
+    caches['chatbot'].set(VERSION_KEY, time.time_ns(), None)
+
+
+def recent_order_volume():
+    """{menu item ID: quantity ordered} over the last CHATBOT_AUTOCOMPLETE_POPULARITY_DAYS"""
+    from .models import OrderItem
+
+    since = timezone.now() - timedelta(days=settings.CHATBOT_AUTOCOMPLETE_POPULARITY_DAYS)
+    volumes = (
+        OrderItem.objects.filter(order__created_at__gte=since)
+        .exclude(order__status='cancelled')
+        .values('menu_item').annotate(volume=Sum('quantity'))
+    )
+    return {row['menu_item']: row['volume'] for row in volumes}
+
+
+def get_menu_index():
+    """This process's menu index, rebuilt if the menu changed since it was built"""
+    global _index, _index_version, _index_built
+    version = menu_version()
+    if _index is not None and version == _index_version and \
+            time.monotonic() - _index_built < settings.CHATBOT_MENU_INDEX_MAX_AGE:
+        return _index
+    with _index_lock:
+        if _index is None or version != _index_version or \
+                time.monotonic() - _index_built >= settings.CHATBOT_MENU_INDEX_MAX_AGE:
+            from .models import MenuItem
+
+            items = list(MenuItem.objects.order_by('pk').values(
+                'id', 'name', 'description', 'price', 'category', 'image_url', 'available'
+            ))
+            _index = MenuSearchIndex(items, recent_order_volume())
+            _index_version = version
+            _index_built = time.monotonic()
+    return _index
+
+
+def search_menu(query, limit=5):
+    return get_menu_index().search(query, limit)
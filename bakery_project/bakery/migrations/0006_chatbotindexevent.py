@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bakery', '0005_table_rename_delivered_at_order_completed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatbotIndexEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_id', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['created_at'], name='bakery_chat_created_898adf_idx')],
+            },
+        ),
+    ]
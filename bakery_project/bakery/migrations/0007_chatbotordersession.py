@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bakery', '0006_chatbotindexevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatbotOrderSession',
+            fields=[
+                ('session_id', models.CharField(max_length=36, primary_key=True, serialize=False)),
+                ('data', models.TextField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
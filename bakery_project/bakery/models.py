@@ -215,4 +215,38 @@ class UserProfile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Profile - {self.user.username}"
\ No newline at end of file
+        return f"Profile - {self.user.username}"
+
+class ChatbotIndexEvent(models.Model):
+    """Change log of records whose chatbot index documents must be re-embedded"""
+    doc_id = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['created_at'])]
+    
+    def __str__(self):
+        return f"Index event {self.id} - {self.doc_id}"
+    
+    @staticmethod
+    def doc_id_for(model_name, pk):
+        """Stable chatbot document ID for a database record, e.g. 'order:42'"""
+        return f"{model_name}:{pk}"
+    
+    @classmethod
+    def mark_dirty(cls, *doc_ids):
+        """Queue documents for re-embedding by the incremental indexer"""
+        cls.objects.bulk_create([cls(doc_id=doc_id) for doc_id in doc_ids])
+
+
+class ChatbotOrderSession(models.Model):
+    """State of a multi-step chatbot order, shared by every worker (see bakery.order_sessions)"""
+    session_id = models.CharField(max_length=36, primary_key=True)
+    # Compact JSON of the order-in-progress
+    data = models.TextField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Order session {self.session_id}"
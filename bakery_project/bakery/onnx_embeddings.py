@@ -0,0 +1,82 @@
+"""
+int8-quantized ONNX embedding backend for the RAG chatbot.
+
+Runs the sentence-transformers ONNX export of the embedding model through
+onnxruntime: no torch import, a fraction of the resident memory and faster
+CPU inference. Pooling and normalisation follow the sentence-transformers
+pipeline of all-MiniLM-L6-v2 (mean pooling over the attention mask, then L2
+normalisation), so vectors match the PyTorch backend to within quantization
+error (see OnnxEmbeddingParityTestCase).
+"""
+import os
+
+import numpy as np
+from django.conf import settings
+from langchain_core.embeddings import Embeddings
+
+
+def resolve_model_file(model_name, filename):
+    """Local path of `filename`, downloading it from the model's hub repo if needed"""
+    if os.path.isabs(filename):
+        return filename
+    from huggingface_hub import hf_hub_download
+
+    return hf_hub_download(model_name, filename)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings from an ONNX model via onnxruntime"""
+
+    def __init__(self, model_path, tokenizer_path, max_length=256, threads=0, batch_size=32):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token='[PAD]')
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_settings(cls):
+        model_name = settings.RAG_EMBEDDING_MODEL
+        return cls(
+            resolve_model_file(model_name, settings.RAG_ONNX_MODEL_FILE),
+            resolve_model_file(model_name, settings.RAG_ONNX_TOKENIZER_FILE),
+            threads=settings.RAG_ONNX_THREADS,
+        )
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'token_type_ids': np.zeros_like(input_ids),
+        }
+        token_embeddings = self.session.run(
+            None, {name: value for name, value in inputs.items() if name in self.input_names}
+        )[0]
+
+        # Mean pooling over real tokens, then L2 normalisation
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(list(texts[i:i + self.batch_size])).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed_batch([text])[0].tolist()
@@ -0,0 +1,100 @@
+"""
+Cart handling for the chatbot order flow.
+
+A chatbot order session holds a cart of {menu item ID: quantity}. Lines are
+priced together with a single MenuItem IN-query, and checkout turns the whole
+cart into one Order, its OrderItems (one bulk insert) and one Razorpay order.
+"""
+from decimal import Decimal
+
+from .models import MenuItem
+
+DELIVERY_FEE = Decimal('50.00')
+MAX_QUANTITY = 50
+
+
+class CartError(ValueError):
+    """The requested cart change is invalid"""
+
+
+class ItemUnavailable(CartError):
+    """A cart item does not exist or is not available"""
+
+
+def parse_lines(data):
+    """
+    Requested cart lines as {item_id: quantity}, from either
+    {"items": [{"item_id": 1, "quantity": 2}, ...]} or the single-item
+    {"item_id": 1, "quantity": 2} form. Quantity 0 means "remove".
+    """
+    raw = data.get('items')
+    if raw is None:
+        raw = [{'item_id': data.get('item_id'), 'quantity': data.get('quantity', 1)}]
+    if not isinstance(raw, list) or not raw:
+        raise CartError("Please choose at least one item.")
+
+    lines = {}
+    for line in raw:
+        try:
+            item_id = int(line['item_id'])
+            quantity = int(line.get('quantity', 1))
+        except (KeyError, TypeError, ValueError):
+            raise CartError("Each item needs a valid item_id and quantity.")
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise CartError(f"Quantity must be between 0 and {MAX_QUANTITY}.")
+        lines[item_id] = quantity
+    return lines
+
+
+def apply_lines(cart, lines):
+    """Cart with `lines` added or updated (quantity 0 removes the line)"""
+    cart = dict(cart)
+    for item_id, quantity in lines.items():
+        if quantity:
+            cart[item_id] = quantity
+        else:
+            cart.pop(item_id, None)
+    return cart
+
+
+def price_cart(cart):
+    """
+    Price every line with one query. Returns (menu items by ID, summary dict);
+    raises CartError if the cart is empty or an item is unavailable.
+    """
+    if not cart:
+        raise CartError("Your cart is empty.")
+    items = {item.id: item for item in MenuItem.objects.filter(id__in=cart, available=True).only('id', 'name', 'price')}
+    missing = [item_id for item_id in cart if item_id not in items]
+    if missing:
+        if len(cart) == 1:
+            raise ItemUnavailable("This item is not available.")
+        raise ItemUnavailable("Some items are not available (item IDs " + ", ".join(map(str, missing)) + ").")
+
+    lines = [
+        {
+            'item_id': item_id,
+            'name': items[item_id].name,
+            'quantity': quantity,
+            'price': float(items[item_id].price),
+            'subtotal': float(items[item_id].price * quantity),
+        }
+        for item_id, quantity in cart.items()
+    ]
+    item_total = sum((items[item_id].price * quantity for item_id, quantity in cart.items()), Decimal('0'))
+    description = ", ".join(f"{line['quantity']}x {line['name']}" for line in lines)
+    return items, {
+        'items': lines,
+        'description': description,
+        # Single-line summary fields the chat widget displays
+        'item_name': description if len(lines) > 1 else lines[0]['name'],
+        'quantity': sum(cart.values()),
+        'item_total': float(item_total),
+        'delivery_fee': float(DELIVERY_FEE),
+        'grand_total': float(item_total + DELIVERY_FEE),
+    }
+
+
+def cart_from_session(session_data):
+    """{item_id: quantity} of the priced lines stored in an order session"""
+    return {line['item_id']: line['quantity'] for line in session_data.get('items', [])}
@@ -0,0 +1,107 @@
+"""
+Time-ordered order and transaction IDs, e.g. "ORD-01JAB3XYZ9K2M7Q4T0".
+
+Layout (ULID/Snowflake-style, 88 bits as 18 Crockford base32 characters):
+48-bit millisecond timestamp | 28-bit process node | 12-bit sequence.
+
+- IDs from one process are strictly increasing: the sequence counts up within
+  a millisecond (4096 IDs, then it borrows the next one), and a clock that
+  steps backwards is ignored.
+- IDs sort by creation time as plain strings, so new rows land at the end of
+  the unique index instead of at random positions.
+- IDs do not collide across processes: the node is ORDER_ID_HOST (6 bits)
+  followed by the process ID (22 bits; Linux PIDs are below 2**22). No two
+  running processes on a host share a PID, and every forked gunicorn worker
+  takes its own. Hosts writing to the same database need distinct
+  ORDER_ID_HOST values.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+# Crockford's base32 alphabet is in ASCII order, so encoded IDs sort like the numbers
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+HOST_BITS = 6
+PID_BITS = 22
+NODE_BITS = HOST_BITS + PID_BITS
+SEQUENCE_BITS = 12
+LENGTH = 18
+
+
+def encode(number, length=LENGTH):
+    chars = []
+    for _ in range(length):
+        number, digit = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    number = 0
+    for char in text.upper():
+        number = number * 32 + ALPHABET.index(char)
+    return number
+
+
+def process_node():
+    """This process's node: ORDER_ID_HOST, then the PID"""
+    host = settings.ORDER_ID_HOST
+    if not 0 <= host < 1 << HOST_BITS:
+        raise ValueError(f"ORDER_ID_HOST must be between 0 and {(1 << HOST_BITS) - 1}, got {host}")
+    pid = os.getpid()
+    if pid >> PID_BITS:
+        raise ValueError(f"PID {pid} does not fit in {PID_BITS} bits")
+    return (host << PID_BITS) | pid
+
+
+class IdGenerator:
+    """Monotonic ID source for one process; thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.node = process_node()
+        self.last_ms = 0
+        self.sequence = 0
+
+    def next(self):
+        with self._lock:
+            now = time.time_ns() // 1_000_000
+            if now > self.last_ms:
+                self.last_ms = now
+                self.sequence = 0
+            else:
+                # Same millisecond, or the clock went backwards
+                self.sequence += 1
+                if self.sequence >> SEQUENCE_BITS:
+                    self.last_ms += 1
+                    self.sequence = 0
+            return (self.last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self.sequence
+
+
+_generator = IdGenerator()
+# Forked workers must not share the parent's node and sequence
+os.register_at_fork(after_in_child=_generator._reset)
+
+
+def new_id(prefix):
+    return f"{prefix}-{encode(_generator.next())}"
+
+
+def new_order_id():
+    return new_id('ORD')
+
+
+def new_transaction_id():
+    return new_id('TXN')
+
+
+def id_created_at(value):
+    """When an ID from new_id() was generated"""
+    milliseconds = decode(value.rsplit('-', 1)[-1]) >> (NODE_BITS + SEQUENCE_BITS)
+    return datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc)
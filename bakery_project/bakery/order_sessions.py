@@ -0,0 +1,236 @@
+"""
+Shared storage for multi-step chatbot orders (initiate -> address -> create).
+
+Each step can land on a different gunicorn worker or host, so the order in
+progress lives in the database (ChatbotOrderSession) or the shared
+'order_sessions' cache instead of process memory; CHATBOT_ORDER_SESSION_STORE
+picks which. That cache alias holds nothing else, so answer-cache churn cannot
+cull live orders.
+Sessions expire CHATBOT_ORDER_SESSION_TTL seconds after their last update, at
+most CHATBOT_ORDER_SESSION_MAX are kept (oldest evicted first), and a
+background sweeper removes expired ones every
+CHATBOT_ORDER_SESSION_SWEEP_INTERVAL seconds.
+"""
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+def dumps(data):
+    """Compact JSON: no whitespace, None values dropped"""
+    return json.dumps(
+        {key: value for key, value in data.items() if value is not None},
+        separators=(',', ':'), ensure_ascii=False, default=str,
+    )
+
+
+def loads(raw):
+    return json.loads(raw)
+
+
+# Backends that drop arbitrary entries once they hold more than MAX_ENTRIES
+CULLING_BACKENDS = (DatabaseCache, FileBasedCache, LocMemCache)
+
+
+class OrderSessionStore(ABC):
+    """Base class: create/get/save/delete sessions keyed by a UUID string"""
+
+    def __init__(self, ttl=None, max_sessions=None):
+        self.ttl = ttl or settings.CHATBOT_ORDER_SESSION_TTL
+        self.max_sessions = max_sessions or settings.CHATBOT_ORDER_SESSION_MAX
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+
+    def create(self, data):
+        """Store a new session and return its ID"""
+        self.start_sweeper()
+        session_id = str(uuid.uuid4())
+        self._evict_for_new_session()
+        self.save(session_id, data)
+        return session_id
+
+    @abstractmethod
+    def get(self, session_id):
+        """The session's data, or None if it does not exist or has expired"""
+
+    @abstractmethod
+    def save(self, session_id, data):
+        """Store `data`, restarting the session's TTL"""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Remove the session"""
+
+    @abstractmethod
+    def sweep(self):
+        """Remove expired sessions; returns how many were removed"""
+
+    @abstractmethod
+    def _evict_for_new_session(self):
+        """Make room so that at most max_sessions remain after one more is added"""
+
+    def start_sweeper(self, interval=None):
+        """Sweep expired sessions in a background thread (once per process)"""
+        if self._sweeper is not None:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is not None:
+                return
+            interval = interval or settings.CHATBOT_ORDER_SESSION_SWEEP_INTERVAL
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        removed = self.sweep()
+                        if removed:
+                            print(f"🧹 Removed {removed} expired chatbot order sessions")
+                    except Exception as e:
+                        print(f"⚠️ Order session sweep failed: {e}")
+                    finally:
+                        close_old_connections()
+
+            self._sweeper = threading.Thread(target=run, name='order-session-sweeper', daemon=True)
+            self._sweeper.start()
+
+
+class DatabaseOrderSessionStore(OrderSessionStore):
+    """Sessions as ChatbotOrderSession rows; works across hosts"""
+
+    @property
+    def model(self):
+        from .models import ChatbotOrderSession
+
+        return ChatbotOrderSession
+
+    def get(self, session_id):
+        row = self.model.objects.filter(session_id=session_id, expires_at__gt=timezone.now()).first()
+        return loads(row.data) if row else None
+
+    def save(self, session_id, data):
+        self.model.objects.update_or_create(
+            session_id=session_id,
+            defaults={'data': dumps(data), 'expires_at': timezone.now() + timedelta(seconds=self.ttl)},
+        )
+
+    def delete(self, session_id):
+        self.model.objects.filter(session_id=session_id).delete()
+
+    def sweep(self):
+        removed, _ = self.model.objects.filter(expires_at__lte=timezone.now()).delete()
+        return removed
+
+    def _evict_for_new_session(self):
+        live = self.model.objects.filter(expires_at__gt=timezone.now())
+        excess = live.count() - self.max_sessions + 1
+        if excess > 0:
+            oldest = list(live.order_by('expires_at').values_list('session_id', flat=True)[:excess])
+            self.model.objects.filter(session_id__in=oldest).delete()
+
+
+class CacheOrderSessionStore(OrderSessionStore):
+    """
+    Sessions in a Django cache alias, which expires them itself. A small
+    index of {session_id: expiry} in the same cache enforces the cap and lets
+    the sweeper delete expired entries from backends that only evict on
+    access (e.g. the file-based cache). Index updates from different workers
+    can race; a lost entry only means that session is left to its TTL.
+
+    Backends that cull (file, local-memory and database caches) must have
+    MAX_ENTRIES of at least twice max_sessions, leaving room for the index and
+    for expired sessions awaiting the sweeper; otherwise culling could drop
+    live orders and the store refuses to start.
+    """
+
+    INDEX_KEY = 'chatbot-order-sessions'
+
+    def __init__(self, alias='order_sessions', **kwargs):
+        super().__init__(**kwargs)
+        self.alias = alias
+        self._lock = threading.Lock()
+        cache = self.cache
+        if isinstance(cache, CULLING_BACKENDS) and cache._max_entries < 2 * self.max_sessions:
+            raise ImproperlyConfigured(
+                f"Cache alias {alias!r} culls at MAX_ENTRIES={cache._max_entries}, which could drop live "
+                f"order sessions; give it MAX_ENTRIES of at least {2 * self.max_sessions} "
+                f"(twice CHATBOT_ORDER_SESSION_MAX) or use a Redis/Memcached backend"
+            )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, session_id):
+        return f"chatbot-order-session:{session_id}"
+
+    def get(self, session_id):
+        raw = self.cache.get(self._key(session_id))
+        return loads(raw) if raw is not None else None
+
+    def save(self, session_id, data):
+        self.cache.set(self._key(session_id), dumps(data), self.ttl)
+        with self._lock:
+            index = self.cache.get(self.INDEX_KEY) or {}
+            index[session_id] = time.time() + self.ttl
+            self.cache.set(self.INDEX_KEY, index, None)
+
+    def delete(self, session_id):
+        self.cache.delete(self._key(session_id))
+        with self._lock:
+            index = self.cache.get(self.INDEX_KEY) or {}
+            if index.pop(session_id, None) is not None:
+                self.cache.set(self.INDEX_KEY, index, None)
+
+    def _drop(self, index, session_ids):
+        for session_id in session_ids:
+            index.pop(session_id, None)
+        self.cache.delete_many([self._key(session_id) for session_id in session_ids])
+
+    def sweep(self):
+        with self._lock:
+            index = self.cache.get(self.INDEX_KEY) or {}
+            now = time.time()
+            expired = [session_id for session_id, expires in index.items() if expires <= now]
+            if expired:
+                self._drop(index, expired)
+                self.cache.set(self.INDEX_KEY, index, None)
+            return len(expired)
+
+    def _evict_for_new_session(self):
+        with self._lock:
+            index = self.cache.get(self.INDEX_KEY) or {}
+            now = time.time()
+            stale = [session_id for session_id, expires in index.items() if expires <= now]
+            live = sorted((expires, session_id) for session_id, expires in index.items() if expires > now)
+            excess = len(live) - self.max_sessions + 1
+            stale.extend(session_id for _, session_id in live[:max(excess, 0)])
+            if stale:
+                self._drop(index, stale)
+                self.cache.set(self.INDEX_KEY, index, None)
+
+
+STORES = {
+    'db': DatabaseOrderSessionStore,
+    'cache': CacheOrderSessionStore,
+}
+
+
+def get_order_session_store(kind=None):
+    """The store selected by CHATBOT_ORDER_SESSION_STORE ('db' or 'cache')"""
+    kind = kind or settings.CHATBOT_ORDER_SESSION_STORE
+    try:
+        return STORES[kind]()
+    except KeyError:
+        raise ValueError(f"Unknown CHATBOT_ORDER_SESSION_STORE {kind!r}; expected one of {sorted(STORES)}")
@@ -0,0 +1,156 @@
+"""
+Partitioned retrieval for the RAG chatbot.
+
+Chunks are grouped into a shared partition (menu items, bakery info) and one
+partition per customer (their orders, payments, profile and account). A query
+only searches the shared partition plus the asking user's own partition, so
+other customers' records never reach the prompt and the search space is a few
+hundred vectors instead of the whole archive.
+
+The vector store keeps owning the vectors; a partition's vectors are copied
+into a small NumPy matrix the first time it is searched and kept in an LRU
+cache (the shared partition is always cached) until its chunks change.
+"""
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+from django.conf import settings
+
+SHARED = 'shared'
+SHARED_TYPES = {'menuitem', 'info'}
+
+
+def partition_for(metadata):
+    """Partition key for a chunk; None for records nobody may retrieve (guest orders)"""
+    if metadata.get('type') in SHARED_TYPES:
+        return SHARED
+    if metadata.get('user_id'):
+        return f"user:{metadata['user_id']}"
+    return None
+
+
+def partitions_for_user(user_id):
+    """Partitions a user's queries search: shared data plus their own records"""
+    return [SHARED, f"user:{user_id}"] if user_id else [SHARED]
+
+
+def reconstruct_rows(index, positions):
+    """Vectors stored at `positions` (labels) of a FAISS or NumPy index"""
+    from bakery.vector_index import NumpyIndex
+
+    if isinstance(index, NumpyIndex):
+        return index.vectors[positions]
+    if not len(positions):
+        return np.empty((0, index.d), dtype=np.float32)
+    import faiss
+
+    if isinstance(index, faiss.IndexIVF):
+        # A hashtable direct map (not make_direct_map()'s array) keeps remove_ids working
+        from bakery.vector_index import enable_id_lookup
+
+        enable_id_lookup(index)
+    return np.vstack([index.reconstruct(int(position)) for position in positions])
+
+
+class PartitionMap:
+    """Which chunks belong to which partition, plus cached per-partition matrices"""
+
+    def __init__(self, cache_size=None):
+        self.cache_size = cache_size or settings.RAG_PARTITION_CACHE_SIZE
+        # partition -> set of chunk IDs
+        self.members = defaultdict(set)
+        self.chunk_partition = {}
+        # partition -> (chunk IDs, float32 matrix, squared norms), most recently used last
+        self._matrices = OrderedDict()
+        # chunk ID -> position in the vector store; rebuilt after updates
+        self._positions = None
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        partitions = cls()
+        for chunk_id in vectorstore.index_to_docstore_id.values():
+            partitions.add(chunk_id, vectorstore.docstore.search(chunk_id).metadata)
+        return partitions
+
+    def add(self, chunk_id, metadata):
+        partition = partition_for(metadata)
+        self.chunk_partition[chunk_id] = partition
+        if partition is not None:
+            self.members[partition].add(chunk_id)
+            self._matrices.pop(partition, None)
+        self._positions = None
+
+    def remove(self, chunk_id):
+        partition = self.chunk_partition.pop(chunk_id, None)
+        if partition is not None:
+            self.members[partition].discard(chunk_id)
+            if not self.members[partition]:
+                del self.members[partition]
+            self._matrices.pop(partition, None)
+        self._positions = None
+
+    def sizes(self):
+        user_partitions = [len(chunks) for key, chunks in self.members.items() if key != SHARED]
+        return {
+            'shared_chunks': len(self.members.get(SHARED, ())),
+            'user_partitions': len(user_partitions),
+            'largest_user_partition': max(user_partitions, default=0),
+            'cached_partitions': len(self._matrices),
+        }
+
+    def allowed_chunks(self, partitions):
+        return set().union(*(self.members.get(partition, ()) for partition in partitions))
+
+    def matrix(self, partition, vectorstore):
+        """(chunk IDs, vectors, norms) of one partition; call with the store lock held"""
+        cached = self._matrices.get(partition)
+        if cached is not None:
+            self._matrices.move_to_end(partition)
+            return cached
+
+        if self._positions is None:
+            self._positions = {
+                chunk_id: position for position, chunk_id in vectorstore.index_to_docstore_id.items()
+            }
+        chunk_ids = sorted(self.members.get(partition, ()))
+        vectors = reconstruct_rows(vectorstore.index, [self._positions[chunk_id] for chunk_id in chunk_ids])
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        cached = (chunk_ids, vectors, np.einsum('ij,ij->i', vectors, vectors))
+        self._matrices[partition] = cached
+        # Evict least recently used customers; the shared partition stays
+        while len(self._matrices) > self.cache_size:
+            oldest = next((key for key in self._matrices if key != SHARED), None)
+            if oldest is None:
+                break
+            del self._matrices[oldest]
+        return cached
+
+    def search(self, vectors, partitions, k, vectorstore):
+        """
+        Nearest chunk IDs for each query vector within its allowed partitions.
+        The shared partition is searched for the whole batch with one matrix
+        product; each user's partition only against that user's queries.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        candidates = [[] for _ in range(len(vectors))]
+        by_partition = defaultdict(list)
+        for row, allowed in enumerate(partitions):
+            for partition in allowed:
+                by_partition[partition].append(row)
+
+        for partition, rows in by_partition.items():
+            chunk_ids, matrix, norms = self.matrix(partition, vectorstore)
+            if not chunk_ids:
+                continue
+            queries = vectors[rows]
+            distances = (
+                norms[None, :]
+                - 2 * queries @ matrix.T
+                + np.einsum('ij,ij->i', queries, queries)[:, None]
+            )
+            top = min(k, len(chunk_ids))
+            nearest = np.argpartition(distances, top - 1, axis=1)[:, :top]
+            for row, hits, scores in zip(rows, nearest, np.take_along_axis(distances, nearest, axis=1)):
+                candidates[row].extend(zip(scores.tolist(), (chunk_ids[i] for i in hits)))
+
+        return [[chunk_id for _, chunk_id in sorted(found)[:k]] for found in candidates]
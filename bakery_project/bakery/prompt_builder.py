@@ -0,0 +1,170 @@
+"""
+Prompt assembly for the RAG chatbot.
+
+The instructions are a fixed system message that never changes between
+requests, so the provider can cache that prefix; only the human message
+(retrieved context + question) varies. Retrieved chunks are packed in
+relevance order until RAG_PROMPT_CONTEXT_TOKENS is reached, and text that
+overlapping chunks of the same record share is included only once.
+"""
+import math
+
+from django.conf import settings
+
+# The original instructions, verbatim (apart from the greeting line, which
+# used to interpolate attributes of the User class rather than the user)
+SYSTEM_PROMPT = """You are a helpful and knowledgeable chatbot assistant for The Bake Story bakery.
+Use the following context from the bakery database to answer user questions.
+    every time if user is logined in say hello <their first name> or hello <their username> instead of hello nikhil or rahul or some other random names from database always say buddy or hello dear .
+you are the bake story's personal assistant. Provide accurate and concise information based on the database content.
+try to answer based on the database content provided. If the answer is not found, respond with "I don't have that information."
+behave professionally and courteously as a customer service assistant. always aim to help the user with their queries.
+tell customers about bakery products, orders, payments, and user profiles based on the database.
+if customers ask for recommendations, suggest popular bakery items from the menu.
+if the question is unrelated to the bakery database, politely inform the user that you can only assist with bakery-related queries.
+if the user asks for multiple pieces of information, provide a structured response covering all points.
+give examples of menu items, order statuses, payment methods, and user profile details when relevant.
+give priority to recent data (e.g., latest orders, recent payments) when answering time-sensitive questions.
+if the user asks for statistics (e.g., number of orders, total sales), provide accurate counts based on the database context.
+if the user requests help with placing an order or making a payment, guide them through the process based on the database information.
+if the user inquires about specific menu items, provide detailed descriptions including price and availability.
+check for any inconsistencies in the database context and clarify them if needed.
+tell the exact address and contact details for delivery based on the order information.
+the order will be delivered within 30-45 minutes of placing the order.
+pure native ingredients are used in all bakery products.
+no charges for delivery within the city limits.
+no chemicals or preservatives are used in any bakery items.
+no hidden charges. the price mentioned is the final price.
+
+all are freshly baked items.
+give importance to customer satisfaction and quality service.
+give answer in a friendly and engaging manner.
+be friendly and polite in your responses and ask to visit again.
+tell the user to visit the bakery for more delicious items.
+
+every time mention the chartbot was built by Ajay a python developer.
+
+and when i ask something you are saying  hello nikhil hello rahul or some other names  dont take some random names from database instead always say buddy or hello dear .
+The database contains information about:
+- Menu items (bakery products, prices, availability)
+- Orders (customer orders, status, delivery details)
+- Order items (items within each order)
+- Payments (transaction details, payment methods)
+- User profiles (customer information)"""
+
+QUESTION_TEMPLATE = """CONTEXT FROM DATABASE:
+{context}
+
+QUESTION: {query}
+
+ANSWER (provide clear, helpful information based  on the database context and ADDITIONAL_BAKERY_INFO if question is about bakery or about chatbot developer give short summary data about them and if the question is about any baterky related information give required data to them  ):"""
+
+# Shorter shared runs than this between two chunks are treated as coincidence
+MIN_OVERLAP_CHARS = 20
+
+
+def estimate_tokens(text):
+    """Rough token count (Llama-family tokenizers average ~4 characters per token)"""
+    return math.ceil(len(text) / settings.RAG_PROMPT_CHARS_PER_TOKEN)
+
+
+def shared_overlap(previous, text):
+    """Length of the longest suffix of `previous` that `text` starts with"""
+    for size in range(min(len(previous), len(text)), MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return size
+    return 0
+
+
+def dedupe_chunks(docs):
+    """
+    Chunk texts in relevance order with repeated content removed: exact
+    duplicates and chunks contained in an earlier one are dropped, and the
+    overlap a chunk shares with an earlier chunk of the same record is trimmed.
+    """
+    kept = []
+    by_record = {}
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text or any(text in earlier for earlier in kept):
+            continue
+        for earlier in by_record.get(doc.metadata.get('doc_id'), ()):
+            # Keep only the part the earlier chunk does not already cover
+            head = shared_overlap(earlier, text)
+            if head:
+                text = text[head:].strip()
+            else:
+                tail = shared_overlap(text, earlier)
+                if tail:
+                    text = text[:-tail].strip()
+        if not text:
+            continue
+        kept.append(text)
+        by_record.setdefault(doc.metadata.get('doc_id'), []).append(doc.page_content.strip())
+    return kept
+
+
+def pack_context(docs, budget=None):
+    """
+    Deduplicated chunk texts, most relevant first, that fit in `budget`
+    tokens. Chunks that do not fit are skipped so a smaller, less relevant
+    one can still use the remaining space; the most relevant chunk is
+    truncated rather than dropped if it alone exceeds the budget.
+    """
+    budget = budget or settings.RAG_PROMPT_CONTEXT_TOKENS
+    packed, used = [], 0
+    for text in dedupe_chunks(docs):
+        tokens = estimate_tokens(text) + 1  # separator
+        if used + tokens > budget:
+            if not packed:
+                packed.append(text[:budget * settings.RAG_PROMPT_CHARS_PER_TOKEN])
+                used = budget
+            continue
+        packed.append(text)
+        used += tokens
+    return packed
+
+
+def build_messages(query, docs):
+    """
+    Chat messages for a question and its retrieved documents: the static
+    system prompt first, then the packed context and question. Logs the
+    estimated prompt size.
+    """
+    packed = pack_context(docs)
+    human = QUESTION_TEMPLATE.format(context="\n\n".join(packed), query=query)
+    system_tokens = estimate_tokens(SYSTEM_PROMPT)
+    human_tokens = estimate_tokens(human)
+    print(
+        f"🧾 Prompt ~{system_tokens + human_tokens} tokens "
+        f"({system_tokens} static prefix + {human_tokens} context/question, "
+        f"{len(packed)}/{len(docs)} chunks)"
+    )
+    return [("system", SYSTEM_PROMPT), ("human", human)]
+
+
+def log_usage(response):
+    """Log the provider-reported token usage of an LLM response, if any"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage:
+        details = usage.get('input_token_details') or {}
+        cached = details.get('cache_read')
+        print(
+            f"🧾 LLM usage: {usage.get('input_tokens')} prompt + {usage.get('output_tokens')} completion tokens"
+            + (f" ({cached} prompt tokens cached)" if cached is not None else "")
+        )
+
+
+def retrieval_only_answer(docs):
+    """
+    Answer built from the top retrieved records alone, for when the LLM is
+    unavailable (circuit open, saturated or failing)
+    """
+    packed = pack_context(docs[:settings.RAG_FALLBACK_CHUNKS])
+    if not packed:
+        return ("I can't generate an answer right now and found nothing related in the bakery records. "
+                "Please try again in a moment.")
+    return (
+        "I can't generate a full answer right now, but here is what I found in the bakery records:\n\n"
+        + "\n\n".join(packed)
+    )
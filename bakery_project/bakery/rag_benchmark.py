@@ -0,0 +1,303 @@
+"""
+Offline benchmark harness for the RAG chatbot (see `manage.py bench_rag`).
+
+Runs against a throwaway test database seeded with a synthetic, seeded-random
+corpus, with a deterministic stub LLM in place of Groq, so results depend only
+on the code and the parameters. Optionally a hashing embedder replaces the
+sentence-transformers model, making the whole run offline and reproducible.
+"""
+import contextlib
+import hashlib
+import io
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from bakery.models import MenuItem, Order, OrderItem, Payment, UserProfile
+from bakery.retrieval_batcher import percentile
+
+KS = (1, 3, 5)
+STAGES = ('embed', 'search', 'prompt', 'answer')
+
+FLAVOURS = ['Chocolate', 'Vanilla', 'Red Velvet', 'Butterscotch', 'Blueberry', 'Almond', 'Mango',
+            'Pineapple', 'Coffee', 'Hazelnut', 'Strawberry', 'Lemon', 'Caramel', 'Pistachio']
+CITIES = ['Hyderabad', 'Bengaluru', 'Chennai', 'Pune', 'Mumbai', 'Delhi']
+
+
+# ---------------------------------------------------
+# SYNTHETIC CORPUS
+# ---------------------------------------------------
+def seed_corpus(menu_items=200, users=500, orders=5000, seed=7):
+    """
+    Fill the (empty, throwaway) database with a deterministic corpus. Bulk
+    inserts skip model signals, so no index events are queued.
+    Returns the row counts.
+    """
+    rng = random.Random(seed)
+    categories = [key for key, _ in MenuItem.CATEGORY_CHOICES]
+    MenuItem.objects.bulk_create([
+        MenuItem(
+            name=f"{FLAVOURS[n % len(FLAVOURS)]} {categories[n % len(categories)].title()} No.{n}",
+            description=f"Freshly baked {FLAVOURS[n % len(FLAVOURS)].lower()} "
+                        f"{categories[n % len(categories)]} with {rng.choice(FLAVOURS).lower()} notes",
+            price=Decimal(rng.randrange(40, 900)),
+            category=categories[n % len(categories)],
+            available=rng.random() > 0.1,
+        )
+        for n in range(menu_items)
+    ])
+    User.objects.bulk_create([
+        User(username=f"customer{n}", email=f"customer{n}@example.com", first_name=f"Customer{n}",
+             password='!')
+        for n in range(users)
+    ])
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    UserProfile.objects.bulk_create([
+        UserProfile(user_id=user_id, phone=f"9{rng.randrange(10**9):09d}", city=rng.choice(CITIES),
+                    address=f"{rng.randrange(1, 400)} Baker Street")
+        for user_id in user_ids
+    ])
+
+    items = list(MenuItem.objects.order_by('pk'))
+    statuses = [key for key, _ in Order.STATUS_CHOICES]
+    new_orders, lines = [], []
+    for n in range(orders):
+        picked = rng.sample(items, rng.randint(1, 4))
+        quantities = [rng.randint(1, 3) for _ in picked]
+        new_orders.append(Order(
+            # One in ten orders is a guest order, which chatbot users never see
+            user_id=rng.choice(user_ids) if user_ids and rng.random() > 0.1 else None,
+            order_id=f"ORD-{hashlib.sha1(f'{seed}:{n}'.encode()).hexdigest()[:8].upper()}",
+            order_type=rng.choice(['dine-in', 'takeaway', 'delivery']),
+            status=rng.choice(statuses),
+            total_amount=sum(item.price * quantity for item, quantity in zip(picked, quantities)),
+            customer_name=f"Guest {n}",
+            delivery_address=f"{rng.randrange(1, 400)} Baker Street, {rng.choice(CITIES)}",
+        ))
+        lines.append(list(zip(picked, quantities)))
+    created = Order.objects.bulk_create(new_orders, batch_size=1000)
+    if created and created[0].pk is None:
+        # Backends that do not return primary keys from bulk inserts
+        created = list(Order.objects.order_by('pk'))
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item=item, quantity=quantity, price=item.price)
+        for order, order_lines in zip(created, lines)
+        for item, quantity in order_lines
+    ], batch_size=2000)
+    methods = [key for key, _ in Payment.PAYMENT_METHOD_CHOICES]
+    payment_statuses = [key for key, _ in Payment.PAYMENT_STATUS_CHOICES]
+    now = timezone.now()
+    Payment.objects.bulk_create([
+        Payment(
+            order=order,
+            payment_method=rng.choice(methods),
+            payment_status=rng.choice(payment_statuses),
+            transaction_id=f"TXN-{hashlib.sha1(f'{seed}:txn:{n}'.encode()).hexdigest()[:12].upper()}",
+            amount=order.total_amount,
+            paid_at=now - timedelta(minutes=n),
+        )
+        for n, order in enumerate(created) if rng.random() < 0.8
+    ], batch_size=1000)
+    return {
+        'menu_items': MenuItem.objects.count(),
+        'users': User.objects.count(),
+        'orders': Order.objects.count(),
+        'order_items': OrderItem.objects.count(),
+        'payments': Payment.objects.count(),
+    }
+
+
+def labelled_questions(per_type=20):
+    """
+    (question, expected doc_id, asking user_id) triples from the first records
+    of each type; deterministic for a given database. Order and payment
+    questions are asked by the record's owner, as retrieval is scoped per user;
+    guest records are skipped, since no user can retrieve them.
+    """
+    questions = []
+    for item in MenuItem.objects.order_by('pk')[:per_type]:
+        questions.append((f"How much does {item.name} cost?", f"menuitem:{item.pk}", None))
+    for order in Order.objects.filter(user__isnull=False).order_by('pk')[:per_type]:
+        questions.append((f"What is the status of order {order.order_id}?", f"order:{order.pk}", order.user_id))
+    for payment in Payment.objects.filter(order__user__isnull=False).select_related('order').order_by('pk')[:per_type]:
+        questions.append((f"Show me payment {payment.transaction_id}", f"payment:{payment.pk}",
+                          payment.order.user_id))
+    return questions
+
+
+# ---------------------------------------------------
+# STUBS
+# ---------------------------------------------------
+def _hashing_embeddings_class():
+    from langchain_core.embeddings import Embeddings
+
+    class HashingEmbeddings(Embeddings):
+        """
+        Deterministic bag-of-words embedder (signed feature hashing). Far
+        weaker than a real model, but free, offline and stable across runs.
+        """
+
+        def __init__(self, dimension=384):
+            self.dimension = dimension
+
+        def embed_documents(self, texts):
+            return [self.embed_query(text) for text in texts]
+
+        def embed_query(self, text):
+            from bakery.keyword_index import tokenize
+
+            vector = np.zeros(self.dimension, dtype=np.float32)
+            for token in tokenize(text):
+                digest = int.from_bytes(hashlib.md5(token.encode('utf-8')).digest()[:8], 'little')
+                vector[digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+            norm = np.linalg.norm(vector)
+            return (vector / norm if norm else vector).tolist()
+
+    return HashingEmbeddings
+
+
+class StubLLM:
+    """Stand-in for ChatGroq: answers instantly and deterministically from the prompt"""
+
+    def _reply(self, messages):
+        from langchain_core.messages import AIMessage
+
+        human = messages[-1][1]
+        context = human.split('CONTEXT FROM DATABASE:', 1)[-1].strip().splitlines()
+        answer = f"Here is what I found: {context[0] if context else 'nothing'}"
+        prompt_tokens = sum(len(content) for _, content in messages) // 4
+        return AIMessage(content=answer, usage_metadata={
+            'input_tokens': prompt_tokens,
+            'output_tokens': len(answer) // 4,
+            'total_tokens': prompt_tokens + len(answer) // 4,
+        })
+
+    def invoke(self, messages):
+        return self._reply(messages)
+
+    def stream(self, messages):
+        from langchain_core.messages import AIMessageChunk
+
+        for word in self._reply(messages).content.split(' '):
+            yield AIMessageChunk(content=word + ' ')
+
+
+# ---------------------------------------------------
+# BENCHMARK
+# ---------------------------------------------------
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def summarize(samples):
+    return {
+        'p50': round(percentile(samples, 50) * 1000, 3),
+        'p95': round(percentile(samples, 95) * 1000, 3),
+        'p99': round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def run_benchmark(menu_items=200, users=500, orders=5000, questions_per_type=50, embedding='hash', seed=7):
+    """Seed, build the index, ask the labelled questions; returns the report dict"""
+    from bakery import rag_chatbot
+    from bakery.embedding_cache import CachedEmbeddings
+    from bakery.llm_gateway import LLMGateway
+    from bakery.prompt_builder import build_messages
+
+    started = time.perf_counter()
+    corpus = seed_corpus(menu_items, users, orders, seed)
+    seed_seconds = time.perf_counter() - started
+
+    # Fresh index and embedding cache, so the build is measured cold; both are removed afterwards
+    with tempfile.TemporaryDirectory(prefix='bench-rag-') as index_dir:
+        settings.RAG_INDEX_DIR = index_dir
+        settings.RAG_EMBEDDING_CACHE_PATH = f"{settings.RAG_INDEX_DIR}/embedding_cache.sqlite3"
+        if embedding == 'hash':
+            rag_chatbot._embeddings = CachedEmbeddings(
+                _hashing_embeddings_class()(), 'hashing-384', settings.RAG_EMBEDDING_CACHE_PATH
+            )
+
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            chatbot = rag_chatbot.DatabaseRAGChatbot(None, use_llm=False)
+            chatbot.llm = LLMGateway(None, llm=StubLLM())
+            # Questions are asked one at a time, so the micro-batcher's wait
+            # for company would only add to the measured embed latency
+            chatbot.batcher.max_wait = 0
+            started = time.perf_counter()
+            chatbot.initialize()
+            build_seconds = time.perf_counter() - started
+            rss_after_build = peak_rss_mb()
+
+            questions = labelled_questions(questions_per_type)
+            timings = {stage: [] for stage in STAGES}
+            hits = {k: 0 for k in KS}
+            for question, expected, user_id in questions:
+                started = time.perf_counter()
+                vector = chatbot.embed_query(question)
+                timings['embed'].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                docs = chatbot.search(question, k=max(KS), embedding=vector, user_id=user_id)
+                timings['search'].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                build_messages(question, docs)
+                timings['prompt'].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                chatbot.answer(question, docs)
+                timings['answer'].append(time.perf_counter() - started)
+
+                found = [doc.metadata.get('doc_id') for doc in docs]
+                for k in KS:
+                    hits[k] += expected in found[:k]
+
+        status = chatbot.status()
+        return {
+            'parameters': {
+                'menu_items': menu_items, 'users': users, 'orders': orders,
+                'questions_per_type': questions_per_type, 'embedding': embedding, 'seed': seed,
+            },
+            'corpus': dict(corpus, documents=status['document_count'], chunks=status['chunk_count']),
+            'embedding_model': rag_chatbot.get_embeddings().model_name,
+            'index_kind': status['index_kind'],
+            'seed_seconds': round(seed_seconds, 2),
+            'build_seconds': round(build_seconds, 2),
+            'peak_rss_mb': {'after_build': rss_after_build, 'final': peak_rss_mb()},
+            'questions': len(questions),
+            'recall': {f"recall@{k}": round(hits[k] / len(questions), 3) if questions else None for k in KS},
+            'timings_ms': {stage: summarize(samples) for stage, samples in timings.items()},
+            'settings': {
+                name: getattr(settings, name) for name in (
+                    'RAG_RETRIEVAL_K', 'RAG_HYBRID_SEARCH', 'RAG_HYBRID_CANDIDATES', 'RAG_RERANK_MODEL',
+                    'RAG_PARTITIONED_RETRIEVAL', 'RAG_INDEX_KIND', 'RAG_EMBEDDING_BACKEND',
+                    'RAG_PROMPT_CONTEXT_TOKENS',
+                )
+            },
+        }
+
+
+def main():
+    """Entry point of the benchmark subprocess: parameters as JSON in argv[1], report on stdout"""
+    from django.db import connection
+
+    parameters = json.loads(sys.argv[1])
+    old_name = connection.settings_dict['NAME']
+    # A throwaway database; the real one is never touched
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        report = run_benchmark(**parameters)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    print(json.dumps(report))
@@ -1,31 +1,66 @@
 """
 RAG Chatbot for Django SQLite Database
 Extracts data from 5 models: MenuItem, Order, OrderItem, Payment, UserProfile
+
+The LangChain / FAISS / sentence-transformers (torch) stack is imported lazily,
+inside the functions that need it, so importing this module (e.g. from the
+URLconf) costs nothing until a chatbot request is actually served.
 """
 
 import os
+import fcntl
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
 import django
 from dotenv import load_dotenv
-from django.contrib.auth.models import User
 
-# Setup Django environment
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bakery_project.settings')
-django.setup()
-
-# RAG imports
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_groq import ChatGroq
+if __name__ == "__main__":
+    # Setup Django environment when run directly (python -m bakery.rag_chatbot)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bakery_project.settings')
+    django.setup()
 
 # Django models
-from bakery.models import MenuItem, Order, OrderItem, Payment, UserProfile
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+from bakery.models import MenuItem, Order, Payment, UserProfile, ChatbotIndexEvent
+from bakery.retrieval_batcher import MicroBatcher
+from bakery.llm_gateway import LLMGateway
+from bakery.keyword_index import BM25Index, reciprocal_rank_fusion, rerank
+from bakery.partitions import PartitionMap, partitions_for_user
+from bakery.prompt_builder import build_messages, log_usage
+from bakery.vector_index import (
+    NumpyIndex, add_vectors, build_index, delete_vectors, index_kind, prepare_index, select_index_kind,
+)
 from django.contrib.auth.models import User
 
 # Load environment variables
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Index settings. Bump INDEX_FORMAT_VERSION whenever the document format,
+# chunking or index layout changes so stale artifacts are never loaded.
+INDEX_FORMAT_VERSION = 3
+EMBEDDING_MODEL_NAME = settings.RAG_EMBEDDING_MODEL
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+
+
+
+def index_io_flags():
+    """
+    Open persisted indexes memory-mapped and read-only so the pages are
+    shared between gunicorn workers instead of copied into every process.
+    """
+    import faiss
+    return getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
 
 # ==================================================
 # CUSTOM ADDITIONAL INFORMATION
@@ -107,17 +142,8 @@ rahul sir is a senior web developer and mentor who has been guiding Ajay in reac
 # ---------------------------
 # 1) LOAD DATA FROM DATABASE
 # ---------------------------
-def load_database_data():
-    """
-    Extracts data from all 5 Django models and formats them as text documents
-    """
-    documents = []
-    
-    # 1. MenuItem data
-    print("📦 Loading MenuItem data...")
-    menu_items = MenuItem.objects.all()
-    for item in menu_items:
-        doc = f"""
+def render_menu_item(item):
+    return f"""
 Menu Item: {item.name}
 Category: {item.get_category_display()}
 Price: ₹{item.price}
@@ -125,17 +151,16 @@ Description: {item.description}
 Available: {'Yes' if item.available else 'No'}
 Created: {item.created_at.strftime('%Y-%m-%d')}
 """
-        documents.append(doc)
-    
-    # 2. Order data
-    print("📦 Loading Order data...")
-    orders = Order.objects.all()
-    for order in orders:
-        items_list = ", ".join([f"{item.quantity}x {item.menu_item.name}" 
-                                for item in order.items.all()])
-        doc = f"""
+
+
+def render_order(order):
+    # One document per order, including its items, instead of separate
+    # OrderItem documents repeating the same order details
+    items_list = ", ".join([f"{item.quantity}x {item.menu_item.name} (₹{item.price} each, subtotal ₹{item.subtotal})" 
+                            for item in order.items.all()])
+    return f"""
 Order ID: {order.order_id}
-Customer: {order.user.username}
+Customer: {order.user.username if order.user else order.customer_name or 'Guest'}
 Status: {order.get_status_display()}
 Total Amount: ₹{order.total_amount}
 Delivery Fee: ₹{order.delivery_fee}
@@ -145,27 +170,10 @@ Delivery Address: {order.delivery_address}
 Delivery Phone: {order.delivery_phone}
 Created: {order.created_at.strftime('%Y-%m-%d %H:%M')}
 """
-        documents.append(doc)
-    
-    # 3. OrderItem data
-    print("📦 Loading OrderItem data...")
-    order_items = OrderItem.objects.select_related('order', 'menu_item').all()
-    for item in order_items:
-        doc = f"""
-Order Item: {item.menu_item.name}
-Order ID: {item.order.order_id}
-Quantity: {item.quantity}
-Price per Unit: ₹{item.price}
-Subtotal: ₹{item.subtotal}
-Customer: {item.order.user.username}
-"""
-        documents.append(doc)
-    
-    # 4. Payment data
-    print("📦 Loading Payment data...")
-    payments = Payment.objects.select_related('order').all()
-    for payment in payments:
-        doc = f"""
+
+
+def render_payment(payment):
+    return f"""
 Payment Transaction: {payment.transaction_id}
 Order ID: {payment.order.order_id}
 Payment Method: {payment.get_payment_method_display()}
@@ -175,13 +183,10 @@ UPI ID: {payment.upi_id if payment.upi_id else 'N/A'}
 Created: {payment.created_at.strftime('%Y-%m-%d %H:%M')}
 Paid At: {payment.paid_at.strftime('%Y-%m-%d %H:%M') if payment.paid_at else 'Not paid'}
 """
-        documents.append(doc)
-    
-    # 5. UserProfile data
-    print("📦 Loading UserProfile data...")
-    profiles = UserProfile.objects.select_related('user').all()
-    for profile in profiles:
-        doc = f"""
+
+
+def render_profile(profile):
+    return f"""
 User Profile: {profile.user.username}
 Email: {profile.user.email}
 Phone: {profile.phone}
@@ -191,16 +196,11 @@ State: {profile.state}
 Pincode: {profile.pincode}
 Member Since: {profile.created_at.strftime('%Y-%m-%d')}
 """
-        documents.append(doc)
-
 
 
-
-  # 6. User data (basic auth info only)
-    print("📦 Loading User data...")
-    users = User.objects.all()
-    for user in users:
-        doc = f"""
+def render_user(user):
+    # Basic auth info only
+    return f"""
 User: {user.username}
 Email: {user.email}
 First Name: {user.first_name}
@@ -209,38 +209,223 @@ Active: {'Yes' if user.is_active else 'No'}
 Staff: {'Yes' if user.is_staff else 'No'}
 Member Since: {user.date_joined.strftime('%Y-%m-%d')}
 """
-        documents.append(doc)
+
+
+# Document type -> (label, queryset factory, renderer, owner/timestamp getter).
+# The type is the model name used in ChatbotIndexEvent doc IDs, e.g.
+# "order:42". Each queryset fetches every relation its renderer touches so
+# loading is O(1) queries per batch, not per row, and is ordered by pk so the
+# content hash is stable.
+DOCUMENT_SOURCES = {
+    'menuitem': (
+        'MenuItem',
+        lambda: MenuItem.objects.order_by('pk'),
+        render_menu_item,
+        lambda item: (None, item.created_at),
+    ),
+    'order': (
+        'Order',
+        lambda: Order.objects.select_related('user').prefetch_related('items__menu_item').order_by('pk'),
+        render_order,
+        lambda order: (order.user_id, order.created_at),
+    ),
+    'payment': (
+        'Payment',
+        lambda: Payment.objects.select_related('order').order_by('pk'),
+        render_payment,
+        lambda payment: (payment.order.user_id, payment.created_at),
+    ),
+    'userprofile': (
+        'UserProfile',
+        lambda: UserProfile.objects.select_related('user').order_by('pk'),
+        render_profile,
+        lambda profile: (profile.user_id, profile.created_at),
+    ),
+    'user': (
+        'User',
+        lambda: User.objects.order_by('pk'),
+        render_user,
+        lambda user: (user.pk, user.date_joined),
+    ),
+}
+INFO_DOC_ID = 'info:bakery'
+
+
+def build_document(doc_type, obj):
+    """
+    Render one record as (doc_id, text, metadata). Metadata carries the
+    record type, primary key, owning user and creation time.
+    """
+    _, _, render, owner = DOCUMENT_SOURCES[doc_type]
+    user_id, created_at = owner(obj)
+    metadata = {
+        'type': doc_type,
+        'pk': obj.pk,
+        'user_id': user_id,
+        'created_at': created_at.isoformat() if created_at else None,
+    }
+    return ChatbotIndexEvent.doc_id_for(doc_type, obj.pk), render(obj), metadata
+
+
+def build_info_document():
+    return INFO_DOC_ID, ADDITIONAL_BAKERY_INFO, {
+        'type': 'info', 'pk': None, 'user_id': None, 'created_at': None,
+    }
+
+
+def iter_database_documents(chunk_size=None):
+    """
+    Stream (doc_id, text, metadata) for every record, fetching rows in batches of
+    `chunk_size` with server-side cursors where available, so memory stays
+    flat no matter how much order history there is.
+    """
+    chunk_size = chunk_size or settings.RAG_LOADER_CHUNK_SIZE
+    count = 0
+    
+    for doc_type, (label, queryset, _, _) in DOCUMENT_SOURCES.items():
+        print(f"📦 Loading {label} data...")
+        for obj in queryset().iterator(chunk_size=chunk_size):
+            count += 1
+            yield build_document(doc_type, obj)
     
-    # 7. Add custom additional information
+    # Add custom additional information
     print("📦 Loading Additional Bakery Information...")
-    documents.append(ADDITIONAL_BAKERY_INFO)
+    count += 1
+    yield build_info_document()
     
-    print(f"✅ Loaded {len(documents)} documents from database")
-    return documents
+    print(f"✅ Loaded {count} documents from database")
+
+
+def load_database_data():
+    """
+    Extracts data from all Django models and formats them as text documents.
+    Returns a list of (doc_id, text, metadata); prefer iter_database_documents()
+    for anything that can consume a stream.
+    """
+    return list(iter_database_documents())
+
+
+def load_document(doc_id):
+    """
+    Build a single (doc_id, text, metadata) document by ID, or None if the
+    record no longer exists (or its type is no longer indexed)
+    """
+    if doc_id == INFO_DOC_ID:
+        return build_info_document()
+    doc_type, _, pk = doc_id.partition(':')
+    if doc_type not in DOCUMENT_SOURCES:
+        return None
+    obj = DOCUMENT_SOURCES[doc_type][1]().filter(pk=pk).first()
+    return build_document(doc_type, obj) if obj is not None else None
+
+
 # ---------------------------
 # 2) CHUNK TEXT
 # ---------------------------
-def split_text(documents):
-    """Split documents into smaller chunks for better retrieval"""
+def iter_chunks(documents):
+    """
+    Split each document into chunks on its own so every chunk belongs to
+    exactly one record. Yields (text, metadata, chunk_id) with chunk IDs of
+    the form "<doc_id>#<n>"; each chunk carries its document's metadata.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
-    all_text = "\n\n---\n\n".join(documents)
-    return splitter.split_text(all_text)
+    for doc_id, text, metadata in documents:
+        for n, chunk in enumerate(splitter.split_text(text)):
+            yield chunk, dict(metadata, doc_id=doc_id), f"{doc_id}#{n}"
+
+
+def split_text(documents):
+    """Split documents into chunks, returned as (texts, metadatas, ids) lists"""
+    texts, metadatas, ids = [], [], []
+    for text, metadata, chunk_id in iter_chunks(documents):
+        texts.append(text)
+        metadatas.append(metadata)
+        ids.append(chunk_id)
+    return texts, metadatas, ids
 
 
 # ---------------------------
 # 3) CREATE VECTOR STORE
 # ---------------------------
+_embeddings = None
+
+
+def load_embedding_model(backend=None):
+    """
+    Load the embedding model for `backend` (default RAG_EMBEDDING_BACKEND).
+    Returns (model, model_id); model_id tells backends apart in the
+    embedding cache and index hash. 'onnx' falls back to PyTorch if
+    onnxruntime or the exported model is unavailable.
+    """
+    backend = backend or settings.RAG_EMBEDDING_BACKEND
+    if backend == 'onnx':
+        try:
+            from bakery.onnx_embeddings import OnnxEmbeddings
+            
+            model = OnnxEmbeddings.from_settings()
+            return model, f"{EMBEDDING_MODEL_NAME}@{settings.RAG_ONNX_MODEL_FILE}"
+        except Exception as e:
+            print(f"   ⚠️ ONNX embedding backend unavailable ({e}); falling back to PyTorch")
+    from langchain_huggingface import HuggingFaceEmbeddings
+    
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME), EMBEDDING_MODEL_NAME
+
+
+def get_embeddings():
+    """Return the process-wide embeddings model (loaded once)"""
+    global _embeddings
+    if _embeddings is None:
+        print(f"   Creating embeddings model...")
+        from bakery.embedding_cache import CachedEmbeddings
+        
+        model, model_id = load_embedding_model()
+        _embeddings = CachedEmbeddings(model, model_id, settings.RAG_EMBEDDING_CACHE_PATH)
+    return _embeddings
+
+
+def iter_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def create_vectorstore(chunks):
-    """Create FAISS vector store from text chunks"""
+    """
+    Create FAISS vector store from a stream of (text, metadata, chunk_id)
+    chunks, embedding RAG_EMBED_BATCH_SIZE chunks at a time
+    """
+    from langchain_community.vectorstores import FAISS
+    
     try:
-        print(f"   Creating embeddings model...")
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        print(f"   Creating vector store from {len(chunks)} chunks...")
-        vectorstore = FAISS.from_texts(chunks, embeddings)
-        print(f"   ✅ Vector store created successfully!")
+        embeddings = get_embeddings()
+        embeddings.reset_stats()
+        print(f"   Creating vector store...")
+        vectorstore = None
+        total = 0
+        for batch in iter_batches(chunks, settings.RAG_EMBED_BATCH_SIZE):
+            texts, metadatas, ids = zip(*batch)
+            text_embeddings = list(zip(texts, embeddings.embed_documents(list(texts))))
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(
+                    text_embeddings, embeddings, metadatas=list(metadatas), ids=list(ids)
+                )
+            else:
+                vectorstore.add_embeddings(text_embeddings, metadatas=list(metadatas), ids=list(ids))
+            total += len(batch)
+        kind = select_index_kind(total)
+        if vectorstore is not None:
+            vectorstore.index = build_index(vectorstore.index, kind)
+        print(f"   ✅ Vector store created from {total} chunks! ({kind} index, {embeddings.report()})")
         return vectorstore
     except Exception as e:
         print(f"   ❌ Error creating vector store: {e}")
@@ -250,108 +435,482 @@ def create_vectorstore(chunks):
 
 
 # ---------------------------
-# 4) ASK GROQ + RAG
+# 3b) PERSISTED INDEX ARTIFACTS
 # ---------------------------
-def answer_question(query, vectorstore, llm):
+def compute_documents_hash(documents):
     """
-    Answer questions using RAG (Retrieval Augmented Generation)
+    Content hash of the source documents plus everything that shapes the
+    index (format version, embedding model and backend, chunking, index
+    type). Used as the artifact key.
     """
-    # Retrieve relevant documents
-    docs = vectorstore.similarity_search(query, k=5)
-    context = "\n\n".join([doc.page_content for doc in docs])
-
-    prompt = f"""You are a helpful and knowledgeable chatbot assistant for The Bake Story bakery.
-Use the following context from the bakery database to answer user questions.
-    every time if user is logined in say hello {  User.first_name } or hello { User.username } instead of hello nikhil or rahul or some other random names from database always say buddy or hello dear .
-you are the bake story's personal assistant. Provide accurate and concise information based on the database content.
-try to answer based on the database content provided. If the answer is not found, respond with "I don't have that information."
-behave professionally and courteously as a customer service assistant. always aim to help the user with their queries.
-tell customers about bakery products, orders, payments, and user profiles based on the database.
-if customers ask for recommendations, suggest popular bakery items from the menu.
-if the question is unrelated to the bakery database, politely inform the user that you can only assist with bakery-related queries.
-if the user asks for multiple pieces of information, provide a structured response covering all points.
-give examples of menu items, order statuses, payment methods, and user profile details when relevant.
-give priority to recent data (e.g., latest orders, recent payments) when answering time-sensitive questions.
-if the user asks for statistics (e.g., number of orders, total sales), provide accurate counts based on the database context.
-if the user requests help with placing an order or making a payment, guide them through the process based on the database information.
-if the user inquires about specific menu items, provide detailed descriptions including price and availability.
-check for any inconsistencies in the database context and clarify them if needed.
-tell the exact address and contact details for delivery based on the order information.
-the order will be delivered within 30-45 minutes of placing the order.
-pure native ingredients are used in all bakery products.
-no charges for delivery within the city limits.
-no chemicals or preservatives are used in any bakery items.
-no hidden charges. the price mentioned is the final price.
-
-all are freshly baked items.
-give importance to customer satisfaction and quality service.
-give answer in a friendly and engaging manner.
-be friendly and polite in your responses and ask to visit again.
-tell the user to visit the bakery for more delicious items.
-
-every time mention the chartbot was built by Ajay a python developer.
-
-and when i ask something you are saying  hello nikhil hello rahul or some other names  dont take some random names from database instead always say buddy or hello dear .
-The database contains information about:
-- Menu items (bakery products, prices, availability)
-- Orders (customer orders, status, delivery details)
-- Order items (items within each order)
-- Payments (transaction details, payment methods)
-- User profiles (customer information)
-
-CONTEXT FROM DATABASE:
-{context}
-
-QUESTION: {query}
-
-ANSWER (provide clear, helpful information based  on the database context and ADDITIONAL_BAKERY_INFO if question is about bakery or about chatbot developer give short summary data about them and if the question is about any baterky related information give required data to them  ):
-"""
+    digest = hashlib.sha256()
+    digest.update(
+        f"v{INDEX_FORMAT_VERSION}|{get_embeddings().model_name}|{CHUNK_SIZE}|{CHUNK_OVERLAP}|"
+        f"{settings.RAG_INDEX_KIND}|{settings.RAG_INDEX_NUMPY_MAX_CHUNKS}|"
+        f"{settings.RAG_INDEX_IVF_MIN_CHUNKS}|{settings.RAG_INDEX_IVF_CODEC}".encode('utf-8')
+    )
+    for doc_id, text, metadata in documents:
+        for part in (doc_id, text, json.dumps(metadata, sort_keys=True)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def get_index_path(content_hash):
+    """Directory holding the index artifact for a given content hash"""
+    return os.path.join(settings.RAG_INDEX_DIR, f"v{INDEX_FORMAT_VERSION}-{content_hash[:16]}")
+
 
-    response = llm.invoke(prompt)
+def load_vectorstore(content_hash):
+    """Load a persisted index read-only and memory-mapped, or None if missing"""
+    path = get_index_path(content_hash)
+    if not os.path.exists(os.path.join(path, 'index.faiss')):
+        return None
+    from langchain_community.vectorstores import FAISS
+    
+    # The pickle is our own artifact written by save_vectorstore()
+    vectorstore = FAISS.load_local(
+        path,
+        get_embeddings(),
+        allow_dangerous_deserialization=True,
+        io_flags=index_io_flags(),
+    )
+    vectorstore.index = prepare_index(vectorstore.index)
+    return vectorstore
+
+
+def save_vectorstore(vectorstore, content_hash):
+    """Write the index to a temp dir and rename it into place atomically"""
+    final_path = get_index_path(content_hash)
+    tmp_path = tempfile.mkdtemp(prefix='.building-', dir=settings.RAG_INDEX_DIR)
+    try:
+        vectorstore.save_local(tmp_path)
+        os.rename(tmp_path, final_path)
+    except OSError:
+        # Another process published the same artifact first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(final_path):
+            raise
+    prune_index_artifacts(keep=final_path)
+    return final_path
+
+
+def prune_index_artifacts(keep):
+    """Remove old artifacts beyond RAG_INDEX_KEEP (mmapped files stay valid until unmapped)"""
+    root = settings.RAG_INDEX_DIR
+    artifacts = [
+        os.path.join(root, name) for name in os.listdir(root)
+        if name.startswith(f"v{INDEX_FORMAT_VERSION}-")
+    ]
+    artifacts.sort(key=os.path.getmtime, reverse=True)
+    for path in artifacts[settings.RAG_INDEX_KEEP:]:
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_or_build_vectorstore(iter_documents=iter_database_documents):
+    """
+    Return (vectorstore, content_hash). `iter_documents` is called to stream
+    the documents: once to hash them, and again only if the matching artifact
+    does not exist yet. One process builds and publishes a missing artifact
+    while the others wait on the build lock and then load the result.
+    """
+    os.makedirs(settings.RAG_INDEX_DIR, exist_ok=True)
+    content_hash = compute_documents_hash(iter_documents())
+
+    vectorstore = load_vectorstore(content_hash)
+    if vectorstore is not None:
+        print(f"   ✅ Loaded persisted index {content_hash[:16]} (memory-mapped)")
+        return vectorstore, content_hash
+
+    lock_path = os.path.join(settings.RAG_INDEX_DIR, '.build.lock')
+    with open(lock_path, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Re-check: another worker may have built it while we waited
+            vectorstore = load_vectorstore(content_hash)
+            if vectorstore is not None:
+                print(f"   ✅ Loaded index {content_hash[:16]} built by another process")
+                return vectorstore, content_hash
+
+            print("🧠 Chunking and embedding documents...")
+            save_vectorstore(create_vectorstore(iter_chunks(iter_documents())), content_hash)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Reload from disk so this process also uses the shared mmapped pages
+    print(f"   💾 Persisted index {content_hash[:16]}")
+    return load_vectorstore(content_hash), content_hash
+
+
+# ---------------------------
+# 4) ASK GROQ + RAG
+# ---------------------------
+def answer_from_documents(query, docs, llm):
+    """Generate an answer from already-retrieved documents"""
+    response = llm.invoke(build_messages(query, docs))
+    log_usage(response)
     return response.content
 
 
+def stream_answer_from_documents(query, docs, llm):
+    """Yield the answer text piece by piece as the model produces it"""
+    for chunk in llm.stream(build_messages(query, docs)):
+        log_usage(chunk)
+        if chunk.content:
+            yield chunk.content
+
+
 # ---------------------------
 # 5) INITIALIZE CHATBOT
 # ---------------------------
 class DatabaseRAGChatbot:
     """Main chatbot class for database RAG"""
     
-    def __init__(self, groq_api_key):
-        self.llm = ChatGroq(
-            groq_api_key=groq_api_key,
-            model="llama-3.1-8b-instant"
-        )
+    def __init__(self, groq_api_key, use_llm=True):
+        self.llm = None
+        if use_llm:
+            # The retrieval service only embeds and searches
+            self.llm = LLMGateway(groq_api_key)
         self.vectorstore = None
+        # BM25 over the same chunks, for hybrid search
+        self.keyword_index = None
+        # Shared vs per-customer chunk partitions, for scoped search
+        self.partitions = None
+        self.index_hash = None
+        # Highest ChatbotIndexEvent applied to this process's index
+        self.last_event_id = 0
+        # doc_id -> chunk IDs currently in the index, for per-record upserts
+        self.doc_chunks = {}
+        # The persisted index is mmapped read-only; copied on first write
+        self._index_readonly = False
+        # Guards the vector store reference between searches, swaps and
+        # incremental updates
+        self._lock = threading.RLock()
+        # Serialises incremental updates against index swaps
+        self._update_lock = threading.Lock()
+        self._updater = None
+        self._builder = None
+        # Gathers concurrent queries into one embedding pass + one search
+        self.batcher = MicroBatcher(
+            self._embed_queries,
+            self.search_many,
+            max_batch_size=settings.RAG_BATCH_MAX_SIZE,
+            max_wait_ms=settings.RAG_BATCH_MAX_WAIT_MS,
+        )
+        # Bumped every time a freshly built index is swapped in
+        self.generation = 0
+        self.build_state = {
+            'state': 'idle',
+            'phase': None,
+            'processed_documents': 0,
+            'total_documents': 0,
+            'started_at': None,
+            'last_build_seconds': None,
+            'last_built_at': None,
+            'error': None,
+        }
         
     def initialize(self):
-        """Load database and create vector store"""
+        """Load database and create vector store (blocks until ready)"""
         print("\n🚀 Initializing Database RAG Chatbot...")
+        self._build()
+        print("\n🎉 Chatbot Initialized! Ready to answer questions.\n")
+    
+    def rebuild_async(self):
+        """
+        Build a new index in a background thread while the current one keeps
+        serving, then swap it in atomically. Returns False if a build is
+        already running.
+        """
+        with self._lock:
+            if self._builder is not None and self._builder.is_alive():
+                return False
+            self._builder = threading.Thread(target=self._build_in_background, name='rag-index-builder', daemon=True)
+            self._builder.start()
+        return True
+    
+    def _build_in_background(self):
+        try:
+            self._build()
+        except Exception as e:
+            print(f"❌ Background index build failed: {e}")
+        finally:
+            close_old_connections()
+    
+    def _tracked_documents(self):
+        """Document stream that records build progress for chatbot_status"""
+        # The first pass hashes the documents, a second one (only if the
+        # artifact is missing) chunks and embeds them
+        self.build_state['phase'] = 'hashing' if self.build_state['phase'] is None else 'embedding'
+        self.build_state['processed_documents'] = 0
+        for document in iter_database_documents():
+            self.build_state['processed_documents'] += 1
+            yield document
+    
+    def _build(self):
+        """Load or build the index for the current data and swap it in"""
+        started = time.perf_counter()
+        self.build_state.update(
+            state='building', phase=None, processed_documents=0, error=None,
+            started_at=timezone.now().isoformat(),
+            total_documents=sum(source[1]().count() for source in DOCUMENT_SOURCES.values()) + 1,
+        )
+        try:
+            # Changes queued from here on are re-applied on top of this snapshot
+            last_event_id = ChatbotIndexEvent.objects.aggregate(last=Max('id'))['last'] or 0
+            
+            # Stream the database and load the persisted index for this data,
+            # building it only if missing. The current index keeps serving.
+            vectorstore, index_hash = load_or_build_vectorstore(self._tracked_documents)
+            doc_chunks = self._map_doc_chunks(vectorstore)
+            keyword_index = BM25Index.from_vectorstore(vectorstore) if settings.RAG_HYBRID_SEARCH else None
+            partitions = PartitionMap.from_vectorstore(vectorstore)
+        except Exception as e:
+            self.build_state.update(state='failed', error=str(e))
+            raise
         
-        # Load data from database
-        documents = load_database_data()
+        with self._update_lock:
+            with self._lock:
+                self.vectorstore, self.index_hash = vectorstore, index_hash
+                self.doc_chunks = doc_chunks
+                self.keyword_index = keyword_index
+                self.partitions = partitions
+                self.last_event_id = last_event_id
+                # NumPy indexes are private copies; FAISS ones are mmapped
+                self._index_readonly = not isinstance(vectorstore.index, NumpyIndex)
+                self.generation += 1
+            elapsed = time.perf_counter() - started
+            self.build_state.update(
+                state='idle', phase=None,
+                last_build_seconds=round(elapsed, 2),
+                last_built_at=timezone.now().isoformat(),
+            )
+            print(f"🔁 Index generation {self.generation} live ({len(doc_chunks)} documents, {elapsed:.1f}s)")
+        
+        # Catch up with changes made while the build was running
+        self.apply_pending_changes()
+    
+    def status(self):
+        """Build generation, progress and index size for /api/chatbot/status/"""
+        state = dict(self.build_state)
+        total = state['total_documents']
+        state['progress'] = (
+            round(min(state['processed_documents'] / total, 1.0), 3)
+            if state['state'] == 'building' and total else None
+        )
+        return {
+            'generation': self.generation,
+            'index_hash': self.index_hash,
+            'document_count': len(self.doc_chunks),
+            'chunk_count': self.vectorstore.index.ntotal if self.vectorstore else 0,
+            'index_kind': index_kind(self.vectorstore.index) if self.vectorstore else None,
+            'last_event_id': self.last_event_id,
+            'build': state,
+            'partitions': self.partitions.sizes() if self.partitions else None,
+            'retrieval_batching': self.batcher.stats(),
+            'llm': self.llm.stats() if self.llm else None,
+        }
+    
+    def _map_doc_chunks(self, vectorstore):
+        doc_chunks = {}
+        for chunk_id in vectorstore.index_to_docstore_id.values():
+            doc_chunks.setdefault(chunk_id.rsplit('#', 1)[0], []).append(chunk_id)
+        return doc_chunks
+    
+    def apply_pending_changes(self):
+        """
+        Re-embed only the documents queued by model signals since the last
+        update and upsert/delete them in the vector store by document ID.
+        Returns the number of documents updated.
+        """
+        with self._update_lock:
+            return self._apply_pending_changes()
+    
+    def _apply_pending_changes(self):
+        if not self.vectorstore:
+            return 0
         
-        # Split into chunks
-        print("✂ Splitting documents into chunks...")
-        chunks = split_text(documents)
+        events = list(
+            ChatbotIndexEvent.objects.filter(id__gt=self.last_event_id)
+            .order_by('id').values_list('id', 'doc_id')
+        )
+        if not events:
+            return 0
+        doc_ids = list(dict.fromkeys(doc_id for _, doc_id in events))
         
-        # Build vectorstore
-        print("🧠 Creating vector store...")
-        self.vectorstore = create_vectorstore(chunks)
+        # Render and embed outside the search lock; only the upsert needs it
+        changed = [load_document(doc_id) for doc_id in doc_ids]
+        texts, metadatas, ids = split_text([doc for doc in changed if doc])
+        embedder = get_embeddings()
+        embedder.reset_stats()
+        embeddings = embedder.embed_documents(texts) if texts else []
         
-        print("\n🎉 Chatbot Initialized! Ready to answer questions.\n")
+        with self._lock:
+            if self._index_readonly:
+                import faiss
+                
+                # Copy the mmapped index into private memory before mutating it
+                self.vectorstore.index = faiss.deserialize_index(
+                    faiss.serialize_index(self.vectorstore.index)
+                )
+                self._index_readonly = False
+            
+            stale = [chunk_id for doc_id in doc_ids for chunk_id in self.doc_chunks.get(doc_id, [])]
+            if stale:
+                delete_vectors(self.vectorstore, stale)
+            # Only forget the old chunks once they are really gone from the index
+            for doc_id in doc_ids:
+                self.doc_chunks.pop(doc_id, None)
+            for chunk_id in stale:
+                self.partitions.remove(chunk_id)
+                if self.keyword_index is not None:
+                    self.keyword_index.remove(chunk_id)
+            if texts:
+                add_vectors(self.vectorstore, texts, embeddings, metadatas, ids)
+                for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                    self.doc_chunks.setdefault(metadata['doc_id'], []).append(chunk_id)
+                    self.partitions.add(chunk_id, metadata)
+                    if self.keyword_index is not None:
+                        self.keyword_index.add(chunk_id, text)
+            self.last_event_id = events[-1][0]
         
-    def ask(self, query):
-        """Ask a question and get an answer"""
+        print(f"🔄 Index updated: {len(doc_ids)} documents, {len(texts)} chunks ({embedder.report()})")
+        return len(doc_ids)
+    
+    def start_index_updater(self, interval=None):
+        """Apply queued changes in a background thread every `interval` seconds"""
+        if self._updater is not None:
+            return
+        interval = interval or settings.RAG_INDEX_UPDATE_INTERVAL
+        
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.apply_pending_changes()
+                    ChatbotIndexEvent.objects.filter(
+                        created_at__lt=timezone.now() - timedelta(hours=settings.RAG_INDEX_EVENT_RETENTION_HOURS)
+                    ).delete()
+                except Exception as e:
+                    print(f"⚠️ Incremental index update failed: {e}")
+                finally:
+                    close_old_connections()
+        
+        self._updater = threading.Thread(target=run, name='rag-index-updater', daemon=True)
+        self._updater.start()
+    
+    @property
+    def cache_version(self):
+        """
+        Identifies the data the index was built from across workers: the
+        artifact hash plus the last applied ChatbotIndexEvent, so every worker
+        at the same point shares answers. Answers cached under an older
+        version are never served once a rebuild or an incremental update
+        is live.
+        """
+        return f"{(self.index_hash or 'none')[:16]}.{self.last_event_id}"
+    
+    def embed_query(self, query):
+        """Embed a query, batched with any other queries arriving concurrently"""
+        return self.batcher.embed(query)
+    
+    def embed_documents(self, texts):
+        return get_embeddings().embed_documents(texts)
+    
+    def _embed_queries(self, queries):
+        return get_embeddings().embed_queries(queries)
+    
+    def search(self, query, k=None, embedding=None, user_id=None):
+        """
+        Hybrid search over the shared partition plus `user_id`'s own records,
+        batched with concurrent searches (see search_many())
+        """
+        partitions = partitions_for_user(user_id) if settings.RAG_PARTITIONED_RETRIEVAL else None
+        return self.batcher.search(
+            query, k=k or settings.RAG_RETRIEVAL_K, embedding=embedding, partitions=partitions
+        )
+    
+    def search_many(self, embeddings, k=5, queries=None, partitions=None):
+        """
+        One batched search for a batch of query embeddings; safe against
+        concurrent index updates. Rows with a partition list (see
+        bakery.partitions) only search those partitions; rows without one
+        search the whole index with a single multi-vector FAISS query. With
+        `queries` and hybrid search enabled, each query's vector hits are
+        fused with its BM25 hits by reciprocal rank and optionally re-ranked.
+        Returns one document list per query.
+        """
+        import faiss
+        import numpy as np
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        partitions = partitions or [None] * len(vectors)
+        hybrid = settings.RAG_HYBRID_SEARCH and queries is not None and self.keyword_index is not None
+        candidates = max(k, settings.RAG_HYBRID_CANDIDATES) if hybrid else k
+        with self._lock:
+            vectorstore = self.vectorstore
+            if vectorstore._normalize_L2:
+                faiss.normalize_L2(vectors)
+            
+            rankings = [None] * len(vectors)
+            scoped = [row for row, allowed in enumerate(partitions) if allowed is not None]
+            unscoped = [row for row, allowed in enumerate(partitions) if allowed is None]
+            if scoped:
+                found = self.partitions.search(
+                    vectors[scoped], [partitions[row] for row in scoped], candidates, vectorstore
+                )
+                for row, ranking in zip(scoped, found):
+                    rankings[row] = ranking
+            if unscoped:
+                _, indices = vectorstore.index.search(vectors[unscoped], candidates)
+                for row, positions in zip(unscoped, indices):
+                    rankings[row] = [vectorstore.index_to_docstore_id[i] for i in positions if i != -1]
+            
+            if hybrid:
+                rankings = [
+                    reciprocal_rank_fusion([
+                        dense,
+                        [
+                            chunk_id for chunk_id, _ in self.keyword_index.search(
+                                query, candidates,
+                                allowed=self.partitions.allowed_chunks(allowed) if allowed is not None else None,
+                            )
+                        ],
+                    ])[:candidates]
+                    for dense, query, allowed in zip(rankings, queries, partitions)
+                ]
+            results = [[vectorstore.docstore.search(chunk_id) for chunk_id in ranking] for ranking in rankings]
+        
+        if hybrid:
+            results = [rerank(query, docs) for query, docs in zip(queries, results)]
+        return [docs[:k] for docs in results]
+    
+    def ask(self, query, embedding=None, user_id=None):
+        """Ask a question and get an answer (reusing `embedding` if given)"""
         if not self.vectorstore:
             return "Error: Chatbot not initialized. Call initialize() first."
         
-        return answer_question(query, self.vectorstore, self.llm)
+        docs = self.search(query, embedding=embedding, user_id=user_id)
+        return self.answer(query, docs)
+    
+    def answer(self, query, docs):
+        """Answer from already-retrieved `docs`; raises LLMUnavailable (see bakery.llm_gateway)"""
+        return answer_from_documents(query, docs, self.llm)
+    
+    def stream(self, query, docs):
+        """Stream an answer for already-retrieved `docs` (see search())"""
+        return stream_answer_from_documents(query, docs, self.llm)
     
     def refresh_data(self):
-        """Refresh the vector store with latest database data"""
+        """Apply pending database changes to the vector store incrementally"""
         print("\n🔄 Refreshing database data...")
-        self.initialize()
+        return self.apply_pending_changes()
+    
+    def rebuild(self):
+        """Reload every document and load/build the matching index (blocking)"""
+        print("\n🔄 Rebuilding chatbot index...")
+        self._build()
 
 
 # ---------------------------------------------------
@@ -0,0 +1,146 @@
+"""
+Micro-batching for chatbot retrieval.
+
+Queries that arrive within a few milliseconds of each other are gathered by
+one scheduler thread, embedded in a single model call and searched with a
+single multi-vector FAISS query; each caller then gets its own results back.
+Batch sizes and per-request latency are recorded for /api/chatbot/status/.
+"""
+import math
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+# Latency samples kept for the percentiles
+_LATENCY_WINDOW = 2000
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of `samples` (q in 0..100), or None if empty"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1]
+
+
+class RetrievalRequest:
+    __slots__ = ('query', 'embedding', 'k', 'partitions', 'future', 'submitted')
+
+    def __init__(self, query, embedding, k, partitions=None):
+        self.query = query
+        self.embedding = embedding
+        # None means "embed only"
+        self.k = k
+        # Partitions to search; None searches everything
+        self.partitions = partitions
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Gathers embed/search requests into batches.
+
+    `embed_many(texts)` returns one vector per text and
+    `search_many(vectors, k, queries=texts, partitions=scopes)` returns one
+    result list per vector; both are called from the scheduler thread only.
+    """
+
+    def __init__(self, embed_many, search_many, max_batch_size=16, max_wait_ms=5):
+        self.embed_many = embed_many
+        self.search_many = search_many
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=_LATENCY_WINDOW)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='rag-retrieval-batcher', daemon=True)
+                    self._thread.start()
+
+    def submit(self, query, embedding=None, k=None, partitions=None):
+        """Queue a request and block until its batch has run"""
+        self._ensure_started()
+        request = RetrievalRequest(query, embedding, k, partitions)
+        self._queue.put(request)
+        return request.future.result()
+
+    def embed(self, query):
+        return self.submit(query)
+
+    def search(self, query, k=5, embedding=None, partitions=None):
+        return self.submit(query, embedding=embedding, k=k, partitions=partitions)
+
+    def _collect(self):
+        """Block for one request, then take whatever else arrives in the window"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _process(self, batch):
+        to_embed = [request for request in batch if request.embedding is None]
+        if to_embed:
+            for request, vector in zip(to_embed, self.embed_many([request.query for request in to_embed])):
+                request.embedding = vector
+
+        searches = [request for request in batch if request.k is not None]
+        if searches:
+            k = max(request.k for request in searches)
+            results = self.search_many(
+                [request.embedding for request in searches], k,
+                queries=[request.query for request in searches],
+                partitions=[request.partitions for request in searches],
+            )
+            for request, docs in zip(searches, results):
+                request.future.set_result(docs[:request.k])
+
+        done = time.perf_counter()
+        for request in batch:
+            if request.k is None:
+                request.future.set_result(request.embedding)
+        with self._stats_lock:
+            self.batch_sizes[len(batch)] += 1
+            self.latencies.extend(done - request.submitted for request in batch)
+
+    def stats(self):
+        with self._stats_lock:
+            sizes = dict(sorted(self.batch_sizes.items()))
+            latencies = list(self.latencies)
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'requests': requests,
+            'mean_batch_size': round(requests / batches, 2) if batches else None,
+            'batch_sizes': sizes,
+            'p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+            'p99_ms': round(p99 * 1000, 2) if p99 is not None else None,
+        }
@@ -0,0 +1,232 @@
+"""
+Local retrieval sidecar for the RAG chatbot.
+
+One process (`manage.py run_retrieval_service`) owns the embedding model and
+the vector index and answers embed/search calls over a Unix socket. Gunicorn
+workers talk to it through SidecarRAGChatbot, which keeps only the LLM client,
+so torch and the index are loaded once per host instead of once per worker.
+
+Messages are length-prefixed JSON: a 4-byte big-endian size, then the body.
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import time
+from collections import namedtuple
+
+_HEADER = struct.Struct('>I')
+
+# What the sidecar returns for a search hit; has the page_content/metadata
+# attributes build_messages() and the views expect from LangChain documents
+RetrievedDocument = namedtuple('RetrievedDocument', ['page_content', 'metadata'])
+
+
+class RetrievalServiceError(RuntimeError):
+    """The sidecar could not be reached or reported an error"""
+
+
+def send_message(sock, payload):
+    body = json.dumps(payload).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            raise ConnectionError('retrieval socket closed mid-message')
+        data.extend(part)
+    return bytes(data)
+
+
+def recv_message(sock):
+    """Read one message, or return None if the peer closed the connection"""
+    header = sock.recv(_HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        header += _recv_exact(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+
+# ---------------------------------------------------
+# SERVER
+# ---------------------------------------------------
+class RetrievalRequestHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            if request is None:
+                return
+            try:
+                response = {'result': self.server.dispatch(request)}
+            except Exception as e:
+                print(f"❌ Retrieval service error in {request.get('op')!r}: {e}")
+                response = {'error': str(e)}
+            send_message(self.request, response)
+
+
+class RetrievalServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server in front of one DatabaseRAGChatbot"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, chatbot):
+        self.chatbot = chatbot
+        if os.path.exists(socket_path):
+            # Left behind by a previous run that did not shut down cleanly
+            os.unlink(socket_path)
+        os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+        super().__init__(socket_path, RetrievalRequestHandler)
+        # Only the owning user/group (gunicorn) may connect
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+    def dispatch(self, request):
+        op = request.get('op')
+        chatbot = self.chatbot
+        if op == 'embed':
+            return [list(map(float, vector)) for vector in chatbot.embed_documents(request['texts'])]
+        if op == 'embed_query':
+            return [float(x) for x in chatbot.embed_query(request['text'])]
+        if op == 'search':
+            docs = chatbot.search(
+                request.get('query'), k=request.get('k'), embedding=request.get('embedding'),
+                user_id=request.get('user_id'),
+            )
+            return [{'page_content': doc.page_content, 'metadata': doc.metadata} for doc in docs]
+        if op == 'version':
+            return {
+                'cache_version': chatbot.cache_version,
+                'generation': chatbot.generation,
+                'last_event_id': chatbot.last_event_id,
+            }
+        if op == 'status':
+            return chatbot.status()
+        if op == 'refresh':
+            return chatbot.refresh_data()
+        if op == 'rebuild':
+            return chatbot.rebuild_async()
+        raise ValueError(f"unknown op {op!r}")
+
+
+# ---------------------------------------------------
+# CLIENT
+# ---------------------------------------------------
+class RetrievalClient:
+    """Thin client for the retrieval sidecar (one connection per call)"""
+
+    def __init__(self, socket_path, timeout=10):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def call(self, op, **payload):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                send_message(sock, dict(payload, op=op))
+                response = recv_message(sock)
+        except OSError as e:
+            raise RetrievalServiceError(f"retrieval service at {self.socket_path} unavailable: {e}") from e
+        if response is None:
+            raise RetrievalServiceError('retrieval service closed the connection')
+        if 'error' in response:
+            raise RetrievalServiceError(response['error'])
+        return response['result']
+
+    def embed_documents(self, texts):
+        return self.call('embed', texts=list(texts))
+
+    def embed_query(self, text):
+        return self.call('embed_query', text=text)
+
+    def search(self, query, k=None, embedding=None, user_id=None):
+        hits = self.call(
+            'search', query=query, k=k, user_id=user_id,
+            embedding=None if embedding is None else [float(x) for x in embedding],
+        )
+        return [RetrievedDocument(hit['page_content'], hit['metadata']) for hit in hits]
+
+
+class SidecarRAGChatbot:
+    """
+    Worker-side chatbot that delegates embedding and search to the sidecar
+    and only generates answers locally. Mirrors DatabaseRAGChatbot's API.
+    """
+
+    # Seconds a fetched index version is trusted before asking again
+    VERSION_TTL = 1.0
+
+    def __init__(self, client, groq_api_key):
+        from .llm_gateway import LLMGateway
+
+        self.client = client
+        self.llm = LLMGateway(groq_api_key)
+        self._version = None
+        self._version_checked = 0.0
+
+    def initialize(self):
+        """Fail fast if the sidecar is not running"""
+        self._refresh_version(force=True)
+        print(f"✅ Using retrieval service at {self.client.socket_path}")
+
+    def start_index_updater(self, interval=None):
+        # The sidecar applies index updates for every worker
+        return None
+
+    def _refresh_version(self, force=False):
+        if force or time.monotonic() - self._version_checked > self.VERSION_TTL:
+            self._version = self.client.call('version')
+            self._version_checked = time.monotonic()
+        return self._version
+
+    @property
+    def cache_version(self):
+        return self._refresh_version()['cache_version']
+
+    @property
+    def generation(self):
+        return self._refresh_version()['generation']
+
+    def embed_query(self, query):
+        return self.client.embed_query(query)
+
+    def search(self, query, k=None, embedding=None, user_id=None):
+        return self.client.search(query, k=k, embedding=embedding, user_id=user_id)
+
+    def ask(self, query, embedding=None, user_id=None):
+        docs = self.search(query, embedding=embedding, user_id=user_id)
+        return self.answer(query, docs)
+
+    def answer(self, query, docs):
+        from .rag_chatbot import answer_from_documents
+
+        return answer_from_documents(query, docs, self.llm)
+
+    def stream(self, query, docs):
+        from .rag_chatbot import stream_answer_from_documents
+
+        return stream_answer_from_documents(query, docs, self.llm)
+
+    def refresh_data(self):
+        return self.client.call('refresh')
+
+    def rebuild_async(self):
+        return self.client.call('rebuild')
+
+    def status(self):
+        return dict(self.client.call('status'), retrieval_service=self.client.socket_path, llm=self.llm.stats())
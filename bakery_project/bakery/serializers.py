@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import MenuItem, Order, OrderItem, Payment, UserProfile
+from .order_ids import new_order_id, new_transaction_id
 from decimal import Decimal
-import uuid
 from django.utils import timezone
 
 
@@ -165,7 +165,7 @@ class OrderCreateSerializer(serializers.Serializer):
         # Create order
         order = Order.objects.create(
             user=user,
-            order_id=f"ORD{str(uuid.uuid4())[:8].upper()}",
+            order_id=new_order_id(),
             total_amount=total,
             delivery_fee=validated_data.get('delivery_fee', Decimal('5.00')),
             delivery_address=validated_data.get('delivery_address', ''),
@@ -191,7 +191,7 @@ class OrderCreateSerializer(serializers.Serializer):
                 order=order,
                 payment_method=payment_method,
                 payment_status='pending',
-                transaction_id=f"TXN{str(uuid.uuid4())[:12].upper()}",
+                transaction_id=new_transaction_id(),
                 amount=order.grand_total,
                 upi_id=validated_data.get('upi_id', '')
             )
@@ -226,7 +226,7 @@ class PaymentCreateSerializer(serializers.Serializer):
             order=order,
             payment_method=validated_data['payment_method'],
             payment_status='pending',
-            transaction_id=f"TXN{str(uuid.uuid4())[:12].upper()}",
+            transaction_id=new_transaction_id(),
             amount=order.grand_total,
             upi_id=validated_data.get('upi_id', ''),
             card_last4=validated_data.get('card_last4', '')
@@ -0,0 +1,50 @@
+"""
+Signal handlers that keep the chatbot index in sync with the database.
+Every save/delete queues the affected document IDs; the incremental indexer
+in rag_chatbot.py re-embeds only those documents. Menu changes also invalidate the in-memory
+menu search index (menu_search.py) in every process.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .menu_search import bump_menu_version
+from .models import MenuItem, Order, OrderItem, Payment, UserProfile, ChatbotIndexEvent
+
+
+def _doc_id(instance):
+    return ChatbotIndexEvent.doc_id_for(instance._meta.model_name, instance.pk)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def mark_record_dirty(sender, instance, **kwargs):
+    ChatbotIndexEvent.mark_dirty(_doc_id(instance))
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def invalidate_menu_index(sender, instance, **kwargs):
+    bump_menu_version()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def mark_order_item_dirty(sender, instance, **kwargs):
+    # Order items are indexed as part of their order's document
+    ChatbotIndexEvent.mark_dirty(ChatbotIndexEvent.doc_id_for('order', instance.order_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_user_dirty(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not part of the user document
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    ChatbotIndexEvent.mark_dirty(_doc_id(instance))
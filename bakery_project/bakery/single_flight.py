@@ -0,0 +1,205 @@
+"""
+Single-flight coalescing of identical chatbot questions.
+
+When several people ask the same question at once (a table scanning the same
+QR code), only one request runs retrieval + the LLM; the others wait for its
+result. Within a worker, waiters block on an Event; across workers, the first
+one takes a lock and publishes its result in the shared 'chatbot' cache for
+the others, which poll until it appears.
+
+The lock has to be atomic. With the default file-based cache it is an
+exclusive flock on a per-key file next to the cache (one host, released by
+the kernel if the worker dies); with other backends it is cache.add(), which
+is atomic on Redis, Memcached and the database cache but not on the
+file-based one, whose add() is check-then-set.
+
+If the computing request fails or takes longer than CHATBOT_COALESCE_TIMEOUT,
+waiters give up and compute the answer themselves.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+from .answer_cache import normalize_query
+
+
+def flight_key(query, version):
+    """Coalescing key: normalised question within one index version and retrieval scope"""
+    digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+    return f"{version}:{digest}"
+
+
+class _LocalCall:
+    __slots__ = ('done', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class Flight:
+    """
+    One request's part in a coalesced computation. `result` is the shared
+    result if another request computed it; if None, compute it yourself and
+    publish() it. Use as a context manager so waiters are always released.
+    """
+
+    def __init__(self, group, key, call, owner):
+        self.group = group
+        self.key = key
+        self.call = call
+        # The first request in this process; it releases the local waiters
+        self.owner = owner
+        # Releases the cross-worker lock, if this request holds it
+        self.release_lock = None
+        self.result = None
+
+    def publish(self, result):
+        self.result = result
+        if self.release_lock is not None:
+            self.group.cache.set(self.group.result_key(self.key), result, self.group.result_ttl)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.owner:
+            with self.group._lock:
+                self.group._calls.pop(self.key, None)
+            self.call.result = self.result
+            self.call.done.set()
+        if self.release_lock is not None:
+            self.release_lock()
+        return False
+
+
+class FileLock:
+    """
+    Non-blocking exclusive flock on a file. The file is removed on release;
+    a lock taken on a file that was just removed is given up, so two workers
+    can never both hold the lock for the same path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self):
+        import fcntl
+
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            current = os.stat(self.path).st_ino
+        except (BlockingIOError, FileNotFoundError):
+            os.close(fd)
+            return False
+        if os.fstat(fd).st_ino != current:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        os.close(self.fd)
+        self.fd = None
+
+
+class SingleFlight:
+    """Coalesces concurrent computations with the same key, in-process and across workers"""
+
+    def __init__(self, alias='chatbot', timeout=None, result_ttl=None, poll_interval=None, shared=True):
+        self.alias = alias
+        self.timeout = timeout or settings.CHATBOT_COALESCE_TIMEOUT
+        self.result_ttl = result_ttl or settings.CHATBOT_COALESCE_RESULT_TTL
+        self.poll_interval = (poll_interval or settings.CHATBOT_COALESCE_POLL_MS) / 1000
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counts = {'led': 0, 'joined_local': 0, 'joined_shared': 0}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def lock_key(self, key):
+        return f"chatbot-flight-lock:{key}"
+
+    def _acquire_lock(self, key):
+        """Take the cross-worker lock for `key`; returns its release function, or None if held elsewhere"""
+        cache = self.cache
+        if isinstance(cache, FileBasedCache):
+            lock_dir = os.path.join(cache._dir, 'flight-locks')
+            os.makedirs(lock_dir, exist_ok=True)
+            lock = FileLock(os.path.join(lock_dir, hashlib.sha1(key.encode('utf-8')).hexdigest()))
+            return lock.release if lock.acquire() else None
+        # Lock expiry bounds how long a crashed worker can hold others up
+        if cache.add(self.lock_key(key), True, self.timeout):
+            return lambda: cache.delete(self.lock_key(key))
+        return None
+
+    def result_key(self, key):
+        return f"chatbot-flight-result:{key}"
+
+    def join(self, key):
+        """Enter the flight for `key`; blocks while someone else is computing it"""
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = _LocalCall()
+
+        flight = Flight(self, key, call, owner)
+        if not owner:
+            # Same question already running in this worker
+            if call.done.wait(self.timeout) and call.result is not None:
+                flight.result = call.result
+                self._count('joined_local')
+                return flight
+        elif self.shared:
+            flight.result = self._join_shared(flight)
+            if flight.result is not None:
+                self._count('joined_shared')
+                return flight
+        self._count('led')
+        return flight
+
+    def _join_shared(self, flight):
+        """Take the cross-worker lock (returns None) or wait for the holder's result"""
+        cache = self.cache
+        deadline = time.monotonic() + self.timeout
+        while True:
+            result = cache.get(self.result_key(flight.key))
+            if result is not None:
+                return result
+            release_lock = self._acquire_lock(flight.key)
+            if release_lock is not None:
+                # The previous holder may have published and released between our two reads
+                result = cache.get(self.result_key(flight.key))
+                if result is not None:
+                    release_lock()
+                    return result
+                flight.release_lock = release_lock
+                return None
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, in_flight=len(self._calls))
@@ -1,7 +1,11 @@
 # Django Test File
-from django.test import TestCase
+import time
+from importlib.util import find_spec
+from unittest import skipUnless
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
-from .models import MenuItem, Order, OrderItem
+from .models import MenuItem, Order, OrderItem, ChatbotIndexEvent
+from .chatbot_intents import ORDER_ID_RE, route_query
 
 
 class MenuItemTestCase(TestCase):
@@ -54,3 +58,1063 @@ class OrderTestCase(TestCase):
         self.assertEqual(order.items.count(), 1)
         self.assertEqual(order.status, 'pending')
         self.assertEqual(order.total_amount, 30.00)
+
+
+class ChatbotIndexEventTestCase(TestCase):
+    def test_changes_queue_index_events(self):
+        """Test that model saves/deletes queue the affected chatbot documents"""
+        item = MenuItem.objects.create(name="Test Muffin", price=3, category="muffin")
+        order = Order.objects.create(order_id="TEST456", total_amount=3)
+        order_item = OrderItem.objects.create(order=order, menu_item=item, quantity=1, price=3)
+        order_item.delete()
+        
+        doc_ids = list(ChatbotIndexEvent.objects.values_list('doc_id', flat=True))
+        self.assertIn(f"menuitem:{item.pk}", doc_ids)
+        self.assertFalse(any(doc_id.startswith('orderitem:') for doc_id in doc_ids))
+        # Order created, then touched by the item save and the item delete
+        self.assertEqual(doc_ids.count(f"order:{order.pk}"), 3)
+
+
+class EmbeddingCacheTestCase(TestCase):
+    def test_cache_counts_hits_and_keys_by_model(self):
+        """Test that only unseen chunks are embedded, hits are counted and a new model misses"""
+        import tempfile
+        from langchain_core.embeddings import Embeddings
+        from .embedding_cache import CachedEmbeddings
+        
+        class CountingEmbeddings(Embeddings):
+            def __init__(self):
+                self.embedded = []
+            
+            def embed_documents(self, texts):
+                self.embedded.extend(texts)
+                return [[float(len(text)), 1.0] for text in texts]
+            
+            def embed_query(self, text):
+                return [float(len(text)), 1.0]
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/embeddings.sqlite3"
+            model = CountingEmbeddings()
+            cache = CachedEmbeddings(model, 'model-a', path)
+            self.assertEqual(cache.embed_documents(["cake", "bread", "cake"]), [[4.0, 1.0], [5.0, 1.0], [4.0, 1.0]])
+            self.assertEqual(model.embedded, ["cake", "bread"])
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            
+            # A fresh process (new instance, same file) reuses the stored vectors
+            cache = CachedEmbeddings(model, 'model-a', path)
+            cache.embed_documents(["cake", "bread", "cookie"])
+            self.assertEqual(model.embedded, ["cake", "bread", "cookie"])
+            self.assertEqual(cache.stats()['hits'], 2)
+            self.assertAlmostEqual(cache.stats()['hit_rate'], 2 / 3)
+            
+            # Another model never sees model-a's vectors
+            cache = CachedEmbeddings(model, 'model-b', path)
+            cache.embed_documents(["cake"])
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertEqual(model.embedded[-1], "cake")
+
+
+class ChatbotIntentTestCase(TestCase):
+    INFO = "Store Hours:\nMonday to Friday: 8:00 AM - 8:00 PM\n\nDelivery Information:\n- Free delivery for orders above ₹500\n"
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.cake = MenuItem.objects.create(name="Chocolate Cake", price=25, category="cake")
+        self.order = Order.objects.create(order_id="ORD20250101ABCD", user=self.owner, total_amount=25,
+                                          status="preparing")
+        OrderItem.objects.create(order=self.order, menu_item=self.cake, quantity=1, price=25)
+    
+    def test_order_status_and_price_fast_path(self):
+        """Test that exact lookups are answered without RAG"""
+        routed = route_query("status of ord20250101abcd?", self.INFO, self.owner.id)
+        self.assertEqual(routed.intent, 'order_status')
+        self.assertIn("Preparing", routed.answer)
+        
+        routed = route_query("What is the price of chocolate cake", self.INFO)
+        self.assertEqual(routed.intent, 'item_price')
+        self.assertIn("₹25", routed.answer)
+        
+        self.assertEqual(route_query("what are your opening hours", self.INFO).intent, 'store_hours')
+    
+    def test_specific_questions_fall_through_to_rag(self):
+        """Test that questions a lookup cannot fully answer go to RAG"""
+        self.assertIsNone(route_query("Is the chocolate cake eggless?", self.INFO))
+        self.assertIsNone(route_query("Who built this chatbot?", self.INFO))
+        self.assertIsNone(route_query("Can you deliver a custom cake to Banjara Hills tomorrow?", self.INFO))
+        self.assertIsNone(route_query("email me my receipt", self.INFO))
+        for query in ["I ordered a cake yesterday", "How does ordering work?", "Ordinary bread?"]:
+            self.assertIsNone(ORDER_ID_RE.search(query))
+    
+    def test_order_status_only_for_owner(self):
+        """Test that order status is only answered for the order's owner"""
+        stranger = User.objects.create_user(username="stranger")
+        self.assertIsNone(route_query("status of ORD20250101ABCD", self.INFO))
+        self.assertIsNone(route_query("status of ORD20250101ABCD", self.INFO, stranger.id))
+
+
+class WebStartupTestCase(TestCase):
+    def test_web_tier_does_not_import_chatbot_stack(self):
+        """Test that booting Django and the URLconf leaves LangChain/FAISS/torch unloaded"""
+        from .management.commands.bench_startup import run_scenario, WEB_SCENARIO
+        
+        self.assertEqual(run_scenario(WEB_SCENARIO)['heavy_modules'], [])
+
+
+class RetrievalServiceTestCase(TestCase):
+    class FakeChatbot:
+        cache_version = 'abc123.7'
+        generation = 2
+        last_event_id = 7
+        
+        def embed_query(self, text):
+            return [float(len(text)), 0.0]
+        
+        def search(self, query, k=5, embedding=None, user_id=None):
+            from .retrieval_service import RetrievedDocument
+            return [RetrievedDocument(f"{query} #{n}", {'doc_id': f"menuitem:{n}"}) for n in range(k)]
+    
+    def test_client_round_trip_over_unix_socket(self):
+        """Test that embed/search calls reach the sidecar and come back as documents"""
+        import tempfile, threading
+        from .retrieval_service import RetrievalClient, RetrievalServer
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            server = RetrievalServer(f"{tmp}/retrieval.sock", self.FakeChatbot())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                client = RetrievalClient(server.server_address)
+                self.assertEqual(client.embed_query("cake"), [4.0, 0.0])
+                docs = client.search("cake", k=2)
+                self.assertEqual([doc.page_content for doc in docs], ["cake #0", "cake #1"])
+                self.assertEqual(docs[1].metadata['doc_id'], "menuitem:1")
+                self.assertEqual(client.call('version'),
+                                 {'cache_version': 'abc123.7', 'generation': 2, 'last_event_id': 7})
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+class MicroBatcherTestCase(TestCase):
+    def test_concurrent_searches_share_one_batch(self):
+        """Test that queries arriving together are embedded and searched in one call"""
+        import threading
+        from .retrieval_batcher import MicroBatcher
+        
+        calls = []
+        
+        def embed_many(texts):
+            calls.append(('embed', len(texts)))
+            return [[float(len(text))] for text in texts]
+        
+        def search_many(vectors, k, queries=None, partitions=None):
+            calls.append(('search', len(vectors)))
+            return [[f"hit {vector[0]:.0f}.{n}" for n in range(k)] for vector in vectors]
+        
+        batcher = MicroBatcher(embed_many, search_many, max_batch_size=8, max_wait_ms=200)
+        results = {}
+        queries = ["a" * n for n in range(1, 7)]
+        threads = [
+            threading.Thread(target=lambda q=q: results.__setitem__(q, batcher.search(q, k=2)))
+            for q in queries
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results["aaa"], ["hit 3.0", "hit 3.1"])
+        self.assertLess(len(calls), 2 * len(queries))
+        self.assertEqual(batcher.stats()['requests'], len(queries))
+
+
+class BackgroundRebuildTestCase(TransactionTestCase):
+    def test_rebuild_runs_in_background_and_swaps_atomically(self):
+        """Test that a background rebuild reports progress, keeps serving the old index and then swaps"""
+        import contextlib
+        import io
+        import tempfile
+        import threading
+        from unittest import mock
+        from . import rag_chatbot
+        from .embedding_cache import CachedEmbeddings
+        from .rag_benchmark import _hashing_embeddings_class
+        
+        MenuItem.objects.create(name="Chocolate Cake", price=450, category="cake")
+        release = threading.Event()
+        building = threading.Event()
+        load_or_build = rag_chatbot.load_or_build_vectorstore
+        
+        def slow_load_or_build(iter_documents):
+            if chatbot.generation:
+                building.set()
+                release.wait(5)
+            return load_or_build(iter_documents)
+        
+        with tempfile.TemporaryDirectory() as directory, \
+                self.settings(RAG_INDEX_DIR=directory, RAG_EMBEDDING_CACHE_PATH=f"{directory}/cache.sqlite3"), \
+                mock.patch.object(rag_chatbot, '_embeddings', CachedEmbeddings(
+                    _hashing_embeddings_class()(), 'hashing-384', f"{directory}/cache.sqlite3")), \
+                mock.patch.object(rag_chatbot, 'load_or_build_vectorstore', slow_load_or_build), \
+                contextlib.redirect_stdout(io.StringIO()):
+            chatbot = rag_chatbot.DatabaseRAGChatbot(None, use_llm=False)
+            chatbot.initialize()
+            self.assertEqual(chatbot.status()['generation'], 1)
+            old_store = chatbot.vectorstore
+            documents_before = chatbot.status()['document_count']
+            
+            MenuItem.objects.create(name="Sourdough Loaf", price=120, category="bread")
+            self.assertTrue(chatbot.rebuild_async())
+            self.assertTrue(building.wait(5))
+            self.assertFalse(chatbot.rebuild_async())
+            status = chatbot.status()
+            self.assertEqual((status['generation'], status['build']['state']), (1, 'building'))
+            self.assertGreaterEqual(status['build']['progress'], 0)
+            self.assertLessEqual(status['build']['progress'], 1)
+            # The old index keeps answering during the build
+            self.assertIs(chatbot.vectorstore, old_store)
+            self.assertTrue(chatbot.search("chocolate cake", k=1))
+            
+            release.set()
+            chatbot._builder.join(10)
+            status = chatbot.status()
+            self.assertEqual((status['generation'], status['build']['state']), (2, 'idle'))
+            self.assertIsNotNone(status['build']['last_build_seconds'])
+            self.assertIsNot(chatbot.vectorstore, old_store)
+            self.assertEqual(status['document_count'], documents_before + 1)
+            sourdough = MenuItem.objects.get(name="Sourdough Loaf")
+            self.assertIn(f"menuitem:{sourdough.pk}", chatbot.doc_chunks)
+
+
+class DatabaseDocumentsTestCase(TestCase):
+    def add_customer(self, name, orders=1, items=2):
+        """A customer with a profile and `orders` paid orders of `items` lines each"""
+        from .models import Payment, UserProfile
+        
+        user = User.objects.create_user(username=name, email=f"{name}@example.com")
+        UserProfile.objects.create(user=user, phone="9000000000", city="Hyderabad")
+        placed = []
+        for n in range(orders):
+            order = Order.objects.create(user=user, order_id=f"ORD-{name}-{n}", total_amount=100 * items)
+            for line in range(items):
+                item = MenuItem.objects.create(name=f"{name} item {n}.{line}", price=100, category="cake")
+                OrderItem.objects.create(order=order, menu_item=item, quantity=1, price=100)
+            Payment.objects.create(order=order, payment_method="upi", transaction_id=f"TXN-{name}-{n}",
+                                   amount=100 * items)
+            placed.append(order)
+        return user, placed
+    
+    def load(self):
+        import contextlib
+        import io
+        from .rag_chatbot import iter_database_documents
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(iter_database_documents(chunk_size=50))
+    
+    def test_loader_query_count_does_not_grow_with_rows(self):
+        """Test that streaming the documents costs the same number of queries for 1 order or many"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self.add_customer("asha")
+        with CaptureQueriesContext(connection) as few:
+            documents = self.load()
+        
+        self.add_customer("ravi", orders=5, items=4)
+        self.add_customer("meena", orders=3, items=3)
+        with self.assertNumQueries(len(few.captured_queries)):
+            more = self.load()
+        self.assertEqual(len(more) - len(documents), 2 * 2 + (5 + 3) * 2 + 5 * 4 + 3 * 3)
+    
+    def test_each_record_is_its_own_document_with_typed_metadata(self):
+        """Test that every record becomes one document whose chunks carry its type, pk, owner and creation time"""
+        from .rag_chatbot import INFO_DOC_ID, iter_chunks
+        
+        user, (order,) = self.add_customer("asha", items=2)
+        guest_order = Order.objects.create(order_id="ORD-guest", total_amount=50, customer_name="Walk-in")
+        records = {
+            f"user:{user.pk}": ('user', user, user.pk, user.date_joined),
+            f"userprofile:{user.profile.pk}": ('userprofile', user.profile, user.pk, user.profile.created_at),
+            f"order:{order.pk}": ('order', order, user.pk, order.created_at),
+            f"order:{guest_order.pk}": ('order', guest_order, None, guest_order.created_at),
+            f"payment:{order.payment.pk}": ('payment', order.payment, user.pk, order.payment.created_at),
+        }
+        for line in order.items.all():
+            item = line.menu_item
+            records[f"menuitem:{item.pk}"] = ('menuitem', item, None, item.created_at)
+        
+        documents = {doc_id: (text, metadata) for doc_id, text, metadata in self.load()}
+        self.assertEqual(set(documents), set(records) | {INFO_DOC_ID})
+        for doc_id, (doc_type, record, user_id, created_at) in records.items():
+            self.assertEqual(documents[doc_id][1], {
+                'type': doc_type, 'pk': record.pk, 'user_id': user_id, 'created_at': created_at.isoformat(),
+            })
+        self.assertIn(order.order_id, documents[f"order:{order.pk}"][0])
+        self.assertNotIn(guest_order.order_id, documents[f"order:{order.pk}"][0])
+        
+        chunks = list(iter_chunks((doc_id, text, metadata) for doc_id, (text, metadata) in documents.items()))
+        self.assertEqual({chunk_id.rsplit('#', 1)[0] for _, _, chunk_id in chunks}, set(documents))
+        for text, metadata, chunk_id in chunks:
+            doc_id = chunk_id.rsplit('#', 1)[0]
+            self.assertEqual(metadata, dict(documents[doc_id][1], doc_id=doc_id))
+            self.assertIn(text.strip(), documents[doc_id][0])
+
+
+class PersistedIndexTestCase(TestCase):
+    def setUp(self):
+        import contextlib
+        import io
+        import tempfile
+        from unittest import mock
+        from . import rag_chatbot
+        from .embedding_cache import CachedEmbeddings
+        from .rag_benchmark import _hashing_embeddings_class
+        
+        MenuItem.objects.create(name="Chocolate Cake", price=450, category="cake")
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(self.settings(RAG_INDEX_DIR=f"{directory}/index"))
+        self.embeddings = CachedEmbeddings(_hashing_embeddings_class()(), 'hashing-384', f"{directory}/cache.sqlite3")
+        stack.enter_context(mock.patch.object(rag_chatbot, '_embeddings', self.embeddings))
+        self.builds = stack.enter_context(
+            mock.patch.object(rag_chatbot, 'create_vectorstore', wraps=rag_chatbot.create_vectorstore)
+        )
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+    
+    def start_worker(self):
+        """A fresh chatbot, as a newly started worker process would create"""
+        from .rag_chatbot import DatabaseRAGChatbot
+        
+        chatbot = DatabaseRAGChatbot(None, use_llm=False)
+        chatbot.initialize()
+        return chatbot
+    
+    def test_new_worker_loads_the_artifact_without_embedding(self):
+        """Test that a second chatbot loads the artifact persisted for the same content hash instead of embedding"""
+        import os
+        from unittest import mock
+        from .rag_chatbot import get_index_path
+        
+        first = self.start_worker()
+        self.assertEqual(self.builds.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(get_index_path(first.index_hash), 'index.faiss')))
+        
+        with mock.patch.object(self.embeddings, 'embed_documents') as embed_documents:
+            second = self.start_worker()
+        embed_documents.assert_not_called()
+        self.assertEqual(self.builds.call_count, 1)
+        self.assertEqual(second.index_hash, first.index_hash)
+        self.assertEqual(second.vectorstore.index.ntotal, first.vectorstore.index.ntotal)
+        self.assertTrue(second.search("chocolate cake", k=1))
+    
+    def test_changed_corpus_builds_a_new_artifact(self):
+        """Test that a change to the source records gives a new content hash and a rebuild"""
+        import os
+        from .rag_chatbot import get_index_path
+        
+        first = self.start_worker()
+        MenuItem.objects.create(name="Sourdough Loaf", price=120, category="bread")
+        second = self.start_worker()
+        self.assertEqual(self.builds.call_count, 2)
+        self.assertNotEqual(second.index_hash, first.index_hash)
+        self.assertEqual(second.vectorstore.index.ntotal, first.vectorstore.index.ntotal + 1)
+        for chatbot in (first, second):
+            self.assertTrue(os.path.exists(get_index_path(chatbot.index_hash)))
+
+
+class VectorIndexTestCase(TestCase):
+    def test_numpy_index_matches_faiss_flat(self):
+        """Test that the NumPy brute-force index returns the same neighbours as FAISS"""
+        import faiss
+        import numpy as np
+        from .vector_index import NumpyIndex
+        
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 16)).astype(np.float32)
+        queries = rng.standard_normal((5, 16)).astype(np.float32)
+        flat = faiss.IndexFlatL2(16)
+        flat.add(vectors)
+        index = NumpyIndex.from_faiss(flat)
+        self.assertEqual(index.search(queries, 5)[1].tolist(), flat.search(queries, 5)[1].tolist())
+        
+        index.remove_ids(np.array([0, 1]))
+        flat.remove_ids(np.array([0, 1], dtype=np.int64))
+        self.assertEqual(index.search(queries, 3)[1].tolist(), flat.search(queries, 3)[1].tolist())
+    
+    def test_index_kind_follows_chunk_count(self):
+        """Test that small corpora use NumPy, medium flat FAISS and large IVF"""
+        from .vector_index import select_index_kind
+        
+        with self.settings(RAG_INDEX_KIND='auto', RAG_INDEX_NUMPY_MAX_CHUNKS=100, RAG_INDEX_IVF_MIN_CHUNKS=1000):
+            self.assertEqual(select_index_kind(50), 'numpy')
+            self.assertEqual(select_index_kind(500), 'flat')
+            self.assertEqual(select_index_kind(5000), 'ivf')
+
+
+@skipUnless(find_spec('sentence_transformers') and find_spec('onnxruntime'), "needs both embedding backends")
+class OnnxEmbeddingParityTestCase(TestCase):
+    TEXTS = [
+        "What is the price of chocolate cake?",
+        "Do you deliver to Banjara Hills?",
+        "Order ORD20250101ABCD status",
+        "Sourdough Bread (Bread) costs ₹120 and is available.",
+        "Which payment methods do you accept?",
+    ]
+    
+    def test_onnx_matches_torch_embeddings(self):
+        """Test that the int8 ONNX backend stays within quantization error of PyTorch"""
+        import numpy as np
+        from .rag_chatbot import load_embedding_model
+        from .onnx_embeddings import OnnxEmbeddings
+        
+        try:
+            onnx_model = OnnxEmbeddings.from_settings()
+            torch_model, _ = load_embedding_model('torch')
+        except Exception as e:
+            self.skipTest(f"embedding backends unavailable: {e}")
+        
+        onnx_vectors = np.array(onnx_model.embed_documents(self.TEXTS))
+        torch_vectors = np.array(torch_model.embed_documents(self.TEXTS))
+        cosine = (onnx_vectors * torch_vectors).sum(axis=1) / (
+            np.linalg.norm(onnx_vectors, axis=1) * np.linalg.norm(torch_vectors, axis=1)
+        )
+        self.assertGreater(cosine.min(), 0.98)
+
+
+class HybridRetrievalTestCase(TestCase):
+    def test_keyword_index_finds_exact_ids(self):
+        """Test that BM25 ranks the chunk with an exact order ID first and fusion keeps it"""
+        from .keyword_index import BM25Index, reciprocal_rank_fusion
+        
+        index = BM25Index()
+        index.add('order:1#0', "Order ID: ORD-1A2B3C4D\nStatus: Pending\nItems: 2x Chocolate Cake")
+        index.add('order:2#0', "Order ID: ORD-9Z8Y7X6W\nStatus: Delivered\nItems: 1x Vanilla Cake")
+        index.add('menuitem:1#0', "Menu Item: Chocolate Cake\nPrice: ₹450")
+        
+        hits = index.search("status of ord-1a2b3c4d", k=3)
+        self.assertEqual(hits[0][0], 'order:1#0')
+        
+        fused = reciprocal_rank_fusion([['menuitem:1#0', 'order:2#0', 'order:1#0'], [hits[0][0]]], k=60)
+        self.assertEqual(fused[0], 'order:1#0')
+        
+        index.remove('order:1#0')
+        self.assertNotIn('order:1#0', [chunk_id for chunk_id, _ in index.search("ORD-1A2B3C4D")])
+
+
+class PartitionedRetrievalTestCase(TestCase):
+    def test_users_only_search_shared_and_own_chunks(self):
+        """Test that a user's query never reaches another customer's records"""
+        import numpy as np
+        from types import SimpleNamespace
+        from .partitions import PartitionMap, partition_for, partitions_for_user
+        from .vector_index import NumpyIndex
+        
+        self.assertEqual(partition_for({'type': 'menuitem', 'user_id': None}), 'shared')
+        self.assertEqual(partition_for({'type': 'order', 'user_id': 7}), 'user:7')
+        self.assertIsNone(partition_for({'type': 'order', 'user_id': None}))
+        
+        metadata = {
+            'menuitem:1#0': {'type': 'menuitem'},
+            'order:1#0': {'type': 'order', 'user_id': 1},
+            'order:2#0': {'type': 'order', 'user_id': 2},
+            'order:3#0': {'type': 'order', 'user_id': None},
+        }
+        index = NumpyIndex(2)
+        index.add(np.array([[1, 0], [0, 1], [0, 1], [0, 1]], dtype=np.float32))
+        vectorstore = SimpleNamespace(index=index, index_to_docstore_id=dict(enumerate(metadata)))
+        partitions = PartitionMap(cache_size=4)
+        for chunk_id, meta in metadata.items():
+            partitions.add(chunk_id, meta)
+        
+        query = np.array([[0, 1]], dtype=np.float32)
+        self.assertEqual(partitions.search(query, [partitions_for_user(1)], 3, vectorstore),
+                         [['order:1#0', 'menuitem:1#0']])
+        self.assertEqual(partitions.search(query, [partitions_for_user(None)], 3, vectorstore),
+                         [['menuitem:1#0']])
+    
+    def test_ivf_index_updates_after_partition_search(self):
+        """Test that an IVF index can still delete and add chunks after a partition was reconstructed from it"""
+        import faiss
+        import numpy as np
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import FakeEmbeddings
+        from .partitions import PartitionMap, partitions_for_user
+        from .vector_index import add_vectors, delete_vectors
+        
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 8)).astype(np.float32)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(8), 8, 4)
+        index.train(vectors)
+        index.add(vectors)
+        index.nprobe = 4
+        ids = [f"order:{n}#0" for n in range(200)]
+        vectorstore = FAISS(FakeEmbeddings(size=8), index, InMemoryDocstore({
+            chunk_id: Document(page_content=chunk_id, metadata={'type': 'order', 'user_id': 1}) for chunk_id in ids
+        }), dict(enumerate(ids)))
+        partitions = PartitionMap.from_vectorstore(vectorstore)
+        self.assertEqual(partitions.search(vectors[5:6], [partitions_for_user(1)], 1, vectorstore), [['order:5#0']])
+        
+        delete_vectors(vectorstore, ['order:3#0', 'order:4#0'])
+        for chunk_id in ['order:3#0', 'order:4#0']:
+            partitions.remove(chunk_id)
+        add_vectors(vectorstore, ['order:3#1'], [vectors[3]], [{'type': 'order', 'user_id': 1}], ['order:3#1'])
+        partitions.add('order:3#1', {'type': 'order', 'user_id': 1})
+        
+        self.assertEqual(index.ntotal, 199)
+        _, labels = index.search(vectors[[3, 150]], 1)
+        self.assertEqual([vectorstore.index_to_docstore_id[label] for label in labels[:, 0]], ['order:3#1', 'order:150#0'])
+        self.assertEqual(partitions.search(vectors[3:4], [partitions_for_user(1)], 1, vectorstore), [['order:3#1']])
+
+
+class PromptBuilderTestCase(TestCase):
+    def test_context_is_deduplicated_and_packed_to_budget(self):
+        """Test that overlapping chunks are merged, the budget holds and the system prefix is static"""
+        from .prompt_builder import SYSTEM_PROMPT, build_messages, estimate_tokens, pack_context
+        from .retrieval_service import RetrievedDocument
+        
+        first = "Order ID: ORD-1A2B3C4D\nStatus: Pending\nItems: 2x Chocolate Cake"
+        second = "Items: 2x Chocolate Cake\nTotal: ₹900\nDelivery: 12 Baker Street"
+        docs = [
+            RetrievedDocument(second, {'doc_id': 'order:1'}),
+            RetrievedDocument(first, {'doc_id': 'order:1'}),
+            RetrievedDocument(first, {'doc_id': 'order:1'}),
+            RetrievedDocument("Menu Item: Vanilla Cake\nPrice: ₹400", {'doc_id': 'menuitem:2'}),
+        ]
+        packed = pack_context(docs, budget=1000)
+        self.assertEqual(len(packed), 3)
+        self.assertEqual("\n".join(packed).count("2x Chocolate Cake"), 1)
+        
+        packed = pack_context(docs, budget=20)
+        self.assertLessEqual(sum(estimate_tokens(text) for text in packed), 20)
+        self.assertEqual(packed[0], second)
+        
+        self.assertEqual(build_messages("status of my order?", docs)[0], ("system", SYSTEM_PROMPT))
+        self.assertEqual(build_messages("any eggless cakes?", docs[3:])[0], ("system", SYSTEM_PROMPT))
+
+
+class LLMGatewayTestCase(TestCase):
+    def test_breaker_opens_on_errors_and_recovers(self):
+        """Test that failing LLM calls trip the breaker, which rejects calls until a trial succeeds"""
+        from .llm_gateway import LLMGateway, LLMUnavailable
+        
+        class FlakyLLM:
+            fail = True
+            calls = 0
+            
+            def invoke(self, messages):
+                self.calls += 1
+                if self.fail:
+                    raise ConnectionError("upstream timed out")
+                return "ok"
+        
+        llm = FlakyLLM()
+        gateway = LLMGateway(None, llm=llm)
+        gateway.breaker.cooldown = 0.05
+        for _ in range(gateway.breaker.min_calls):
+            with self.assertRaises(LLMUnavailable):
+                gateway.invoke([])
+        self.assertEqual(gateway.breaker.state, 'open')
+        
+        with self.assertRaises(LLMUnavailable) as rejected:
+            gateway.invoke([])
+        self.assertEqual(rejected.exception.reason, 'circuit_open')
+        self.assertEqual(llm.calls, gateway.breaker.min_calls)
+        
+        time.sleep(0.06)
+        llm.fail = False
+        self.assertEqual(gateway.invoke([]), "ok")
+        self.assertEqual(gateway.stats()['state'], 'closed')
+    
+    def test_calls_beyond_the_cap_wait_for_a_slot(self):
+        """Test that with the default limits questions queue behind one call per slot instead of falling back"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from django.conf import settings
+        from .llm_gateway import LLMGateway
+        
+        class SlowLLM:
+            running = 0
+            peak = 0
+            lock = threading.Lock()
+            
+            def invoke(self, messages):
+                with self.lock:
+                    self.running += 1
+                    self.peak = max(self.peak, self.running)
+                # One typical call, scaled down so the queue wait covers it as in production (1-2s vs 3s)
+                time.sleep(settings.RAG_LLM_QUEUE_TIMEOUT / 30)
+                with self.lock:
+                    self.running -= 1
+                return "ok"
+        
+        llm = SlowLLM()
+        with self.settings(RAG_LLM_QUEUE_TIMEOUT=settings.RAG_LLM_QUEUE_TIMEOUT / 15):
+            gateway = LLMGateway(None, llm=llm)
+            # Twice the cap arriving at once: each extra question waits out one call
+            with ThreadPoolExecutor(max_workers=2 * gateway.max_concurrency) as pool:
+                answers = list(pool.map(lambda _: gateway.invoke([]), range(2 * gateway.max_concurrency)))
+        self.assertEqual(answers, ["ok"] * 2 * gateway.max_concurrency)
+        self.assertEqual(llm.peak, gateway.max_concurrency)
+        self.assertEqual(gateway.stats()['rejected_busy'], 0)
+
+
+class ChatbotStreamTestCase(TestCase):
+    class StubChatbot:
+        cache_version = "v1"
+        generation = 3
+
+        def __init__(self, tokens):
+            self.tokens = tokens
+
+        def embed_query(self, query):
+            return [1.0, 0.0]
+
+        def search(self, query, embedding=None, user_id=None):
+            from langchain_core.documents import Document
+            return [Document(page_content="Eggless chocolate cake", metadata={'doc_id': 'menu_item_1'})]
+
+        def stream(self, query, docs):
+            for text in self.tokens:
+                if isinstance(text, Exception):
+                    raise text
+                yield text
+
+    def ask(self, chatbot):
+        import json
+        from unittest import mock
+        from . import chatbot_views
+        from .answer_cache import SemanticAnswerCache
+        from .single_flight import SingleFlight
+
+        with mock.patch.object(chatbot_views, 'get_chatbot', return_value=chatbot), \
+                mock.patch.object(chatbot_views, 'answer_cache', SemanticAnswerCache(alias='default')), \
+                mock.patch.object(chatbot_views, 'answer_flights', SingleFlight(alias='default', shared=False)):
+            response = self.client.post('/api/chatbot/query/stream/', {'query': "Do you have eggless cakes?"},
+                                        content_type='application/json')
+            body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = []
+        for block in body.strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+
+    def test_stream_sends_meta_tokens_then_done(self):
+        """Test that a streamed answer arrives as a meta event, one token event per chunk and a done event"""
+        events = self.ask(self.StubChatbot(["Yes, ", "we do!"]))
+
+        self.assertEqual([event for event, _ in events], ['meta', 'token', 'token', 'done'])
+        self.assertEqual(events[0][1], {"path": "rag", "sources": ["menu_item_1"], "generation": 3})
+        self.assertEqual([data['text'] for event, data in events if event == 'token'], ["Yes, ", "we do!"])
+        self.assertEqual(events[-1][1]['answer'], "Yes, we do!")
+        self.assertEqual(events[-1][1]['path'], "rag")
+
+    def test_stream_failure_sends_error_event(self):
+        """Test that a failure mid-answer ends the stream with an error event instead of done"""
+        events = self.ask(self.StubChatbot(["Yes, ", RuntimeError("connection reset")]))
+
+        self.assertEqual([event for event, _ in events], ['meta', 'token', 'error'])
+        self.assertEqual(events[-1][1], {"error": "connection reset", "status": "error"})
+
+
+class SemanticAnswerCacheTestCase(TestCase):
+    VECTORS = {
+        "do you have eggless cakes": [1.0, 0.0, 0.0],
+        "any eggless cakes available": [0.99, 0.1, 0.0],
+        "what time do you open": [0.0, 1.0, 0.0],
+        "where are you located": [0.0, 0.0, 1.0],
+    }
+    
+    def setUp(self):
+        from django.core.cache import caches
+        from .answer_cache import SemanticAnswerCache
+        
+        caches['default'].clear()
+        self.cache = SemanticAnswerCache(alias='default', ttl=60, max_entries=2, threshold=0.9, touch_interval=1)
+        self.embedded = []
+    
+    def embed(self, query):
+        from .answer_cache import normalize_query
+        
+        self.embedded.append(query)
+        return self.VECTORS[normalize_query(query)]
+    
+    def store(self, query, answer, version="v1:shared"):
+        self.cache.set(query, answer, version, self.embed(query))
+    
+    def test_exact_and_semantic_matches(self):
+        """Test that exact repeats skip embedding, near-duplicates above the threshold hit and others miss"""
+        self.store("Do you have eggless cakes?", "Yes!")
+        self.embedded.clear()
+        
+        self.assertEqual(self.cache.get("do you have EGGLESS cakes", "v1:shared", self.embed)[:2], ("Yes!", 'exact'))
+        self.assertEqual(self.embedded, [])
+        self.assertEqual(self.cache.get("Any eggless cakes available?", "v1:shared", self.embed)[:2],
+                         ("Yes!", 'semantic'))
+        self.assertEqual(self.cache.get("What time do you open?", "v1:shared", self.embed)[:2], (None, None))
+    
+    def test_expiry_and_invalidation(self):
+        """Test that answers expire after the TTL and are not shared across index versions or scopes"""
+        from unittest import mock
+        
+        self.store("Do you have eggless cakes?", "Yes!")
+        self.assertEqual(self.cache.get("Do you have eggless cakes?", "v2:shared", self.embed)[0], None)
+        self.assertEqual(self.cache.get("Do you have eggless cakes?", "v1:user7", self.embed)[0], None)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.cache.get("Do you have eggless cakes?", "v1:shared", self.embed)[0], None)
+    
+    def test_eviction_keeps_recently_used_answers(self):
+        """Test that LRU eviction keeps an answer that is being hit exactly"""
+        from unittest import mock
+        
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.store("Do you have eggless cakes?", "Yes!")
+        with mock.patch('time.time', return_value=now + 1):
+            self.store("What time do you open?", "8 AM")
+        with mock.patch('time.time', return_value=now + 2):
+            self.cache.get("Do you have eggless cakes?", "v1:shared", self.embed)
+        with mock.patch('time.time', return_value=now + 3):
+            self.store("Where are you located?", "Banjara Hills")
+            self.assertEqual(self.cache.get("Do you have eggless cakes?", "v1:shared", self.embed)[0], "Yes!")
+            self.assertEqual(self.cache.get("What time do you open?", "v1:shared", self.embed)[0], None)
+    
+    def test_hits_rewrite_the_index_at_most_once_per_interval(self):
+        """Test that repeated hits within the touch interval only read the cache"""
+        from unittest import mock
+        
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.store("Do you have eggless cakes?", "Yes!")
+        with mock.patch.object(self.cache.cache, 'set', wraps=self.cache.cache.set) as cache_set:
+            with mock.patch('time.time', return_value=now + 0.5):
+                self.cache.get("Do you have eggless cakes?", "v1:shared", self.embed)
+                self.cache.get("Any eggless cakes available?", "v1:shared", self.embed)
+            self.assertEqual(cache_set.call_count, 0)
+            with mock.patch('time.time', return_value=now + 2):
+                for _ in range(3):
+                    self.cache.get("Do you have eggless cakes?", "v1:shared", self.embed)
+            self.assertEqual(cache_set.call_count, 1)
+    
+    def test_incremental_update_invalidates_answers(self):
+        """Test that an answer cached before an index event is applied is a miss afterwards"""
+        import contextlib
+        import io
+        import tempfile
+        from unittest import mock
+        from . import rag_chatbot
+        from .embedding_cache import CachedEmbeddings
+        from .rag_benchmark import _hashing_embeddings_class
+        
+        MenuItem.objects.create(name="Chocolate Cake", price=450, category="cake")
+        with tempfile.TemporaryDirectory() as directory, \
+                self.settings(RAG_INDEX_DIR=directory), \
+                mock.patch.object(rag_chatbot, '_embeddings', CachedEmbeddings(
+                    _hashing_embeddings_class()(), 'hashing-384', f"{directory}/cache.sqlite3")), \
+                contextlib.redirect_stdout(io.StringIO()):
+            chatbot = rag_chatbot.DatabaseRAGChatbot(None, use_llm=False)
+            chatbot.initialize()
+            version = f"{chatbot.cache_version}:shared"
+            self.cache.set("Do you have eggless cakes?", "No", version)
+            self.assertEqual(chatbot.apply_pending_changes(), 0)
+            self.assertEqual(chatbot.cache_version, version.split(':')[0])
+            
+            MenuItem.objects.create(name="Eggless Chocolate Cake", price=500, category="cake")
+            self.assertEqual(chatbot.apply_pending_changes(), 1)
+            version = f"{chatbot.cache_version}:shared"
+            self.assertEqual(self.cache.get("Do you have eggless cakes?", version, self.embed)[:2], (None, None))
+
+
+class SingleFlightTestCase(TestCase):
+    def test_identical_questions_share_one_computation(self):
+        """Test that concurrent duplicates wait for the first answer, in one worker and across workers"""
+        import threading
+        from .single_flight import SingleFlight, flight_key
+        
+        # Two "workers" sharing one cache
+        workers = [SingleFlight(alias='default', poll_interval=5), SingleFlight(alias='default', poll_interval=5)]
+        key = flight_key("Do you have eggless cakes?", "abc:shared")
+        self.assertEqual(key, flight_key("do you have  EGGLESS cakes", "abc:shared"))
+        computed = []
+        answers = []
+        started = threading.Event()
+        
+        def ask(worker):
+            with worker.join(key) as flight:
+                if flight.result is None:
+                    started.set()
+                    computed.append(1)
+                    time.sleep(0.2)
+                    flight.publish({'answer': 'Yes, we do!', 'path': 'rag'})
+                answers.append(flight.result['answer'])
+        
+        first = threading.Thread(target=ask, args=(workers[0],))
+        first.start()
+        started.wait(2)
+        others = [threading.Thread(target=ask, args=(workers[n % 2],)) for n in range(5)]
+        for thread in others:
+            thread.start()
+        for thread in [first] + others:
+            thread.join(5)
+        
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(answers, ['Yes, we do!'] * 6)
+        self.assertEqual(workers[1].stats()['joined_shared'], 1)
+    
+    def test_lock_taken_after_holder_published_reuses_its_result(self):
+        """Test that a waiter getting the lock right after the holder published and released does not recompute"""
+        from django.core.cache import caches
+        from .single_flight import SingleFlight, flight_key
+        
+        caches['default'].clear()
+        worker = SingleFlight(alias='default')
+        key = flight_key("Do you have eggless cakes?", "abc:shared")
+        acquire_lock = worker._acquire_lock
+        
+        def acquire_after_holder_finished(flight_key):
+            # The holder publishes and releases between our result read and our lock attempt
+            caches['default'].set(worker.result_key(flight_key), {'answer': 'Yes, we do!'}, 5)
+            return acquire_lock(flight_key)
+        
+        worker._acquire_lock = acquire_after_holder_finished
+        with worker.join(key) as flight:
+            self.assertEqual(flight.result, {'answer': 'Yes, we do!'})
+        self.assertIsNone(flight.release_lock)
+        self.assertIsNone(caches['default'].get(worker.lock_key(key)))
+        self.assertEqual(worker.stats()['joined_shared'], 1)
+    
+    def test_file_cache_lock_is_atomic_across_processes(self):
+        """Test that with the file-based cache only one of several worker processes computes the answer"""
+        import multiprocessing
+        import tempfile
+        from django.core.cache import caches
+        from .single_flight import FileLock, SingleFlight
+        
+        with tempfile.TemporaryDirectory() as location, self.settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'flights': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            context = multiprocessing.get_context('fork')
+            computed = context.Value('i', 0)
+            start = context.Barrier(6)
+            
+            def worker():
+                caches['flights'].get('warm-up')
+                start.wait()
+                with SingleFlight(alias='flights', poll_interval=5).join("abc:shared:eggless") as flight:
+                    if flight.result is None:
+                        with computed.get_lock():
+                            computed.value += 1
+                        time.sleep(0.3)
+                        flight.publish({'answer': 'Yes, we do!'})
+            
+            processes = [context.Process(target=worker) for _ in range(6)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(10)
+            self.assertEqual([process.exitcode for process in processes], [0] * 6)
+            self.assertEqual(computed.value, 1)
+            
+            # The lock itself: exclusive while held, free again once released
+            path = f"{location}/lock"
+            first, second = FileLock(path), FileLock(path)
+            self.assertTrue(first.acquire())
+            self.assertFalse(second.acquire())
+            first.release()
+            self.assertTrue(second.acquire())
+            second.release()
+
+
+class OrderSessionStoreTestCase(TestCase):
+    def test_sessions_are_shared_capped_and_swept(self):
+        """Test that both session stores round-trip, evict the oldest over the cap and sweep expired sessions"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ChatbotOrderSession
+        from .order_sessions import CacheOrderSessionStore, DatabaseOrderSessionStore
+        
+        for store in (DatabaseOrderSessionStore(max_sessions=2), CacheOrderSessionStore(alias='default', max_sessions=2)):
+            store.start_sweeper = lambda interval=None: None
+            first = store.create({'item_id': 1, 'quantity': 2, 'user_id': None})
+            # Another worker's store sees the same session
+            other = type(store)(max_sessions=2, **({'alias': 'default'} if isinstance(store, CacheOrderSessionStore) else {}))
+            session = other.get(first)
+            self.assertEqual(session, {'item_id': 1, 'quantity': 2})
+            session['delivery_address'] = '12 Baker Street'
+            other.save(first, session)
+            self.assertEqual(store.get(first)['delivery_address'], '12 Baker Street')
+            
+            second = store.create({'item_id': 2})
+            third = store.create({'item_id': 3})
+            self.assertIsNone(store.get(first))
+            self.assertIsNotNone(store.get(second))
+            self.assertIsNotNone(store.get(third))
+            
+            if isinstance(store, DatabaseOrderSessionStore):
+                ChatbotOrderSession.objects.filter(session_id=second).update(
+                    expires_at=timezone.now() - timedelta(seconds=1)
+                )
+                self.assertIsNone(store.get(second))
+                self.assertEqual(store.sweep(), 1)
+                self.assertEqual(ChatbotOrderSession.objects.count(), 1)
+    
+    def test_cache_store_refuses_a_culling_cache_too_small_for_its_sessions(self):
+        """Test that the cache store will not run on a culling cache that could drop live sessions"""
+        from django.core.exceptions import ImproperlyConfigured
+        from .order_sessions import CacheOrderSessionStore, OrderSessionStore
+        
+        with self.assertRaises(ImproperlyConfigured):
+            CacheOrderSessionStore(alias='default', max_sessions=200)
+        CacheOrderSessionStore(alias='default', max_sessions=150)
+        CacheOrderSessionStore(max_sessions=5000)
+        with self.assertRaises(TypeError):
+            OrderSessionStore()
+
+
+class ChatbotCartTestCase(TestCase):
+    def setUp(self):
+        self.cake = MenuItem.objects.create(name="Chocolate Cake", price=450, category="cake")
+        self.bread = MenuItem.objects.create(name="Sourdough", price=120, category="bread")
+        self.cookie = MenuItem.objects.create(name="Oat Cookie", price=40, category="cookie")
+    
+    def test_cart_checkout_creates_one_order(self):
+        """Test that a multi-item cart is priced in one query and checks out as one Order and one Razorpay order"""
+        from unittest import mock
+        from rest_framework.test import APIClient
+        from . import chatbot_views
+        from .order_cart import price_cart
+        
+        with self.assertNumQueries(1):
+            _, summary = price_cart({self.cake.id: 2, self.bread.id: 1})
+        self.assertEqual(summary['item_total'], 1020.0)
+        self.assertEqual(summary['grand_total'], 1070.0)
+        
+        client = APIClient()
+        response = client.post('/api/chatbot/order/initiate/', {'items': [
+            {'item_id': self.cake.id, 'quantity': 2}, {'item_id': self.bread.id, 'quantity': 1},
+        ]}, format='json')
+        session_id = response.data['session_id']
+        response = client.post('/api/chatbot/order/cart/', {'session_id': session_id, 'items': [
+            {'item_id': self.bread.id, 'quantity': 0}, {'item_id': self.cookie.id, 'quantity': 3},
+        ]}, format='json')
+        self.assertEqual([line['name'] for line in response.data['cart']], ["Chocolate Cake", "Oat Cookie"])
+        client.post('/api/chatbot/order/address/', {'session_id': session_id, 'address': '12 Baker Street'},
+                    format='json')
+        
+        razorpay = mock.Mock()
+        razorpay.order.create.return_value = {'id': 'order_test123'}
+        with mock.patch.object(chatbot_views, 'razorpay_client', razorpay):
+            response = client.post('/api/chatbot/order/create/', {'session_id': session_id}, format='json')
+            again = client.post('/api/chatbot/order/create/', {'session_id': session_id}, format='json')
+        
+        self.assertEqual(response.data['amount'], (2 * 450 + 3 * 40 + 50) * 100)
+        self.assertEqual(again.data['razorpay_order_id'], 'order_test123')
+        razorpay.order.create.assert_called_once()
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, 1020)
+        self.assertEqual(sorted(order.items.values_list('menu_item__name', 'quantity')),
+                         [("Chocolate Cake", 2), ("Oat Cookie", 3)])
+
+
+class MenuSearchIndexTestCase(TestCase):
+    def setUp(self):
+        MenuItem.objects.create(name="Chocolate Cake", description="Rich dark chocolate sponge", price=450, category="cake")
+        MenuItem.objects.create(name="Cupcake", description="Vanilla frosting", price=80, category="cake")
+        MenuItem.objects.create(name="Sourdough", description="Slow fermented loaf", price=120, category="bread")
+        MenuItem.objects.create(name="Hidden Pie", price=200, category="pastry", available=False)
+    
+    def test_search_ranks_matches_from_memory(self):
+        """Test that menu search ranks exact, prefix, substring and misspelt matches without hitting the database"""
+        from .menu_search import get_menu_index, search_menu
+        
+        def names(query):
+            return [item['name'] for item in search_menu(query)]
+        
+        get_menu_index()
+        with self.assertNumQueries(0):
+            self.assertEqual(names("cupcake")[0], "Cupcake")
+            self.assertEqual(names("cup cake")[0], "Cupcake")
+            self.assertEqual(names("choc")[0], "Chocolate Cake")
+            self.assertEqual(names("dough"), ["Sourdough"])
+            self.assertEqual(names("fermented"), ["Sourdough"])
+            self.assertEqual(names("choclate")[0], "Chocolate Cake")
+            self.assertEqual(names("pie"), [])
+        
+        MenuItem.objects.create(name="Apple Pie", price=220, category="pastry")
+        self.assertEqual(names("apple pie"), ["Apple Pie"])
+    
+    def test_autocomplete_ranks_by_order_volume(self):
+        """Test that autocomplete suggestions are ranked by recent orders and revalidate by ETag without queries"""
+        from rest_framework.test import APIClient
+        
+        cupcake = MenuItem.objects.get(name="Cupcake")
+        order = Order.objects.create(order_id="ORD-TEST", total_amount=400)
+        OrderItem.objects.create(order=order, menu_item=cupcake, quantity=5, price=80)
+        client = APIClient()
+        client.get('/api/chatbot/order/autocomplete/', {'q': 'c'})
+        
+        with self.assertNumQueries(0):
+            response = client.get('/api/chatbot/order/autocomplete/', {'q': 'c'})
+            cached = client.get('/api/chatbot/order/autocomplete/', {'q': 'c'},
+                                HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual([(s['type'], s['name']) for s in response.data['suggestions']],
+                         [("category", "Cake"), ("item", "Cupcake"), ("item", "Chocolate Cake")])
+        self.assertEqual(cached.status_code, 304)
+        names = [s['name'] for s in client.get('/api/chatbot/order/autocomplete/', {'q': 'cake'}).data['suggestions']]
+        self.assertEqual(names, ["Cake", "Chocolate Cake"])
+
+
+class OrderIdTestCase(TestCase):
+    def test_ids_are_unique_and_time_ordered(self):
+        """Test that order IDs from one process are unique and increasing across threads and carry their creation time"""
+        from concurrent.futures import ThreadPoolExecutor
+        from django.utils import timezone
+        from .chatbot_intents import ORDER_ID_RE
+        from .order_ids import id_created_at, new_order_id
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            batches = list(pool.map(lambda _: [new_order_id() for _ in range(2000)], range(4)))
+        ids = [order_id for batch in batches for order_id in batch]
+        self.assertEqual(len(set(ids)), len(ids))
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+        self.assertTrue(ORDER_ID_RE.fullmatch(ids[0]))
+        self.assertLess(abs((timezone.now() - id_created_at(ids[0])).total_seconds()), 60)
+    
+    def test_forked_workers_get_distinct_nodes(self):
+        """Test that every process's IDs carry its host and PID, so forked workers never collide"""
+        import multiprocessing
+        import os
+        from .order_ids import NODE_BITS, PID_BITS, SEQUENCE_BITS, decode, new_order_id, process_node
+        
+        def node(order_id):
+            return (decode(order_id.rsplit('-', 1)[-1]) >> SEQUENCE_BITS) & ((1 << NODE_BITS) - 1)
+        
+        self.assertEqual(node(new_order_id()), os.getpid())
+        with self.settings(ORDER_ID_HOST=5):
+            self.assertEqual(process_node(), (5 << PID_BITS) | os.getpid())
+        with self.settings(ORDER_ID_HOST=64), self.assertRaises(ValueError):
+            process_node()
+        
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        start = context.Barrier(4)
+        
+        def worker():
+            start.wait()
+            queue.put([new_order_id() for _ in range(2000)])
+        
+        processes = [context.Process(target=worker) for _ in range(4)]
+        for process in processes:
+            process.start()
+        batches = [queue.get(timeout=10) for _ in processes]
+        for process in processes:
+            process.join(10)
+        ids = [order_id for batch in batches for order_id in batch]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual({node(batch[0]) for batch in batches}, {process.pid for process in processes})
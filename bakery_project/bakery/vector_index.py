@@ -0,0 +1,203 @@
+"""
+Index types for the chatbot vector store, picked by corpus size.
+
+- numpy: brute-force float32 matrix product; fastest and lightest for a few
+  thousand chunks (menu + info). Persisted as a flat FAISS file and turned
+  into a NumPy matrix when loaded.
+- flat:  exact FAISS IndexFlatL2, memory-mapped and shared between workers.
+- ivf:   FAISS inverted-file index with quantized codes for large order
+  archives; a fraction of the memory and scan time at a small recall cost.
+  Codes are 8-bit scalar ('sq8', ~4x smaller) by default or product
+  quantized ('pq48' etc., smaller still but noticeably lower recall on
+  MiniLM-style embeddings - see `manage.py bench_vector_index`).
+
+The LangChain FAISS wrapper keeps owning the docstore and ID mapping; only its
+`.index` attribute is swapped, so every index here answers search / add /
+remove_ids the way FAISS does. IVF indexes do not renumber their vectors on
+removal the way flat ones do, so incremental updates go through
+delete_vectors() / add_vectors(), which keep the wrapper's label -> chunk ID
+mapping in step with the index.
+"""
+import math
+
+import numpy as np
+from django.conf import settings
+
+INDEX_KINDS = ('numpy', 'flat', 'ivf')
+
+
+def select_index_kind(chunk_count):
+    """Index type for a corpus of `chunk_count` chunks (RAG_INDEX_KIND overrides)"""
+    if settings.RAG_INDEX_KIND != 'auto':
+        return settings.RAG_INDEX_KIND
+    if chunk_count <= settings.RAG_INDEX_NUMPY_MAX_CHUNKS:
+        return 'numpy'
+    if chunk_count < settings.RAG_INDEX_IVF_MIN_CHUNKS:
+        return 'flat'
+    return 'ivf'
+
+
+def index_kind(index):
+    import faiss
+
+    if isinstance(index, NumpyIndex):
+        return 'numpy'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf'
+    return 'flat'
+
+
+class NumpyIndex:
+    """Exact L2 search over an in-memory float32 matrix (FAISS-compatible subset)"""
+
+    def __init__(self, d, vectors=None):
+        self.d = d
+        self.vectors = np.empty((0, d), dtype=np.float32) if vectors is None else np.ascontiguousarray(vectors, dtype=np.float32)
+        self._norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+    @classmethod
+    def from_faiss(cls, index):
+        return cls(index.d, index.reconstruct_n(0, index.ntotal) if index.ntotal else None)
+
+    def to_faiss(self):
+        import faiss
+
+        flat = faiss.IndexFlatL2(self.d)
+        if self.ntotal:
+            flat.add(self.vectors)
+        return flat
+
+    @property
+    def ntotal(self):
+        return len(self.vectors)
+
+    def add(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        self.vectors = np.vstack([self.vectors, x])
+        self._norms = np.concatenate([self._norms, np.einsum('ij,ij->i', x, x)])
+
+    def remove_ids(self, ids):
+        keep = np.ones(self.ntotal, dtype=bool)
+        keep[np.asarray(ids, dtype=np.int64)] = False
+        removed = int((~keep).sum())
+        self.vectors = self.vectors[keep]
+        self._norms = self._norms[keep]
+        return removed
+
+    def reconstruct(self, i):
+        return self.vectors[i].copy()
+
+    def search(self, x, k):
+        """Squared L2 distances and positions of the k nearest rows, like IndexFlatL2"""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        n = len(x)
+        if not self.ntotal:
+            return np.full((n, k), np.inf, dtype=np.float32), np.full((n, k), -1, dtype=np.int64)
+        distances = self._norms[None, :] - 2 * (x @ self.vectors.T) + np.einsum('ij,ij->i', x, x)[:, None]
+        top = min(k, self.ntotal)
+        nearest = np.argpartition(distances, top - 1, axis=1)[:, :top]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        indices = np.take_along_axis(nearest, order, axis=1)
+        scores = np.take_along_axis(distances, indices, axis=1)
+        if top < k:
+            scores = np.pad(scores, ((0, 0), (0, k - top)), constant_values=np.inf)
+            indices = np.pad(indices, ((0, 0), (0, k - top)), constant_values=-1)
+        return scores.astype(np.float32), indices.astype(np.int64)
+
+
+def build_ivf(flat_index, codec=None):
+    """
+    Train an IVF index on the vectors of a flat one. nlist grows with
+    sqrt(n); `codec` is 'sq8' or 'pq<m>' (default RAG_INDEX_IVF_CODEC).
+    """
+    import faiss
+
+    codec = codec or settings.RAG_INDEX_IVF_CODEC
+    d, n = flat_index.d, flat_index.ntotal
+    vectors = flat_index.reconstruct_n(0, n)
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+    if codec.startswith('pq'):
+        # The sub-quantizer count has to divide the dimension
+        m = max(divisor for divisor in range(1, min(int(codec[2:]), d) + 1) if d % divisor == 0)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(d), d, nlist, m, 8)
+    else:
+        index = faiss.IndexIVFScalarQuantizer(faiss.IndexFlatL2(d), d, nlist, faiss.ScalarQuantizer.QT_8bit)
+    sample = vectors[np.random.default_rng(0).choice(n, size=min(n, max(nlist, 256) * 39), replace=False)]
+    index.train(sample)
+    index.add(vectors)
+    return index
+
+
+def build_index(flat_index, kind):
+    """Convert a freshly built flat index to the index type that gets persisted"""
+    # Too few vectors to train the coarse quantizer / codebooks
+    if kind == 'ivf' and flat_index.ntotal >= 256 * 39:
+        return build_ivf(flat_index)
+    # numpy indexes are persisted flat and converted by prepare_index()
+    return flat_index
+
+
+def enable_id_lookup(index):
+    """
+    Give an IVF index a hashtable direct map, so vectors can be reconstructed
+    by label and still be removed (the array direct map forbids remove_ids)
+    """
+    import faiss
+
+    ivf = faiss.extract_index_ivf(index)
+    if ivf.direct_map.type != faiss.DirectMap.Hashtable:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+
+def delete_vectors(vectorstore, chunk_ids):
+    """Remove chunks from a LangChain FAISS store"""
+    import faiss
+
+    index = vectorstore.index
+    if not isinstance(index, faiss.IndexIVF):
+        vectorstore.delete(chunk_ids)
+        return
+    # IVF labels stay put after remove_ids, so drop them from the mapping
+    # instead of renumbering it like FAISS.delete() does
+    enable_id_lookup(index)
+    wanted = set(chunk_ids)
+    labels = [label for label, chunk_id in vectorstore.index_to_docstore_id.items() if chunk_id in wanted]
+    index.remove_ids(np.array(labels, dtype=np.int64))
+    vectorstore.docstore.delete(list(chunk_ids))
+    for label in labels:
+        del vectorstore.index_to_docstore_id[label]
+
+
+def add_vectors(vectorstore, texts, embeddings, metadatas, ids):
+    """Add embedded chunks to a LangChain FAISS store"""
+    import faiss
+    from langchain_core.documents import Document
+
+    index = vectorstore.index
+    if not isinstance(index, faiss.IndexIVF):
+        vectorstore.add_embeddings(list(zip(texts, embeddings)), metadatas=metadatas, ids=ids)
+        return
+    # Fresh labels past the largest one in use; IVF keeps whatever labels it is given
+    enable_id_lookup(index)
+    start = max(vectorstore.index_to_docstore_id, default=-1) + 1
+    labels = np.arange(start, start + len(ids), dtype=np.int64)
+    vectors = np.array(embeddings, dtype=np.float32)
+    if vectorstore._normalize_L2:
+        faiss.normalize_L2(vectors)
+    index.add_with_ids(vectors, labels)
+    vectorstore.docstore.add({
+        chunk_id: Document(page_content=text, metadata=metadata)
+        for chunk_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    vectorstore.index_to_docstore_id.update(zip(labels.tolist(), ids))
+
+
+def prepare_index(index):
+    """Ready a loaded index for serving"""
+    import faiss
+
+    if select_index_kind(index.ntotal) == 'numpy' and isinstance(index, faiss.IndexFlat):
+        return NumpyIndex.from_faiss(index)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = settings.RAG_INDEX_NPROBE
+    return index
@@ -9,6 +9,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.mail import send_mail
 from .models import MenuItem, Order, OrderItem, Payment, UserProfile, Table
+from .order_ids import new_order_id, new_transaction_id
 import json
 import uuid
 import razorpay
@@ -181,7 +182,7 @@ def upi_payment_view(request):
             return redirect('cart')
         
         # Create order
-        order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+        order_id = new_order_id()
         order = Order.objects.create(
             user=request.user,
             order_id=order_id,
@@ -203,7 +204,7 @@ def upi_payment_view(request):
         ])
         
         # Create payment record
-        transaction_id = f"TXN-{uuid.uuid4().hex[:12].upper()}"
+        transaction_id = new_transaction_id()
         Payment.objects.create(
             order=order,
             payment_method='upi',
@@ -324,7 +325,7 @@ def payment_view(request):
             delivery_fee = Decimal('50.00') if order_type == 'delivery' else Decimal('0.00')
 
             # Create order in database
-            order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+            order_id = new_order_id()
             order = Order.objects.create(
                 user=request.user,
                 order_id=order_id,
@@ -156,6 +156,137 @@ LOGOUT_REDIRECT_URL = '/'
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', '')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', '')
 
+# ─── Caches ───────────────────────────────────────────────────────────────────
+# 'chatbot' is shared by every gunicorn worker on the host (file-based by
+# default; point it at Redis with CHATBOT_CACHE_BACKEND/LOCATION for
+# multiple hosts). 'order_sessions' holds only live chatbot orders (with
+# CHATBOT_ORDER_SESSION_STORE=cache), sized so that culling never reaches
+# them: MAX_ENTRIES must be at least twice CHATBOT_ORDER_SESSION_MAX.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'chatbot': {
+        'BACKEND': os.environ.get('CHATBOT_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CHATBOT_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'chatbot')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'order_sessions': {
+        'BACKEND': os.environ.get('CHATBOT_ORDER_SESSION_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CHATBOT_ORDER_SESSION_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'order_sessions')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CHATBOT_ORDER_SESSION_CACHE_MAX_ENTRIES', '20000'))},
+    },
+}
+
+# ─── RAG Chatbot ──────────────────────────────────────────────────────────────
+RAG_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+# 'torch' (sentence-transformers) or 'onnx' (int8-quantized export via
+# onnxruntime; falls back to torch). Files are paths in the model's hub repo
+# or absolute local paths; 0 threads lets onnxruntime decide.
+RAG_EMBEDDING_BACKEND = os.environ.get('RAG_EMBEDDING_BACKEND', 'torch')
+RAG_ONNX_MODEL_FILE = os.environ.get('RAG_ONNX_MODEL_FILE', 'onnx/model_quint8_avx2.onnx')
+RAG_ONNX_TOKENIZER_FILE = os.environ.get('RAG_ONNX_TOKENIZER_FILE', 'tokenizer.json')
+RAG_ONNX_THREADS = int(os.environ.get('RAG_ONNX_THREADS', '0'))
+# Versioned, content-hashed index artifacts shared by all gunicorn workers
+RAG_INDEX_DIR = os.environ.get('RAG_INDEX_DIR', os.path.join(BASE_DIR, 'rag_index'))
+RAG_INDEX_KEEP = int(os.environ.get('RAG_INDEX_KEEP', '3'))
+# Rows fetched per database round trip and chunks embedded per model call
+RAG_LOADER_CHUNK_SIZE = int(os.environ.get('RAG_LOADER_CHUNK_SIZE', '500'))
+RAG_EMBED_BATCH_SIZE = int(os.environ.get('RAG_EMBED_BATCH_SIZE', '64'))
+# Answer cache: TTL in seconds, semantic index size and the cosine similarity
+# above which a cached answer is reused for a near-duplicate question. A hit
+# refreshes the answer's LRU timestamp at most every
+# CHATBOT_ANSWER_CACHE_TOUCH_INTERVAL seconds.
+CHATBOT_ANSWER_CACHE_TTL = int(os.environ.get('CHATBOT_ANSWER_CACHE_TTL', '3600'))
+CHATBOT_ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('CHATBOT_ANSWER_CACHE_MAX_ENTRIES', '200'))
+CHATBOT_ANSWER_CACHE_SIMILARITY = float(os.environ.get('CHATBOT_ANSWER_CACHE_SIMILARITY', '0.92'))
+CHATBOT_ANSWER_CACHE_TOUCH_INTERVAL = float(os.environ.get('CHATBOT_ANSWER_CACHE_TOUCH_INTERVAL', '60'))
+# Identical in-flight questions wait up to CHATBOT_COALESCE_TIMEOUT seconds for
+# the first one's answer, shared across workers for CHATBOT_COALESCE_RESULT_TTL
+# seconds; other workers poll for it every CHATBOT_COALESCE_POLL_MS
+CHATBOT_COALESCE_TIMEOUT = float(os.environ.get('CHATBOT_COALESCE_TIMEOUT', '20'))
+CHATBOT_COALESCE_RESULT_TTL = int(os.environ.get('CHATBOT_COALESCE_RESULT_TTL', '5'))
+CHATBOT_COALESCE_POLL_MS = float(os.environ.get('CHATBOT_COALESCE_POLL_MS', '50'))
+# Chatbot order flow sessions: 'db' (works across hosts) or 'cache' (the
+# 'order_sessions' cache alias; shared across hosts only if that is Redis/Memcached).
+# Idle sessions expire after CHATBOT_ORDER_SESSION_TTL seconds, at most
+# CHATBOT_ORDER_SESSION_MAX are kept, expired ones are swept periodically
+CHATBOT_ORDER_SESSION_STORE = os.environ.get('CHATBOT_ORDER_SESSION_STORE', 'db')
+CHATBOT_ORDER_SESSION_TTL = int(os.environ.get('CHATBOT_ORDER_SESSION_TTL', '1800'))
+CHATBOT_ORDER_SESSION_MAX = int(os.environ.get('CHATBOT_ORDER_SESSION_MAX', '5000'))
+CHATBOT_ORDER_SESSION_SWEEP_INTERVAL = int(os.environ.get('CHATBOT_ORDER_SESSION_SWEEP_INTERVAL', '300'))
+# In-memory menu search for the chatbot order flow; rebuilt when a MenuItem
+# changes, and at least every CHATBOT_MENU_INDEX_MAX_AGE seconds in case the
+# menu was changed without model signals (bulk updates, raw SQL)
+CHATBOT_MENU_INDEX_MAX_AGE = int(os.environ.get('CHATBOT_MENU_INDEX_MAX_AGE', '300'))
+# Menu typeahead: at most CHATBOT_AUTOCOMPLETE_LIMIT suggestions, ranked by
+# order volume over the last CHATBOT_AUTOCOMPLETE_POPULARITY_DAYS; clients may
+# reuse a response for CHATBOT_AUTOCOMPLETE_MAX_AGE seconds (then revalidate by ETag)
+CHATBOT_AUTOCOMPLETE_LIMIT = int(os.environ.get('CHATBOT_AUTOCOMPLETE_LIMIT', '8'))
+CHATBOT_AUTOCOMPLETE_POPULARITY_DAYS = int(os.environ.get('CHATBOT_AUTOCOMPLETE_POPULARITY_DAYS', '30'))
+CHATBOT_AUTOCOMPLETE_MAX_AGE = int(os.environ.get('CHATBOT_AUTOCOMPLETE_MAX_AGE', '60'))
+# Content-addressed embedding cache so rebuilds only embed new chunks
+RAG_EMBEDDING_CACHE_PATH = os.environ.get(
+    'RAG_EMBEDDING_CACHE_PATH', os.path.join(RAG_INDEX_DIR, 'embedding_cache.sqlite3')
+)
+# Incremental updates: seconds between applying queued model changes, and how
+# long applied change events are kept
+RAG_INDEX_UPDATE_INTERVAL = int(os.environ.get('RAG_INDEX_UPDATE_INTERVAL', '30'))
+RAG_INDEX_EVENT_RETENTION_HOURS = int(os.environ.get('RAG_INDEX_EVENT_RETENTION_HOURS', '24'))
+# Retrieval sidecar (manage.py run_retrieval_service). When set, workers send
+# embed/search calls to this Unix socket instead of loading the model and
+# index themselves; empty keeps retrieval in-process (development).
+RAG_SIDECAR_SOCKET = os.environ.get('RAG_SIDECAR_SOCKET', '')
+RAG_SIDECAR_TIMEOUT = float(os.environ.get('RAG_SIDECAR_TIMEOUT', '10'))
+# Micro-batching: concurrent queries arriving within RAG_BATCH_MAX_WAIT_MS of
+# each other are embedded and searched together, up to RAG_BATCH_MAX_SIZE
+RAG_BATCH_MAX_SIZE = int(os.environ.get('RAG_BATCH_MAX_SIZE', '16'))
+RAG_BATCH_MAX_WAIT_MS = float(os.environ.get('RAG_BATCH_MAX_WAIT_MS', '5'))
+# Index type by chunk count: NumPy brute force up to RAG_INDEX_NUMPY_MAX_CHUNKS,
+# flat FAISS below RAG_INDEX_IVF_MIN_CHUNKS, quantized IVF above (codec 'sq8'
+# or 'pq<m>', searching RAG_INDEX_NPROBE lists). RAG_INDEX_KIND forces one of
+# 'numpy', 'flat', 'ivf' instead of 'auto'.
+RAG_INDEX_KIND = os.environ.get('RAG_INDEX_KIND', 'auto')
+RAG_INDEX_NUMPY_MAX_CHUNKS = int(os.environ.get('RAG_INDEX_NUMPY_MAX_CHUNKS', '5000'))
+RAG_INDEX_IVF_MIN_CHUNKS = int(os.environ.get('RAG_INDEX_IVF_MIN_CHUNKS', '50000'))
+RAG_INDEX_IVF_CODEC = os.environ.get('RAG_INDEX_IVF_CODEC', 'sq8')
+RAG_INDEX_NPROBE = int(os.environ.get('RAG_INDEX_NPROBE', '16'))
+# Retrieval: chunks passed to the LLM, and hybrid search - BM25 keyword hits
+# fused with vector hits by reciprocal rank (RAG_RRF_K) over
+# RAG_HYBRID_CANDIDATES candidates each, optionally re-ranked by a
+# cross-encoder such as 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+RAG_RETRIEVAL_K = int(os.environ.get('RAG_RETRIEVAL_K', '5'))
+RAG_HYBRID_SEARCH = os.environ.get('RAG_HYBRID_SEARCH', 'True').lower() in ('true', '1', 'yes')
+RAG_HYBRID_CANDIDATES = int(os.environ.get('RAG_HYBRID_CANDIDATES', '20'))
+RAG_RRF_K = int(os.environ.get('RAG_RRF_K', '60'))
+RAG_RERANK_MODEL = os.environ.get('RAG_RERANK_MODEL', '')
+# Scope chatbot searches to shared data (menu, info) plus the asking user's own
+# orders/payments/profile; per-user vector matrices kept in an LRU of this size
+RAG_PARTITIONED_RETRIEVAL = os.environ.get('RAG_PARTITIONED_RETRIEVAL', 'True').lower() in ('true', '1', 'yes')
+RAG_PARTITION_CACHE_SIZE = int(os.environ.get('RAG_PARTITION_CACHE_SIZE', '256'))
+# Prompt assembly: retrieved context is packed up to RAG_PROMPT_CONTEXT_TOKENS
+# (estimated at RAG_PROMPT_CHARS_PER_TOKEN characters per token)
+RAG_PROMPT_CONTEXT_TOKENS = int(os.environ.get('RAG_PROMPT_CONTEXT_TOKENS', '1200'))
+RAG_PROMPT_CHARS_PER_TOKEN = int(os.environ.get('RAG_PROMPT_CHARS_PER_TOKEN', '4'))
+# LLM gateway: at most RAG_LLM_MAX_CONCURRENCY calls per process (gunicorn runs
+# 4 threads per worker, so 2 stay free for checkout), waiting up to
+# RAG_LLM_QUEUE_TIMEOUT seconds for a slot. A Groq answer typically takes 1-2s,
+# so a question can wait out one call ahead of it instead of falling back:
+# about 1-2 answers per second per worker before the retrieval-only fallback
+# kicks in. Each call is bounded by
+# RAG_LLM_TIMEOUT. The circuit breaker opens for RAG_LLM_BREAKER_COOLDOWN seconds
+# once RAG_LLM_BREAKER_ERROR_RATE of the last RAG_LLM_BREAKER_WINDOW calls
+# failed (after RAG_LLM_BREAKER_MIN_CALLS). Meanwhile answers are built from the
+# top RAG_FALLBACK_CHUNKS retrieved chunks.
+RAG_LLM_MAX_CONCURRENCY = int(os.environ.get('RAG_LLM_MAX_CONCURRENCY', '2'))
+RAG_LLM_QUEUE_TIMEOUT = float(os.environ.get('RAG_LLM_QUEUE_TIMEOUT', '3'))
+RAG_LLM_TIMEOUT = float(os.environ.get('RAG_LLM_TIMEOUT', '15'))
+RAG_LLM_BREAKER_WINDOW = int(os.environ.get('RAG_LLM_BREAKER_WINDOW', '20'))
+RAG_LLM_BREAKER_ERROR_RATE = float(os.environ.get('RAG_LLM_BREAKER_ERROR_RATE', '0.5'))
+RAG_LLM_BREAKER_MIN_CALLS = int(os.environ.get('RAG_LLM_BREAKER_MIN_CALLS', '5'))
+RAG_LLM_BREAKER_COOLDOWN = float(os.environ.get('RAG_LLM_BREAKER_COOLDOWN', '30'))
+RAG_FALLBACK_CHUNKS = int(os.environ.get('RAG_FALLBACK_CHUNKS', '3'))
+
 # ─── SMS Settings ─────────────────────────────────────────────────────────────
 ADMIN_PHONE_NUMBER = '+918074691873'
 BAKERY_NAME = 'The Bake Story'
@@ -175,6 +306,9 @@ BAKERY_BUSINESS_NAME = 'The Bake Story'
 BAKERY_BUSINESS_PHONE = '8074691873'
 BAKERY_BUSINESS_ADDRESS = 'Chaitanyapuri, Dilsukhnagar, Hyderabad'
 BAKERY_BUSINESS_EMAIL = os.environ.get('ADMIN_EMAIL', 'btechmuthyam@gmail.com')
+# Order/transaction IDs embed this host number (0-63) next to the process ID
+# (see bakery.order_ids); give every host sharing the database its own value
+ORDER_ID_HOST = int(os.environ.get('ORDER_ID_HOST', '0'))
 
 # ─── CORS Settings ────────────────────────────────────────────────────────────
 CORS_ALLOW_CREDENTIALS = True
@@ -83,6 +83,7 @@ fi
 echo "[6/10] Running Django setup..."
 sudo -u $APP_USER bash -c "source $REPO_DIR/venv/bin/activate && cd $APP_DIR && python3 manage.py migrate --noinput"
 sudo -u $APP_USER bash -c "source $REPO_DIR/venv/bin/activate && cd $APP_DIR && python3 manage.py collectstatic --noinput"
+sudo -u $APP_USER bash -c "source $REPO_DIR/venv/bin/activate && cd $APP_DIR && python3 manage.py build_rag_index" || echo "  ⚠  Chatbot index build failed; workers will build it on first use"
 sudo -u $APP_USER mkdir -p "$APP_DIR/logs" "$APP_DIR/media"
 sudo chown -R $APP_USER:www-data "$REPO_DIR"
 sudo chmod -R 755 "$REPO_DIR"
@@ -92,10 +93,21 @@ sudo chmod -R 755 "$REPO_DIR"
 
 # ─── 7. Create Systemd Service ───────────────────────────────
 echo "[7/10] Creating systemd service for gunicorn..."
+
+# The retrieval sidecar only runs when .env sets RAG_SIDECAR_SOCKET
+if grep -qE '^[[:space:]]*RAG_SIDECAR_SOCKET=[^[:space:]]' "$APP_DIR/.env"; then
+    USE_SIDECAR=1
+    SIDECAR_UNIT_DEPS="After=network.target ${APP_NAME}-retrieval.service
+Wants=${APP_NAME}-retrieval.service"
+else
+    USE_SIDECAR=0
+    SIDECAR_UNIT_DEPS="After=network.target"
+fi
+
 cat > /etc/systemd/system/${APP_NAME}.service <<EOF
 [Unit]
 Description=The Bake Story - Gunicorn Daemon
-After=network.target
+${SIDECAR_UNIT_DEPS}
 
 [Service]
 User=$APP_USER
@@ -107,7 +119,7 @@ ExecStart=$REPO_DIR/venv/bin/gunicorn \\
     bakery_project.wsgi:application \\
     --bind 127.0.0.1:8000 \\
     --workers 3 \\
-    --threads 2 \\
+    --threads 4 \\
     --timeout 120 \\
     --log-level warning \\
     --access-logfile $APP_DIR/logs/access.log \\
@@ -133,7 +145,18 @@ RestartSec=5s
 WantedBy=multi-user.target
 EOF
 
+cp "$REPO_DIR/${APP_NAME}-retrieval.service" /etc/systemd/system/${APP_NAME}-retrieval.service
+
 systemctl daemon-reload
+if [ "$USE_SIDECAR" = "1" ]; then
+    systemctl enable ${APP_NAME}-retrieval
+    systemctl restart ${APP_NAME}-retrieval
+    echo "  ✓ Retrieval service started"
+else
+    # Without a socket each worker loads the model itself; make sure an old sidecar is not left running
+    systemctl disable --now ${APP_NAME}-retrieval 2>/dev/null || true
+    echo "  → RAG_SIDECAR_SOCKET not set in .env; retrieval sidecar disabled"
+fi
 systemctl enable ${APP_NAME}
 systemctl restart ${APP_NAME}
 echo "  ✓ Gunicorn service started"